@@ -0,0 +1,33 @@
+"""add_open_producers_index
+
+Revision ID: 8c1e4f2a9d37
+Revises: 4fc741f726dd
+Create Date: 2026-10-16 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c1e4f2a9d37'
+down_revision: Union[str, None] = '4fc741f726dd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # streams.camera_id is already covered by ix_streams_camera_id
+    op.create_index(
+        'ix_producers_stream_id_state_open',
+        'producers',
+        ['stream_id', 'state'],
+        unique=False,
+        postgresql_where=sa.text("state != 'CLOSED'")
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_producers_stream_id_state_open', table_name='producers')
@@ -0,0 +1,34 @@
+"""add_active_refresh_tokens_index
+
+Revision ID: b7d2e91c4a05
+Revises: 8c1e4f2a9d37
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d2e91c4a05'
+down_revision: Union[str, None] = '8c1e4f2a9d37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # refresh_tokens.token_hash and jwt_tokens.client_id already have unique
+    # indexes (ix_refresh_tokens_token_hash, ix_jwt_tokens_client_id)
+    op.create_index(
+        'ix_refresh_tokens_client_id_active',
+        'refresh_tokens',
+        ['client_id'],
+        unique=False,
+        postgresql_where=sa.text('NOT is_revoked')
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_refresh_tokens_client_id_active', table_name='refresh_tokens')
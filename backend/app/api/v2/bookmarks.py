@@ -2,7 +2,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks
 from fastapi.responses import FileResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, func, update
 from typing import Dict, Optional
 from uuid import UUID
 from datetime import datetime, timedelta
@@ -12,6 +12,7 @@ from app.models.bookmark import Bookmark
 from app.models.stream import Stream, StreamState
 from app.models.device import Device
 from app.middleware.jwt_auth import get_current_user, require_scope
+from app.services.bookmark_service import bookmark_service
 from loguru import logger
 import os
 import asyncio
@@ -57,6 +58,7 @@ async def extract_bookmark_video(
         if source == "live":
             # For live, capture directly from RTSP stream
             logger.info(f"Capturing live bookmark from RTSP: {rtsp_url}")
+            encoder = await bookmark_service.video_encoder()
             ffmpeg_cmd = [
                 "ffmpeg",
                 "-y",
@@ -64,12 +66,12 @@ async def extract_bookmark_video(
                 "-timeout", "5000000",
                 "-i", rtsp_url,
                 "-t", str(duration_seconds),
-                "-c:v", "libx264",
-                "-preset", "fast",
-                "-crf", "23",
+                *bookmark_service.ENCODER_ARGS[encoder],
                 "-an",  # No audio to speed up
                 "-movflags", "+faststart",
-                video_file_path
+                video_file_path,
+                # Thumbnail from the same run (no second FFmpeg on the MP4)
+                *bookmark_service.thumbnail_output_args(thumbnail_path)
             ]
         else:
             # For historical, extract from HLS recordings
@@ -117,72 +119,48 @@ async def extract_bookmark_video(
             first_segment_ts = segment_files[0][0]
             seek_offset = max(0, start_unix_ts - first_segment_ts)
 
-            ffmpeg_cmd = [
-                "ffmpeg",
-                "-y",
-                "-f", "concat",
-                "-safe", "0",
-                "-i", concat_file_path,
-                "-ss", str(seek_offset),
-                "-t", str(duration_seconds),
-                "-c:v", "libx264",
-                "-preset", "fast",
-                "-crf", "23",
-                "-an",
-                "-movflags", "+faststart",
-                video_file_path
-            ]
+            ffmpeg_cmd = await bookmark_service.historical_clip_command(
+                concat_file_path, segment_files[0][1], seek_offset,
+                duration_seconds, video_file_path, audio=False,
+                thumbnail_path=thumbnail_path
+            )
 
         # Run FFmpeg
         logger.info(f"Running FFmpeg: {' '.join(ffmpeg_cmd[:10])}...")
-        process = await asyncio.create_subprocess_exec(
-            *ffmpeg_cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE
-        )
-
-        try:
-            stdout, stderr = await asyncio.wait_for(
-                process.communicate(),
-                timeout=30.0
+        # Shares the bookmark FFmpeg limit with the synchronous capture paths
+        async with bookmark_service.ffmpeg_slot(ffmpeg_cmd):
+            process = await asyncio.create_subprocess_exec(
+                *ffmpeg_cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE
             )
-        except asyncio.TimeoutError:
-            process.kill()
-            await process.wait()
-            logger.error(f"FFmpeg timeout for bookmark {bookmark_id}")
-            return
+
+            try:
+                stdout, stderr = await asyncio.wait_for(
+                    process.communicate(),
+                    timeout=30.0
+                )
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                logger.error(f"FFmpeg timeout for bookmark {bookmark_id}")
+                return
 
         if process.returncode != 0:
             error_msg = stderr.decode() if stderr else "Unknown error"
             logger.error(f"FFmpeg failed for bookmark {bookmark_id}: {error_msg[:500]}")
             return
 
-        if not os.path.exists(video_file_path):
+        file_size, has_thumbnail = await asyncio.to_thread(
+            bookmark_service.clip_outputs, video_file_path, thumbnail_path
+        )
+        if file_size is None:
             logger.error(f"Video file not created for bookmark {bookmark_id}")
             return
 
-        file_size = os.path.getsize(video_file_path)
         logger.info(f"✅ Video extracted for bookmark {bookmark_id}: {video_file_path} ({file_size} bytes)")
 
-        # Generate thumbnail
-        thumb_cmd = [
-            "ffmpeg",
-            "-y",
-            "-ss", "00:00:03",
-            "-i", video_file_path,
-            "-frames:v", "1",
-            "-q:v", "2",
-            thumbnail_path
-        ]
-
-        thumb_process = await asyncio.create_subprocess_exec(
-            *thumb_cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE
-        )
-        await asyncio.wait_for(thumb_process.communicate(), timeout=10.0)
-
-        if os.path.exists(thumbnail_path):
+        if has_thumbnail:
             logger.info(f"✅ Thumbnail generated for bookmark {bookmark_id}")
 
         # Update database record with file paths
@@ -192,7 +170,7 @@ async def extract_bookmark_video(
 
             if bookmark:
                 bookmark.video_file_path = video_file_path
-                bookmark.thumbnail_path = thumbnail_path if os.path.exists(thumbnail_path) else None
+                bookmark.thumbnail_path = thumbnail_path if has_thumbnail else None
                 bookmark.file_size = file_size
                 await db.commit()
                 logger.info(f"✅ Database updated for bookmark {bookmark_id}")
@@ -200,8 +178,7 @@ async def extract_bookmark_video(
         # Cleanup concat file if historical
         if source == "historical":
             concat_file = os.path.join(stream_dir, f"concat_{bookmark_id}.txt")
-            if os.path.exists(concat_file):
-                os.remove(concat_file)
+            await asyncio.to_thread(bookmark_service.remove_files, concat_file)
 
     except Exception as e:
         logger.error(f"Error extracting video for bookmark {bookmark_id}: {str(e)}")
@@ -267,9 +244,10 @@ async def list_all_bookmarks(
         result = await db.execute(query)
         bookmarks = result.scalars().all()
 
-        # Build response (using correct model field names)
+        # Build response (using correct model field names); rows come from the DB,
+        # so skip per-row validation
         bookmark_responses = [
-            BookmarkResponse(
+            BookmarkResponse.model_construct(
                 id=b.id,
                 stream_id=b.stream_id,
                 center_timestamp=b.center_timestamp,
@@ -388,7 +366,6 @@ async def create_bookmark(
 
         db.add(new_bookmark)
         await db.commit()
-        await db.refresh(new_bookmark)
 
         logger.info(
             f"Created bookmark {new_bookmark.id} for stream {stream_id} "
@@ -489,9 +466,10 @@ async def list_bookmarks(
         result = await db.execute(query)
         bookmarks = result.scalars().all()
 
-        # Build response (using correct model field names)
+        # Build response (using correct model field names); rows come from the DB,
+        # so skip per-row validation
         bookmark_responses = [
-            BookmarkResponse(
+            BookmarkResponse.model_construct(
                 id=b.id,
                 stream_id=b.stream_id,
                 center_timestamp=b.center_timestamp,
@@ -685,7 +663,22 @@ async def update_bookmark(
     Cannot modify timestamps or video content, only metadata fields.
     """
     try:
-        query = select(Bookmark).where(Bookmark.id == bookmark_id)
+        # Update fields if provided, in a single UPDATE ... RETURNING
+        changes = {
+            column: value
+            for column, value in (
+                (Bookmark.label, request.label),
+                (Bookmark.event_type, request.event_type),
+                (Bookmark.confidence, request.confidence),
+                (Bookmark.tags, request.tags),
+                (Bookmark.extra_metadata, request.metadata),
+            )
+            if value is not None
+        }
+        if changes:
+            query = update(Bookmark).where(Bookmark.id == bookmark_id).values(changes).returning(Bookmark)
+        else:
+            query = select(Bookmark).where(Bookmark.id == bookmark_id)
         result = await db.execute(query)
         bookmark = result.scalar_one_or_none()
 
@@ -695,24 +688,7 @@ async def update_bookmark(
                 detail=f"Bookmark {bookmark_id} not found"
             )
 
-        # Update fields if provided
-        if request.label is not None:
-            bookmark.label = request.label
-
-        if request.event_type is not None:
-            bookmark.event_type = request.event_type
-
-        if request.confidence is not None:
-            bookmark.confidence = request.confidence
-
-        if request.tags is not None:
-            bookmark.tags = request.tags
-
-        if request.metadata is not None:
-            bookmark.extra_metadata = request.metadata
-
         await db.commit()
-        await db.refresh(bookmark)
 
         logger.info(f"Updated bookmark {bookmark_id} by {current_user['client_id']}")
 
@@ -767,18 +743,13 @@ async def delete_bookmark(
                 detail=f"Bookmark {bookmark_id} not found"
             )
 
-        # Delete physical files
-        if bookmark.video_file_path and os.path.exists(bookmark.video_file_path):
-            try:
-                os.remove(bookmark.video_file_path)
-            except Exception as e:
-                logger.warning(f"Failed to delete video file: {str(e)}")
-
-        if bookmark.thumbnail_path and os.path.exists(bookmark.thumbnail_path):
-            try:
-                os.remove(bookmark.thumbnail_path)
-            except Exception as e:
-                logger.warning(f"Failed to delete thumbnail: {str(e)}")
+        # Delete physical files (already-missing files are skipped)
+        try:
+            await asyncio.to_thread(
+                bookmark_service.remove_files, bookmark.video_file_path, bookmark.thumbnail_path
+            )
+        except Exception as e:
+            logger.warning(f"Failed to delete bookmark files: {str(e)}")
 
         # Delete database record
         await db.delete(bookmark)
@@ -143,7 +143,7 @@ async def attach_consumer(
             consumer_info = await mediasoup_client.consume(
                 transport_id=transport_info["id"],
                 producer_id=producer.mediasoup_producer_id,
-                rtp_capabilities=request.rtp_capabilities
+                rtp_capabilities=request.rtp_capabilities.model_dump(exclude_unset=True)
             )
 
             logger.info(f"Created MediaSoup consumer: {consumer_info['id']}")
@@ -170,22 +170,17 @@ async def attach_consumer(
 
         db.add(new_consumer)
         await db.commit()
-        await db.refresh(new_consumer)
 
         logger.info(
             f"Consumer {new_consumer.id} created for client {request.client_id} "
             f"on stream {stream_id}"
         )
 
-        # 6. Build response
-        transport = TransportInfo(
-            id=transport_info["id"],
-            ice_parameters=transport_info["iceParameters"],
-            ice_candidates=transport_info["iceCandidates"],
-            dtls_parameters=transport_info["dtlsParameters"]
-        )
+        # 6. Build response; values come from MediaSoup and our own UUID,
+        # so skip validation
+        transport = TransportInfo.from_mediasoup(transport_info)
 
-        return ConsumerAttachResponse(
+        return ConsumerAttachResponse.model_construct(
             consumer_id=new_consumer.id,
             transport=transport,
             rtp_parameters=consumer_info["rtpParameters"]
@@ -249,7 +244,7 @@ async def connect_consumer(
 
             await mediasoup_client.connect_webrtc_transport(
                 transport_id=consumer.mediasoup_transport_id,
-                dtls_parameters=request.dtls_parameters
+                dtls_parameters=request.dtls_parameters.model_dump(exclude_unset=True)
             )
 
             logger.info(f"Transport {consumer.mediasoup_transport_id} connected successfully")
@@ -8,6 +8,7 @@ Provides comprehensive health monitoring endpoints for:
 - MediaSoup producer health
 - Consumer session health
 """
+from datetime import datetime, timezone
 from typing import Optional
 from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException
@@ -19,7 +20,8 @@ from app.services.stream_ingestion_service import stream_ingestion_service
 from app.services.producer_service import producer_service
 from app.services.consumer_service import consumer_service
 from app.services.recording_management_service import recording_management_service
-from app.models.stream import Stream
+from app.models.stream import Stream, StreamState
+from app.models.producer import Producer, ProducerState
 from sqlalchemy import select, func
 
 router = APIRouter(prefix="/health", tags=["Health Monitoring"])
@@ -39,7 +41,6 @@ async def get_system_health(db: AsyncSession = Depends(get_db)):
     """
     try:
         # Count streams by state
-        from app.models.stream import StreamState
         stream_counts = {}
         for state in StreamState:
             count_query = select(func.count(Stream.id)).where(Stream.state == state)
@@ -120,7 +121,6 @@ async def get_stream_health(
 
         # Get producer health - query by stream_id, not producer_id attribute
         producer_health = None
-        from app.models.producer import Producer, ProducerState
         producer_query = select(Producer).where(
             Producer.stream_id == stream_id,
             Producer.state == ProducerState.ACTIVE
@@ -151,7 +151,6 @@ async def get_stream_health(
         started_at_str = stream.stream_metadata.get('started_at') if stream.stream_metadata else None
         if started_at_str:
             try:
-                from datetime import datetime, timezone
                 started_at = datetime.fromisoformat(started_at_str.replace('Z', '+00:00'))
                 uptime_seconds = int((datetime.now(timezone.utc) - started_at).total_seconds())
             except (ValueError, TypeError) as e:
@@ -1,6 +1,6 @@
 """Snapshot endpoints for V2 API."""
 from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks
-from fastapi.responses import FileResponse
+from app.services.snapshot_service import snapshot_service
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 from typing import Dict, Optional
@@ -227,9 +227,9 @@ async def list_all_snapshots(
         result = await db.execute(query)
         snapshots = result.scalars().all()
 
-        # Build response
+        # Build response; rows come from the DB, so skip per-row validation
         snapshot_responses = [
-            SnapshotResponse(
+            SnapshotResponse.model_construct(
                 id=s.id,
                 stream_id=s.stream_id,
                 timestamp=s.timestamp,
@@ -241,7 +241,7 @@ async def list_all_snapshots(
                 height=s.height,
                 image_url=f"/v2/snapshots/{s.id}/image" if s.file_path else None,
                 status="processing" if not s.file_path else "ready",
-                metadata=s.extra_metadata,
+                metadata=s.extra_metadata or {},
                 created_at=s.created_at
             )
             for s in snapshots
@@ -329,7 +329,6 @@ async def create_snapshot(
 
         db.add(new_snapshot)
         await db.commit()
-        await db.refresh(new_snapshot)
 
         logger.info(
             f"Created snapshot {new_snapshot.id} for stream {stream_id} "
@@ -418,9 +417,9 @@ async def list_snapshots(
         result = await db.execute(query)
         snapshots = result.scalars().all()
 
-        # Build response
+        # Build response; rows come from the DB, so skip per-row validation
         snapshot_responses = [
-            SnapshotResponse(
+            SnapshotResponse.model_construct(
                 id=s.id,
                 stream_id=s.stream_id,
                 timestamp=s.timestamp,
@@ -432,7 +431,7 @@ async def list_snapshots(
                 height=s.height,
                 image_url=f"/v2/snapshots/{s.id}/image" if s.file_path else None,
                 status="processing" if not s.file_path else "ready",
-                metadata=s.extra_metadata,
+                metadata=s.extra_metadata or {},
                 created_at=s.created_at
             )
             for s in snapshots
@@ -523,7 +522,12 @@ async def get_snapshot_image(
                 detail=f"Snapshot {snapshot_id} not found"
             )
 
-        if not snapshot.file_path or not os.path.exists(snapshot.file_path):
+        response = snapshot_service.image_response(
+            snapshot.file_path,
+            media_type=f"image/{snapshot.format}",
+            filename=f"snapshot_{snapshot_id}.{snapshot.format}"
+        )
+        if response is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Image file not found or still processing"
@@ -531,11 +535,7 @@ async def get_snapshot_image(
 
         logger.info(f"Serving image for snapshot {snapshot_id}")
 
-        return FileResponse(
-            path=snapshot.file_path,
-            media_type=f"image/{snapshot.format}",
-            filename=f"snapshot_{snapshot_id}.{snapshot.format}"
-        )
+        return response
 
     except HTTPException:
         raise
@@ -16,6 +16,7 @@ from app.models.stream import Stream, StreamState
 from app.models.producer import Producer, ProducerState
 from app.models.consumer import Consumer, ConsumerState
 from app.models.device import Device
+from app.services.device_cache import device_cache
 from app.services.stream_state_machine import transition
 from app.services.mediasoup_client import MediaSoupClient
 from app.middleware.jwt_auth import get_current_user, require_scope
@@ -193,7 +194,7 @@ async def create_stream(
         )
 
         await db.commit()
-        await db.refresh(new_stream)
+        await device_cache.invalidate(new_stream.camera_id)
 
         logger.info(f"Created stream {new_stream.id} for camera {request.camera_id} by {current_user['client_id']}")
 
@@ -354,6 +355,7 @@ async def delete_stream(
         # Delete stream (CASCADE will delete producers, consumers, bookmarks, snapshots)
         await db.delete(stream)
         await db.commit()
+        await device_cache.invalidate(stream.camera_id)
 
         logger.info(f"Deleted stream {stream_id} by {current_user['client_id']}")
 
@@ -421,7 +423,6 @@ async def get_stream_health(
             }
 
         # Get consumer statistics
-        from app.models.consumer import Consumer, ConsumerState
         consumer_query = select(Consumer).where(Consumer.stream_id == stream.id)
         consumer_result = await db.execute(consumer_query)
         consumers = consumer_result.scalars().all()
@@ -573,7 +574,6 @@ async def get_hls_playlist(
             )
 
         # Get camera to find recording path
-        from app.models.device import Device
         device_query = select(Device).where(Device.id == stream.camera_id)
         device_result = await db.execute(device_query)
         device = device_result.scalar_one_or_none()
@@ -662,7 +662,6 @@ async def get_hls_segment(
             )
 
         # Get camera for path
-        from app.models.device import Device
         device_query = select(Device).where(Device.id == stream.camera_id)
         device_result = await db.execute(device_query)
         device = device_result.scalar_one_or_none()
@@ -1,4 +1,5 @@
 """API Key authentication middleware."""
+import hmac
 import os
 from fastapi import Request, HTTPException, status
 from fastapi.responses import JSONResponse
@@ -66,7 +67,7 @@ async def verify_api_key(api_key: str, db: AsyncSession) -> bool:
     """Verify if the provided API key is valid and active."""
     
     # Check if using default API key from environment
-    if DEFAULT_API_KEY and api_key == DEFAULT_API_KEY:
+    if DEFAULT_API_KEY and hmac.compare_digest(api_key.encode(), DEFAULT_API_KEY.encode()):
         return True
     
     # Check database for API key
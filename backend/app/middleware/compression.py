@@ -0,0 +1,58 @@
+"""Response compression middleware."""
+from starlette.datastructures import MutableHeaders
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+# Content types worth compressing. Video, JPEG and TS segments are already
+# compressed, and gzipping them would also break Range requests. NDJSON
+# streams are left out: gzip buffers them and defeats incremental delivery.
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/vnd.apple.mpegurl",
+    "text/",
+)
+
+
+class TextGZipMiddleware:
+    """
+    GZip JSON/text responses only (e.g. large bookmark listings).
+
+    Wraps Starlette's GZipMiddleware, which leaves any response that already
+    carries a Content-Encoding untouched. Responses of other content types
+    are tagged "Content-Encoding: identity" on their way into it, and the tag
+    is removed again on the way out.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 500, compresslevel: int = 9):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compresslevel = compresslevel
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        tagged = False
+
+        async def app(scope: Scope, receive: Receive, gzip_send: Send) -> None:
+            async def send_tagged(message: Message) -> None:
+                nonlocal tagged
+                if message["type"] == "http.response.start":
+                    headers = MutableHeaders(scope=message)
+                    content_type = headers.get("content-type", "")
+                    if not content_type.startswith(COMPRESSIBLE_TYPES) and "content-encoding" not in headers:
+                        headers["Content-Encoding"] = "identity"
+                        tagged = True
+                await gzip_send(message)
+
+            await self.app(scope, receive, send_tagged)
+
+        async def send_untagged(message: Message) -> None:
+            if tagged and message["type"] == "http.response.start":
+                del MutableHeaders(scope=message)["content-encoding"]
+            await send(message)
+
+        gzip = GZipMiddleware(app, minimum_size=self.minimum_size, compresslevel=self.compresslevel)
+        await gzip(scope, receive, send_untagged)
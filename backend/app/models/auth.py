@@ -1,5 +1,5 @@
 """Authentication models for JWT tokens."""
-from sqlalchemy import Column, String, DateTime, Boolean, ARRAY, func
+from sqlalchemy import Column, String, DateTime, Boolean, ARRAY, Index, func, text
 from sqlalchemy.dialects.postgresql import UUID
 from database import Base
 import uuid
@@ -51,6 +51,15 @@ class RefreshToken(Base):
     """
 
     __tablename__ = "refresh_tokens"
+    __table_args__ = (
+        # A client's live tokens (revoked-on-deactivate); rotation leaves most
+        # rows revoked, so the partial index stays small
+        Index(
+            "ix_refresh_tokens_client_id_active",
+            "client_id",
+            postgresql_where=text("NOT is_revoked")
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     token_hash = Column(String(255), nullable=False, unique=True, index=True)
@@ -1,5 +1,5 @@
 """Producer model for MediaSoup producers."""
-from sqlalchemy import Column, String, ForeignKey, BigInteger, JSON, Enum as SQLEnum, DateTime, func
+from sqlalchemy import Column, String, ForeignKey, BigInteger, JSON, Enum as SQLEnum, DateTime, Index, func, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from database import Base
@@ -26,6 +26,16 @@ class Producer(Base):
     """
 
     __tablename__ = "producers"
+    __table_args__ = (
+        # Lookups of a stream's open producers; most rows are CLOSED, so the
+        # partial index stays small
+        Index(
+            "ix_producers_stream_id_state_open",
+            "stream_id",
+            "state",
+            postgresql_where=text("state != 'CLOSED'")
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     stream_id = Column(
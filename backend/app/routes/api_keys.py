@@ -36,8 +36,7 @@ class ApiKeyResponse(BaseModel):
     created_at: datetime
     updated_at: Optional[datetime]
 
-    class Config:
-        from_attributes = True
+    model_config = {"from_attributes": True}
 
 
 class ApiKeyCreateResponse(ApiKeyResponse):
@@ -82,7 +81,6 @@ async def create_api_key(
 
     db.add(db_api_key)
     await db.commit()
-    await db.refresh(db_api_key)
 
     # Convert to response model
     response = ApiKeyCreateResponse(
@@ -227,7 +225,6 @@ async def activate_api_key(
 
     api_key.is_active = True
     await db.commit()
-    await db.refresh(api_key)
 
     return ApiKeyResponse(
         id=str(api_key.id),
@@ -1,15 +1,21 @@
 """
 Bookmark management API routes.
 """
-from fastapi import APIRouter, HTTPException, status, Depends, Query
-from fastapi.responses import FileResponse
-from typing import Dict, Any, List, Optional
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
 from datetime import datetime
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from functools import wraps
+from uuid import UUID
+import asyncio
+import os
+import orjson
+from sqlalchemy.ext.asyncio import AsyncSession, AsyncResult
+from sqlalchemy import select, func, lambda_stmt, bindparam
 from app.services.bookmark_service import bookmark_service
 from app.models.bookmark import Bookmark
 from app.models.device import Device
+from app.models.stream import Stream
 from app.schemas.bookmark import (
     BookmarkCreate,
     BookmarkHistoricalCreate,
@@ -17,16 +23,166 @@ from app.schemas.bookmark import (
     BookmarkResponse,
     BookmarkListResponse
 )
-from database import get_db
+from database import get_db, AsyncSessionLocal
 from loguru import logger
 
 
-router = APIRouter(prefix="/api/v1/bookmarks", tags=["bookmarks"])
+BOOKMARK_URL_PREFIX = "/api/v1/bookmarks/"
+
+router = APIRouter(prefix=BOOKMARK_URL_PREFIX.rstrip("/"), tags=["bookmarks"])
+
+# Cached statements for the device lookups every route performs. Bookmarks
+# belong to a stream, so the device is reached through the stream; new
+# bookmarks go to the device's latest stream.
+_DEVICE_BY_ID = lambda_stmt(lambda: select(Device).where(Device.id == bindparam("device_id")))
+_LATEST_STREAM_ID = lambda_stmt(
+    lambda: select(Stream.id)
+    .where(Stream.camera_id == bindparam("device_id"))
+    .order_by(Stream.created_at.desc())
+    .limit(1)
+)
+_STREAM_DEVICE = lambda_stmt(
+    lambda: select(Stream.camera_id, Device.name)
+    .outerjoin(Device, Device.id == Stream.camera_id)
+    .where(Stream.id == bindparam("stream_id"))
+)
+
+# Rows fetched per round-trip by the listing's server-side cursor
+LIST_BATCH_SIZE = 50
+
+# Clients keep bookmark media but revalidate it (cheap 304s via the ETag),
+# so a regenerated or deleted file is never served stale
+MEDIA_CACHE_CONTROL = "public, no-cache"
+
+
+def handle_errors(message: str):
+    """
+    Map unexpected route errors to HTTP responses.
+
+    HTTPExceptions pass through, missing files become 404 and anything
+    else is logged and returned as a 500 prefixed with ``message``.
+    """
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            try:
+                return await func(*args, **kwargs)
+            except HTTPException:
+                raise
+            except FileNotFoundError as e:
+                logger.error(f"File not found: {e}")
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=str(e)
+                )
+            except Exception as e:
+                logger.error(f"{message}: {e}")
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail=f"{message}: {str(e)}"
+                )
+        return wrapper
+    return decorator
+
+
+async def _media_response(path: str, request: Request, missing_detail: str, **kwargs) -> Response:
+    """
+    Serve a bookmark media file with an ETag derived from its mtime and size.
+
+    The file is stat'ed first, so a deleted file is a 404 even for a client
+    holding a matching ETag; a matching If-None-Match gets a 304.
+    """
+    try:
+        stat_result = await asyncio.to_thread(os.stat, path)
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=missing_detail
+        )
+
+    etag = f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+    cache_headers = {"ETag": etag, "Cache-Control": MEDIA_CACHE_CONTROL}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers)
+
+    return FileResponse(path, stat_result=stat_result, headers=cache_headers, **kwargs)
+
+
+def _bookmarks_q():
+    """Bookmarks with the device ID and name of the stream they were cut from."""
+    return (
+        select(Bookmark, Stream.camera_id, Device.name)
+        .join(Stream, Stream.id == Bookmark.stream_id)
+        .outerjoin(Device, Device.id == Stream.camera_id)
+    )
+
+
+async def _stream_json_page(
+    session: AsyncSession,
+    result: AsyncResult,
+    head: Dict[str, Any]
+) -> AsyncIterator[bytes]:
+    """
+    Write a listing page as ``{**head, "bookmarks": [...]}``, one cursor batch at a time.
+
+    Owns ``session`` (the cursor's transaction) and closes it when the body
+    is done or the client goes away.
+    """
+    try:
+        yield orjson.dumps(head)[:-1] + b',"bookmarks":['
+        separator = b""
+        async for rows in result.partitions():
+            yield separator + b",".join(orjson.dumps(_bookmark_row(*row)) for row in rows)
+            separator = b","
+        yield b"]}"
+    finally:
+        await session.close()
+
+
+async def _device_with_stream(db: AsyncSession, device_id: UUID) -> Tuple[Device, UUID]:
+    """Get a device and the ID of its latest stream, or raise 404."""
+    result = await db.execute(_DEVICE_BY_ID, {"device_id": device_id})
+    device = result.scalars().first()
+    if not device:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Device not found"
+        )
+
+    result = await db.execute(_LATEST_STREAM_ID, {"device_id": device_id})
+    stream_id = result.scalar()
+    if stream_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Device has no stream to bookmark (start it first)"
+        )
+    return device, stream_id
+
+
+def _bookmark_row(b: Bookmark, device_id: Optional[UUID], device_name: Optional[str]) -> Dict[str, Any]:
+    """Build the public response dict for a bookmark."""
+    base_url = BOOKMARK_URL_PREFIX + str(b.id)
+    return {
+        "id": b.id,
+        "device_id": device_id,
+        "device_name": device_name or "Unknown",
+        "center_timestamp": b.center_timestamp.isoformat(),
+        "start_timestamp": b.start_timestamp.isoformat(),
+        "end_timestamp": b.end_timestamp.isoformat(),
+        "label": b.label,
+        "source": b.source,
+        "duration": b.duration,
+        "file_size": b.file_size,
+        "created_at": b.created_at.isoformat() if b.created_at else None,
+        "video_url": base_url + "/video",
+        "thumbnail_url": base_url + "/thumbnail" if b.thumbnail_path else None
+    }
 
 
 @router.post("/devices/{device_id}/capture/live")
+@handle_errors("Failed to capture bookmark")
 async def capture_live_bookmark(
-    device_id: str,
+    device_id: UUID,
     request: BookmarkCreate,
     db: AsyncSession = Depends(get_db)
 ) -> Dict[str, Any]:
@@ -41,59 +197,26 @@ async def capture_live_bookmark(
     Returns:
         Bookmark information
     """
-    try:
-        # Get device
-        result = await db.execute(select(Device).filter(Device.id == device_id))
-        device = result.scalars().first()
-        if not device:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Device not found"
-            )
-
-        # Capture bookmark
-        bookmark = await bookmark_service.capture_from_live_stream(
-            device_id=device_id,
-            rtsp_url=device.rtsp_url,
-            label=request.label,
-            db=db
-        )
+    device, stream_id = await _device_with_stream(db, device_id)
 
-        return {
-            "status": "success",
-            "bookmark": {
-                "id": str(bookmark.id),
-                "device_id": str(bookmark.device_id),
-                "device_name": device.name,
-                "center_timestamp": bookmark.center_timestamp.isoformat(),
-                "start_timestamp": bookmark.start_timestamp.isoformat(),
-                "end_timestamp": bookmark.end_timestamp.isoformat(),
-                "label": bookmark.label,
-                "source": bookmark.source,
-                "duration": bookmark.duration,
-                "file_size": bookmark.file_size,
-                "video_url": f"/api/v1/bookmarks/{bookmark.id}/video",
-                "thumbnail_url": f"/api/v1/bookmarks/{bookmark.id}/thumbnail" if bookmark.thumbnail_path else None
-            }
-        }
+    # Capture bookmark
+    bookmark = await bookmark_service.capture_from_live_stream(
+        stream_id=stream_id,
+        rtsp_url=device.rtsp_url,
+        label=request.label,
+        db=db
+    )
 
-    except FileNotFoundError as e:
-        logger.error(f"File not found: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=str(e)
-        )
-    except Exception as e:
-        logger.error(f"Failed to capture live bookmark: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to capture bookmark: {str(e)}"
-        )
+    return {
+        "status": "success",
+        "bookmark": _bookmark_row(bookmark, device_id, device.name)
+    }
 
 
 @router.post("/devices/{device_id}/capture/historical")
+@handle_errors("Failed to capture bookmark")
 async def capture_historical_bookmark(
-    device_id: str,
+    device_id: UUID,
     request: BookmarkHistoricalCreate,
     db: AsyncSession = Depends(get_db)
 ) -> Dict[str, Any]:
@@ -108,145 +231,86 @@ async def capture_historical_bookmark(
     Returns:
         Bookmark information
     """
+    device, stream_id = await _device_with_stream(db, device_id)
+
+    # Parse timestamp
     try:
-        # Get device
-        result = await db.execute(select(Device).filter(Device.id == device_id))
-        device = result.scalars().first()
-        if not device:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Device not found"
-            )
-
-        # Parse timestamp
-        try:
-            center_timestamp = datetime.fromisoformat(request.center_timestamp.replace('Z', '+00:00'))
-        except ValueError:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid timestamp format. Use ISO 8601 format."
-            )
-
-        # Capture bookmark
-        bookmark = await bookmark_service.capture_from_historical(
-            device_id=device_id,
-            center_timestamp=center_timestamp,
-            label=request.label,
-            db=db
+        center_timestamp = datetime.fromisoformat(request.center_timestamp.replace('Z', '+00:00'))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid timestamp format. Use ISO 8601 format."
         )
 
-        return {
-            "status": "success",
-            "bookmark": {
-                "id": str(bookmark.id),
-                "device_id": str(bookmark.device_id),
-                "device_name": device.name,
-                "center_timestamp": bookmark.center_timestamp.isoformat(),
-                "start_timestamp": bookmark.start_timestamp.isoformat(),
-                "end_timestamp": bookmark.end_timestamp.isoformat(),
-                "label": bookmark.label,
-                "source": bookmark.source,
-                "duration": bookmark.duration,
-                "file_size": bookmark.file_size,
-                "video_url": f"/api/v1/bookmarks/{bookmark.id}/video",
-                "thumbnail_url": f"/api/v1/bookmarks/{bookmark.id}/thumbnail" if bookmark.thumbnail_path else None
-            }
-        }
+    # Capture bookmark
+    bookmark = await bookmark_service.capture_from_historical(
+        stream_id=stream_id,
+        center_timestamp=center_timestamp,
+        label=request.label,
+        db=db
+    )
 
-    except FileNotFoundError as e:
-        logger.error(f"File not found: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=str(e)
-        )
-    except Exception as e:
-        logger.error(f"Failed to capture historical bookmark: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to capture bookmark: {str(e)}"
-        )
+    return {
+        "status": "success",
+        "bookmark": _bookmark_row(bookmark, device_id, device.name)
+    }
 
 
 @router.get("")
+@handle_errors("Failed to list bookmarks")
 async def list_bookmarks(
-    device_id: Optional[str] = Query(None, description="Filter by device ID"),
+    device_id: Optional[UUID] = Query(None, description="Filter by device ID"),
     skip: int = Query(0, ge=0, description="Number of records to skip"),
-    limit: int = Query(100, ge=1, le=500, description="Max records to return"),
-    db: AsyncSession = Depends(get_db)
-) -> Dict[str, Any]:
+    limit: int = Query(100, ge=1, le=500, description="Max records to return")
+) -> StreamingResponse:
     """
     Get list of all bookmarks with optional filtering.
 
+    Rows are read through a server-side cursor and written to the response
+    as they arrive, so a page is never held in memory as a whole. The
+    cursor needs its own session: the request's get_db session is closed
+    before a streaming body is sent.
+
     Args:
         device_id: Optional device UUID filter
         skip: Pagination offset
         limit: Max records per page
-        db: Database session
 
     Returns:
         List of bookmarks with pagination info
     """
-    try:
-        # Get bookmarks
-        bookmarks = await bookmark_service.get_bookmarks(
-            db=db,
-            device_id=device_id,
-            skip=skip,
-            limit=limit
+    # Bookmarks with their device names in one query
+    query = _bookmarks_q()
+    count_query = select(func.count(Bookmark.id))
+    if device_id:
+        query = query.where(Stream.camera_id == device_id)
+        count_query = count_query.join(Stream, Stream.id == Bookmark.stream_id).where(
+            Stream.camera_id == device_id
         )
+    query = query.order_by(Bookmark.created_at.desc()).offset(skip).limit(limit)
 
-        # Get device names (join)
-        device_ids = [str(b.device_id) for b in bookmarks]
-        device_result = await db.execute(
-            select(Device).filter(Device.id.in_(device_ids))
-        )
-        devices = {str(d.id): d.name for d in device_result.scalars().all()}
-
+    session = AsyncSessionLocal()
+    try:
         # Get total count
-        count_query = select(func.count(Bookmark.id))
-        if device_id:
-            count_query = count_query.filter(Bookmark.device_id == device_id)
-        total_result = await db.execute(count_query)
+        total_result = await session.execute(count_query)
         total = total_result.scalar()
 
-        # Format response
-        bookmark_list = [
-            {
-                "id": str(b.id),
-                "device_id": str(b.device_id),
-                "device_name": devices.get(str(b.device_id), "Unknown"),
-                "center_timestamp": b.center_timestamp.isoformat(),
-                "start_timestamp": b.start_timestamp.isoformat(),
-                "end_timestamp": b.end_timestamp.isoformat(),
-                "label": b.label,
-                "source": b.source,
-                "duration": b.duration,
-                "file_size": b.file_size,
-                "created_at": b.created_at.isoformat() if b.created_at else None,
-                "video_url": f"/api/v1/bookmarks/{b.id}/video",
-                "thumbnail_url": f"/api/v1/bookmarks/{b.id}/thumbnail" if b.thumbnail_path else None
-            }
-            for b in bookmarks
-        ]
-
-        return {
-            "bookmarks": bookmark_list,
-            "total": total,
-            "page": skip // limit + 1,
-            "page_size": limit
-        }
+        result = await session.stream(query.execution_options(yield_per=LIST_BATCH_SIZE))
+    except Exception:
+        await session.close()
+        raise
 
-    except Exception as e:
-        logger.error(f"Failed to list bookmarks: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to list bookmarks: {str(e)}"
-        )
+    head = {"total": total, "page": skip // limit + 1, "page_size": limit}
+    return StreamingResponse(
+        _stream_json_page(session, result, head),
+        media_type="application/json"
+    )
 
 
 @router.get("/{bookmark_id}")
+@handle_errors("Failed to get bookmark")
 async def get_bookmark(
-    bookmark_id: str,
+    bookmark_id: UUID,
     db: AsyncSession = Depends(get_db)
 ) -> Dict[str, Any]:
     """
@@ -259,51 +323,25 @@ async def get_bookmark(
     Returns:
         Bookmark information
     """
-    try:
-        bookmark = await bookmark_service.get_bookmark(bookmark_id, db)
-        if not bookmark:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Bookmark not found"
-            )
-
-        # Get device name
-        device_result = await db.execute(
-            select(Device).filter(Device.id == bookmark.device_id)
-        )
-        device = device_result.scalars().first()
-
-        return {
-            "id": str(bookmark.id),
-            "device_id": str(bookmark.device_id),
-            "device_name": device.name if device else "Unknown",
-            "center_timestamp": bookmark.center_timestamp.isoformat(),
-            "start_timestamp": bookmark.start_timestamp.isoformat(),
-            "end_timestamp": bookmark.end_timestamp.isoformat(),
-            "label": bookmark.label,
-            "source": bookmark.source,
-            "duration": bookmark.duration,
-            "video_format": bookmark.video_format,
-            "file_size": bookmark.file_size,
-            "created_at": bookmark.created_at.isoformat() if bookmark.created_at else None,
-            "updated_at": bookmark.updated_at.isoformat() if bookmark.updated_at else None,
-            "video_url": f"/api/v1/bookmarks/{bookmark.id}/video",
-            "thumbnail_url": f"/api/v1/bookmarks/{bookmark.id}/thumbnail" if bookmark.thumbnail_path else None
-        }
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Failed to get bookmark: {e}")
+    result = await db.execute(_bookmarks_q().where(Bookmark.id == bookmark_id))
+    found = result.first()
+    if not found:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to get bookmark: {str(e)}"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Bookmark not found"
         )
 
+    bookmark = found[0]
+    row = _bookmark_row(*found)
+    row["video_format"] = bookmark.video_format
+    row["updated_at"] = bookmark.updated_at.isoformat() if bookmark.updated_at else None
+    return row
+
 
 @router.put("/{bookmark_id}")
+@handle_errors("Failed to update bookmark")
 async def update_bookmark(
-    bookmark_id: str,
+    bookmark_id: UUID,
     request: BookmarkUpdate,
     db: AsyncSession = Depends(get_db)
 ) -> Dict[str, Any]:
@@ -318,49 +356,38 @@ async def update_bookmark(
     Returns:
         Updated bookmark information
     """
-    try:
-        bookmark = await bookmark_service.update_bookmark(
-            bookmark_id=bookmark_id,
-            label=request.label,
-            db=db
+    bookmark = await bookmark_service.update_bookmark(
+        bookmark_id=bookmark_id,
+        label=request.label,
+        db=db
+    )
+
+    if not bookmark:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Bookmark not found"
         )
 
-        if not bookmark:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Bookmark not found"
-            )
+    # Get device ID and name via the bookmark's stream
+    device_result = await db.execute(_STREAM_DEVICE, {"stream_id": bookmark.stream_id})
+    device_id, device_name = device_result.first() or (None, None)
 
-        # Get device name
-        device_result = await db.execute(
-            select(Device).filter(Device.id == bookmark.device_id)
-        )
-        device = device_result.scalars().first()
-
-        return {
-            "status": "success",
-            "bookmark": {
-                "id": str(bookmark.id),
-                "device_id": str(bookmark.device_id),
-                "device_name": device.name if device else "Unknown",
-                "label": bookmark.label,
-                "updated_at": bookmark.updated_at.isoformat() if bookmark.updated_at else None
-            }
+    return {
+        "status": "success",
+        "bookmark": {
+            "id": bookmark.id,
+            "device_id": device_id,
+            "device_name": device_name or "Unknown",
+            "label": bookmark.label,
+            "updated_at": bookmark.updated_at.isoformat() if bookmark.updated_at else None
         }
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Failed to update bookmark: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to update bookmark: {str(e)}"
-        )
+    }
 
 
 @router.delete("/{bookmark_id}")
+@handle_errors("Failed to delete bookmark")
 async def delete_bookmark(
-    bookmark_id: str,
+    bookmark_id: UUID,
     db: AsyncSession = Depends(get_db)
 ) -> Dict[str, Any]:
     """
@@ -373,32 +400,24 @@ async def delete_bookmark(
     Returns:
         Success status
     """
-    try:
-        deleted = await bookmark_service.delete_bookmark(bookmark_id, db)
-        if not deleted:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Bookmark not found"
-            )
-
-        return {
-            "status": "success",
-            "message": "Bookmark deleted successfully"
-        }
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Failed to delete bookmark: {e}")
+    deleted = await bookmark_service.delete_bookmark(bookmark_id, db)
+    if not deleted:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to delete bookmark: {str(e)}"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Bookmark not found"
         )
 
+    return {
+        "status": "success",
+        "message": "Bookmark deleted successfully"
+    }
+
 
 @router.get("/{bookmark_id}/video")
+@handle_errors("Failed to get video")
 async def get_bookmark_video(
-    bookmark_id: str,
+    bookmark_id: UUID,
+    request: Request,
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -406,45 +425,33 @@ async def get_bookmark_video(
 
     Args:
         bookmark_id: Bookmark UUID
+        request: Incoming request (for If-None-Match)
         db: Database session
 
     Returns:
         Video file
     """
-    try:
-        bookmark = await bookmark_service.get_bookmark(bookmark_id, db)
-        if not bookmark:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Bookmark not found"
-            )
-
-        import os
-        if not os.path.exists(bookmark.video_file_path):
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Video file not found"
-            )
-
-        return FileResponse(
-            bookmark.video_file_path,
-            media_type="video/mp4",
-            filename=f"bookmark_{bookmark.id}.mp4"
-        )
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Failed to get bookmark video: {e}")
+    bookmark = await bookmark_service.get_bookmark(bookmark_id, db)
+    if not bookmark:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to get video: {str(e)}"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Bookmark not found"
         )
 
+    return await _media_response(
+        bookmark.video_file_path,
+        request,
+        "Video file not found",
+        media_type="video/mp4",
+        filename=f"bookmark_{bookmark.id}.mp4"
+    )
+
 
 @router.get("/{bookmark_id}/thumbnail")
+@handle_errors("Failed to get thumbnail")
 async def get_bookmark_thumbnail(
-    bookmark_id: str,
+    bookmark_id: UUID,
+    request: Request,
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -452,42 +459,28 @@ async def get_bookmark_thumbnail(
 
     Args:
         bookmark_id: Bookmark UUID
+        request: Incoming request (for If-None-Match)
         db: Database session
 
     Returns:
         Thumbnail image
     """
-    try:
-        bookmark = await bookmark_service.get_bookmark(bookmark_id, db)
-        if not bookmark:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Bookmark not found"
-            )
-
-        if not bookmark.thumbnail_path:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Thumbnail not available"
-            )
-
-        import os
-        if not os.path.exists(bookmark.thumbnail_path):
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Thumbnail file not found"
-            )
-
-        return FileResponse(
-            bookmark.thumbnail_path,
-            media_type="image/jpeg"
+    bookmark = await bookmark_service.get_bookmark(bookmark_id, db)
+    if not bookmark:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Bookmark not found"
         )
 
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Failed to get bookmark thumbnail: {e}")
+    if not bookmark.thumbnail_path:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to get thumbnail: {str(e)}"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Thumbnail not available"
         )
+
+    return await _media_response(
+        bookmark.thumbnail_path,
+        request,
+        "Thumbnail file not found",
+        media_type="image/jpeg"
+    )
@@ -387,8 +387,6 @@ async def _serve_historical_playlist(
 async def get_segment(device_id: str, segment_name: str) -> FileResponse:
     """Get a specific recording segment (looks in today's directory)."""
     try:
-        from datetime import datetime
-
         # Try today's date first
         today = datetime.now().strftime("%Y%m%d")
         segment_path = f"/recordings/hot/{device_id}/{today}/{segment_name}"
@@ -7,17 +7,32 @@ The main differences:
 - Old VAS used peer-to-peer WebRTC; new VAS-MS uses MediaSoup SFU
 - Old VAS had different endpoint naming conventions
 """
+import os
+from datetime import datetime, timezone
+
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Dict, Any, List, Optional
 from uuid import UUID
 from pydantic import BaseModel
 
+from config.settings import settings
 from database import get_db
 from app.models import Device
+from app.services.device_cache import device_cache
+from app.services.device_stream_service import device_stream_service, video_rtp_parameters
+from app.services.mediasoup_client import mediasoup_client
+from app.services.rtsp_pipeline import rtsp_pipeline
 from loguru import logger
 
-router = APIRouter(prefix="/api", tags=["Ruth-AI Compatibility"])
+router = APIRouter(prefix="/api", tags=["Ruth-AI Compatibility"], default_response_class=ORJSONResponse)
+
+# Connection details handed to clients; read once at import
+BACKEND_HOST = os.getenv("BACKEND_HOST", "10.30.250.245:8080")
+WEBSOCKET_URL = f"ws://{BACKEND_HOST}/ws/mediasoup"
+MEDIASOUP_URL = os.getenv("MEDIASOUP_URL", "ws://10.30.250.245:3001")
 
 
 class WebRTCStreamRequest(BaseModel):
@@ -47,7 +62,6 @@ async def list_devices_compat(
 
     This provides compatibility for Ruth-AI.
     """
-    from sqlalchemy import select
 
     result = await db.execute(select(Device))
     devices = result.scalars().all()
@@ -81,7 +95,6 @@ async def get_device_compat(
     Old endpoint: GET /api/devices/{id}
     New endpoint: GET /api/v1/devices/{id}
     """
-    from sqlalchemy import select
 
     try:
         device_uuid = UUID(device_id)
@@ -143,8 +156,6 @@ async def start_webrtc_stream_compat(
     Old endpoint: POST /api/devices/{id}/stream
     New endpoint: POST /api/v1/devices/{id}/start-stream (and this compatibility endpoint)
     """
-    from sqlalchemy import select
-    import os
 
     try:
         device_uuid = UUID(device_id)
@@ -167,35 +178,28 @@ async def start_webrtc_stream_compat(
         )
 
     # Start the stream using the existing endpoint logic
-    from app.services.rtsp_pipeline import rtsp_pipeline
-    from app.services.mediasoup_client import mediasoup_client
-    import asyncio
 
     try:
         room_id = str(device_uuid)
 
         # CHECK: If stream is already active, return existing stream info instead of restarting
         # This prevents disrupting active streams when Ruth AI or VAS portal reconnects
-        if room_id in rtsp_pipeline.active_streams:
+        stream_info = await device_stream_service.find_reusable(room_id, device.rtsp_url)
+        if stream_info is not None:
             logger.info(f"Stream already active for device {device_id}, returning existing stream info (Ruth AI compat)")
-            stream_info = rtsp_pipeline.active_streams[room_id]
 
             # Get existing producers for this room
             try:
                 existing_producers = await mediasoup_client.get_producers(room_id)
                 if existing_producers:
                     # Return MediaSoup connection details for existing stream
-                    backend_host = os.getenv("BACKEND_HOST", "10.30.250.245:8080")
-                    websocket_url = f"ws://{backend_host}/ws/mediasoup"
-                    mediasoup_url = os.getenv("MEDIASOUP_URL", "ws://10.30.250.245:3001")
-
                     return {
                         "status": "success",
                         "stream_id": room_id,
                         "room_id": room_id,
                         "device_id": str(device_uuid),
-                        "websocket_url": websocket_url,
-                        "mediasoup_url": mediasoup_url,
+                        "websocket_url": WEBSOCKET_URL,
+                        "mediasoup_url": MEDIASOUP_URL,
                         "transport_id": stream_info.get("transport_id", "unknown"),
                         "producer_id": existing_producers[-1] if existing_producers else "unknown",
                         "connection_info": {
@@ -210,27 +214,8 @@ async def start_webrtc_stream_compat(
                 # If we can't get producer info, fall through to restart the stream
                 await rtsp_pipeline.stop_stream(room_id)
 
-        # Kill orphaned FFmpeg processes
-        import subprocess
-        try:
-            result = subprocess.run(
-                ["pgrep", "-f", f"ffmpeg.*{device.rtsp_url}"],
-                capture_output=True,
-                text=True,
-                timeout=2
-            )
-            if result.returncode == 0:
-                pids = result.stdout.strip().split('\n')
-                for pid in pids:
-                    if pid:
-                        try:
-                            os.kill(int(pid), 15)
-                            logger.info(f"Killed orphaned FFmpeg process {pid}")
-                        except (ProcessLookupError, ValueError):
-                            pass
-                await asyncio.sleep(1.5)
-        except Exception as e:
-            logger.warning(f"Error cleaning up FFmpeg: {e}")
+        # Kill orphaned FFmpeg processes (returns as soon as they have exited)
+        await device_stream_service.kill_orphaned_ffmpeg(device.rtsp_url)
 
         # Create PlainRTP transport
         logger.info(f"Creating PlainRTP transport for device {device_id}")
@@ -247,7 +232,7 @@ async def start_webrtc_stream_compat(
 
         # Capture SSRC
         logger.info(f"Capturing SSRC from RTSP source: {device.rtsp_url}")
-        detected_ssrc = await rtsp_pipeline.capture_ssrc_with_temp_ffmpeg(device.rtsp_url, timeout=15.0)
+        detected_ssrc = await rtsp_pipeline.capture_ssrc_cached(device.rtsp_url, timeout=15.0)
 
         if not detected_ssrc:
             raise HTTPException(
@@ -257,43 +242,29 @@ async def start_webrtc_stream_compat(
 
         logger.info(f"SSRC captured: {detected_ssrc}")
 
-        # Create producer
-        video_rtp_parameters = {
-            "mid": "video",
-            "codecs": [{
-                "mimeType": "video/H264",
-                "clockRate": 90000,
-                "parameters": {
-                    "packetization-mode": 1,
-                    "profile-level-id": "42e01f"
-                },
-                "payloadType": 96
-            }],
-            "encodings": [{"ssrc": detected_ssrc}]
-        }
-
         # Close any old producers for this room to prevent accumulation
         try:
             old_producers = await mediasoup_client.get_producers(room_id)
             if old_producers:
                 logger.info(f"Found {len(old_producers)} old producer(s) for room {room_id}, cleaning up...")
+                failures = await mediasoup_client.close_producers(old_producers)
                 for old_producer_id in old_producers:
-                    try:
-                        await mediasoup_client.close_producer(old_producer_id)
+                    if old_producer_id in failures:
+                        logger.warning(f"Failed to close old producer {old_producer_id}: {failures[old_producer_id]}")
+                    else:
                         logger.info(f"Closed old producer: {old_producer_id}")
-                    except Exception as e:
-                        logger.warning(f"Failed to close old producer {old_producer_id}: {e}")
         except Exception as e:
             logger.warning(f"Error cleaning up old producers: {e}")
 
+        # Create producer
         logger.info(f"Creating producer with SSRC: {detected_ssrc}")
         video_producer = await mediasoup_client.create_producer(
-            transport_id, "video", video_rtp_parameters
+            transport_id, "video", video_rtp_parameters(detected_ssrc)
         )
 
         # Start FFmpeg
         # Both backend and MediaSoup run in host network mode
-        mediasoup_host = os.getenv("MEDIASOUP_HOST", "127.0.0.1")
+        mediasoup_host = settings.mediasoup_host
         stream_info = await rtsp_pipeline.start_stream(
             stream_id=room_id,
             rtsp_url=device.rtsp_url,
@@ -311,22 +282,27 @@ async def start_webrtc_stream_compat(
         # Update device
         device.is_active = True
         await db.commit()
+        await device_cache.invalidate(device_uuid)
 
-        # Return MediaSoup connection details
-        # Client should connect to the WebSocket proxy endpoint
-        backend_host = os.getenv("BACKEND_HOST", "10.30.250.245:8080")
-        websocket_url = f"ws://{backend_host}/ws/mediasoup"
-
-        # For direct MediaSoup connection (alternative)
-        mediasoup_url = os.getenv("MEDIASOUP_URL", "ws://10.30.250.245:3001")
+        # Publish to other workers so their reconnect/status checks see this
+        # stream; same non-blocking registration as the device start path
+        stream_info["started_at"] = datetime.now(timezone.utc).isoformat()
+        device_stream_service.publish_active(room_id, {
+            "transport_id": transport_id,
+            "producer_id": video_producer["id"],
+            "ssrc": detected_ssrc,
+            "started_at": stream_info["started_at"],
+            "rtsp_url": device.rtsp_url
+        })
 
+        # Return MediaSoup connection details
         return {
             "status": "success",
             "stream_id": room_id,
             "room_id": room_id,
             "device_id": str(device_uuid),
-            "websocket_url": websocket_url,  # Recommended: through backend proxy
-            "mediasoup_url": mediasoup_url,  # Alternative: direct to MediaSoup
+            "websocket_url": WEBSOCKET_URL,  # Recommended: through backend proxy
+            "mediasoup_url": MEDIASOUP_URL,  # Alternative: direct to MediaSoup
             "transport_id": transport_id,
             "producer_id": video_producer["id"],
             "connection_info": {
@@ -339,12 +315,11 @@ async def start_webrtc_stream_compat(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Failed to start WebRTC stream: {e}")
-        logger.exception(e)
+        logger.exception(f"Failed to start WebRTC stream: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to start stream: {str(e)}"
-        )
+        ) from e
 
 
 @router.delete("/devices/{device_id}/stream")
@@ -358,8 +333,6 @@ async def stop_webrtc_stream_compat(
     Old endpoint: DELETE /api/devices/{id}/stream
     New endpoint: POST /api/v1/devices/{id}/stop-stream
     """
-    from sqlalchemy import select
-    from app.services.rtsp_pipeline import rtsp_pipeline
 
     try:
         device_uuid = UUID(device_id)
@@ -369,31 +342,10 @@ async def stop_webrtc_stream_compat(
             detail="Invalid device ID format"
         )
 
-    # Get device
-    result = await db.execute(
-        select(Device).where(Device.id == device_uuid)
-    )
-    device = result.scalar_one_or_none()
-
-    if not device:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Device not found"
-        )
-
-    # Stop stream
+    # Stop stream; same path as POST /api/v1/devices/{id}/stop-stream, which
+    # flips the device and its stream records in one statement (no SELECT first)
     try:
-        stopped = await rtsp_pipeline.stop_stream(str(device_uuid))
-
-        if stopped:
-            device.is_active = False
-            await db.commit()
-
-        return {
-            "status": "success",
-            "device_id": str(device_uuid),
-            "stopped": stopped
-        }
+        stopped = await device_stream_service.stop(db, device_uuid)
     except Exception as e:
         logger.error(f"Failed to stop stream: {e}")
         raise HTTPException(
@@ -401,6 +353,18 @@ async def stop_webrtc_stream_compat(
             detail=f"Failed to stop stream: {str(e)}"
         )
 
+    if stopped is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Device not found"
+        )
+
+    return {
+        "status": "success",
+        "device_id": str(device_uuid),
+        "stopped": stopped
+    }
+
 
 @router.get("/streams")
 async def list_streams_compat():
@@ -409,7 +373,6 @@ async def list_streams_compat():
 
     Old endpoint: GET /api/streams
     """
-    from app.services.rtsp_pipeline import rtsp_pipeline
 
     active_streams = await rtsp_pipeline.list_active_streams()
 
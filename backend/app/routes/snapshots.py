@@ -2,7 +2,7 @@
 Snapshot management API routes.
 """
 from fastapi import APIRouter, HTTPException, status, Depends
-from fastapi.responses import FileResponse
+from fastapi.responses import ORJSONResponse, Response
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -14,7 +14,7 @@ from loguru import logger
 from pydantic import BaseModel
 
 
-router = APIRouter(prefix="/api/v1/snapshots", tags=["snapshots"])
+router = APIRouter(prefix="/api/v1/snapshots", tags=["snapshots"], default_response_class=ORJSONResponse)
 
 
 class CaptureSnapshotRequest(BaseModel):
@@ -157,7 +157,7 @@ async def list_snapshots(
     device_id: Optional[str] = None,
     limit: int = 100,
     db: AsyncSession = Depends(get_db)
-) -> Dict[str, Any]:
+) -> ORJSONResponse:
     """
     List all snapshots, optionally filtered by device.
 
@@ -176,34 +176,30 @@ async def list_snapshots(
         snapshots = await snapshot_service.list_snapshots(
             db=db,
             stream_id=device_id,
-            limit=limit
+            limit=limit,
+            eager=True
         )
 
-        snapshot_list = []
-        for snapshot in snapshots:
-            device_name = None
-            try:
-                if snapshot.stream:
-                    device_name = snapshot.stream.name
-            except:
-                pass  # Ignore lazy loading errors
-
-            snapshot_list.append({
-                "id": str(snapshot.id),
-                "device_id": str(snapshot.stream_id),  # V1 API returns stream_id as device_id
-                "device_name": device_name,
-                "timestamp": snapshot.timestamp.isoformat(),
-                "source": snapshot.source,
-                "file_size": snapshot.file_size,
-                "url": f"/api/v1/snapshots/{snapshot.id}/image",
-                "created_at": snapshot.created_at.isoformat()
-            })
+        # UUIDs and datetimes are left for orjson to encode natively
+        snapshot_list = [
+            {
+                "id": s.id,
+                "device_id": s.stream_id,  # V1 API returns stream_id as device_id
+                "device_name": s.stream.name if s.stream else None,
+                "timestamp": s.timestamp,
+                "source": s.source,
+                "file_size": s.file_size,
+                "url": f"/api/v1/snapshots/{s.id}/image",
+                "created_at": s.created_at
+            }
+            for s in snapshots
+        ]
 
-        return {
+        return ORJSONResponse({
             "status": "success",
             "count": len(snapshot_list),
             "snapshots": snapshot_list
-        }
+        })
 
     except Exception as e:
         logger.error(f"Failed to list snapshots: {e}")
@@ -228,26 +224,19 @@ async def get_snapshot(
     Returns:
         Snapshot information
     """
-    snapshot = await snapshot_service.get_snapshot(db, snapshot_id)
+    snapshot = await snapshot_service.get_snapshot(db, snapshot_id, eager=True)
     if not snapshot:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Snapshot not found"
         )
 
-    device_name = None
-    try:
-        if snapshot.stream:
-            device_name = snapshot.stream.name
-    except:
-        pass  # Ignore lazy loading errors
-
     return {
         "status": "success",
         "snapshot": {
             "id": str(snapshot.id),
             "device_id": str(snapshot.stream_id),  # V1 API returns stream_id as device_id
-            "device_name": device_name,
+            "device_name": snapshot.stream.name if snapshot.stream else None,
             "timestamp": snapshot.timestamp.isoformat(),
             "source": snapshot.source,
             "file_size": snapshot.file_size,
@@ -261,7 +250,7 @@ async def get_snapshot(
 async def get_snapshot_image(
     snapshot_id: str,
     db: AsyncSession = Depends(get_db)
-) -> FileResponse:
+) -> Response:
     """
     Get the snapshot image file.
 
@@ -279,18 +268,18 @@ async def get_snapshot_image(
             detail="Snapshot not found"
         )
 
-    import os
-    if not os.path.exists(snapshot.file_path):
+    response = snapshot_service.image_response(
+        snapshot.file_path,
+        media_type="image/jpeg",
+        headers={"Cache-Control": "public, max-age=31536000"}
+    )
+    if response is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Snapshot file not found on disk"
         )
 
-    return FileResponse(
-        snapshot.file_path,
-        media_type="image/jpeg",
-        headers={"Cache-Control": "public, max-age=31536000"}
-    )
+    return response
 
 
 @router.delete("/{snapshot_id}")
@@ -45,8 +45,7 @@ class BookmarkResponse(BaseModel):
     video_url: Optional[str] = None
     thumbnail_url: Optional[str] = None
 
-    class Config:
-        from_attributes = True  # Pydantic v2 (was orm_mode in v1)
+    model_config = {"from_attributes": True}
 
 
 class BookmarkListResponse(BaseModel):
@@ -34,7 +34,6 @@ class DeviceResponse(BaseModel):
     updated_at: Optional[datetime]
     stream_state: Optional[str] = None  # Stream state: live, error, stopped, etc.
 
-    class Config:
-        from_attributes = True
+    model_config = {"from_attributes": True}
 
 
@@ -1,12 +1,65 @@
-"""Consumer/WebRTC schemas for V2 API."""
-from pydantic import BaseModel, Field, UUID4
+"""Consumer/WebRTC schemas for V2 API.
+
+Request models are validated as usual (client input). Response models are
+built with model_construct from MediaSoup output and server-minted IDs.
+
+WebRTC blobs use typed models for the keys MediaSoup relies on; any other
+keys are kept as extras and passed through untouched.
+"""
+from pydantic import BaseModel, ConfigDict, Field, UUID4
 from typing import Dict, Any, List, Optional
 
 
+class _WebRTCModel(BaseModel):
+    """Base for MediaSoup/WebRTC blobs: known keys typed, the rest passed through."""
+    model_config = ConfigDict(extra="allow", frozen=True)
+
+
+class RtpCodecCapability(_WebRTCModel):
+    """Codec entry of a client's RTP capabilities."""
+    kind: str
+    mimeType: str
+    clockRate: int
+    preferredPayloadType: Optional[int] = None
+
+
+class RtpCapabilities(_WebRTCModel):
+    """Client RTP capabilities (mediasoup-client device.rtpCapabilities)."""
+    codecs: List[RtpCodecCapability] = []
+    headerExtensions: List[Dict[str, Any]] = []
+
+
+class IceParameters(_WebRTCModel):
+    """ICE parameters of a transport."""
+    usernameFragment: str
+    password: str
+
+
+class IceCandidate(_WebRTCModel):
+    """ICE candidate of a transport (address/ip, tcpType etc. pass through)."""
+    foundation: str
+    priority: int
+    port: int
+    type: str
+    protocol: str
+
+
+class DtlsFingerprint(_WebRTCModel):
+    """DTLS certificate fingerprint."""
+    algorithm: str
+    value: str
+
+
+class DtlsParameters(_WebRTCModel):
+    """DTLS parameters of a transport or client."""
+    role: Optional[str] = None
+    fingerprints: List[DtlsFingerprint]
+
+
 class ConsumerAttachRequest(BaseModel):
-    """Request to attach a WebRTC consumer to a stream."""
+    """Request to attach a WebRTC consumer to a stream (validated)."""
     client_id: str = Field(..., description="Unique client identifier")
-    rtp_capabilities: Dict[str, Any] = Field(..., description="Client RTP capabilities")
+    rtp_capabilities: RtpCapabilities = Field(..., description="Client RTP capabilities")
 
     model_config = {
         "json_schema_extra": {
@@ -29,20 +82,38 @@ class ConsumerAttachRequest(BaseModel):
 
 
 class TransportInfo(BaseModel):
-    """WebRTC transport information."""
+    """WebRTC transport information (built with model_construct)."""
     id: str = Field(..., description="Transport ID")
-    ice_parameters: Dict[str, Any] = Field(..., description="ICE parameters")
-    ice_candidates: List[Dict[str, Any]] = Field(..., description="ICE candidates")
-    dtls_parameters: Dict[str, Any] = Field(..., description="DTLS parameters")
+    ice_parameters: IceParameters = Field(..., description="ICE parameters")
+    ice_candidates: List[IceCandidate] = Field(..., description="ICE candidates")
+    dtls_parameters: DtlsParameters = Field(..., description="DTLS parameters")
+
+    model_config = ConfigDict(frozen=True)
+
+    @classmethod
+    def from_mediasoup(cls, transport: Dict[str, Any]) -> "TransportInfo":
+        """Build from a MediaSoup WebRTC transport without validation."""
+        dtls = transport["dtlsParameters"]
+        return cls.model_construct(
+            id=transport["id"],
+            ice_parameters=IceParameters.model_construct(**transport["iceParameters"]),
+            ice_candidates=[IceCandidate.model_construct(**c) for c in transport["iceCandidates"]],
+            dtls_parameters=DtlsParameters.model_construct(**{
+                **dtls,
+                "fingerprints": [DtlsFingerprint.model_construct(**f) for f in dtls["fingerprints"]]
+            })
+        )
 
 
 class ConsumerAttachResponse(BaseModel):
-    """Response after attaching consumer."""
+    """Response after attaching consumer (built with model_construct)."""
     consumer_id: UUID4 = Field(..., description="Consumer UUID")
     transport: TransportInfo = Field(..., description="WebRTC transport info")
+    # Open-ended MediaSoup RTP parameters blob, left untyped
     rtp_parameters: Dict[str, Any] = Field(..., description="RTP parameters for consumer")
 
     model_config = {
+        "frozen": True,
         "json_schema_extra": {
             "example": {
                 "consumer_id": "cccccccc-0000-0000-0000-000000000001",
@@ -82,10 +153,10 @@ class ConsumerAttachResponse(BaseModel):
 
 
 class ConsumerConnectRequest(BaseModel):
-    """Request to complete DTLS handshake."""
-    dtls_parameters: Dict[str, Any] = Field(..., description="Client DTLS parameters")
+    """Request to complete DTLS handshake (validated)."""
+    dtls_parameters: DtlsParameters = Field(..., description="Client DTLS parameters")
 
 
 class ICECandidateRequest(BaseModel):
-    """Request to send ICE candidate."""
+    """Request to send ICE candidate (validated)."""
     candidate: Dict[str, Any] = Field(..., description="ICE candidate")
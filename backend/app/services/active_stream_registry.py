@@ -0,0 +1,254 @@
+"""
+Active Stream Registry
+
+Shares which rooms have a running RTSP pipeline across backend processes via
+Redis, so a reconnect handled by one process sees streams started by another.
+
+Layout:
+- vas:active_streams           SET of room IDs
+- vas:stream:{room_id}         HASH of transport_id, producer_id, ssrc, started_at, rtsp_url, owner
+- vas:stream_events            PUB/SUB channel of {"room_id", "info"} (info null on remove)
+
+Stream hashes expire after ACTIVE_STREAM_TTL seconds unless the process that
+registered them renews them (every ttl/3), so entries of a crashed process
+drop out on their own. A process only removes entries it owns; the owner ID
+is unique per process start.
+
+Each process also runs a subscriber that mirrors the registry in memory
+from vas:stream_events; while it is in sync, is_active()/get() are
+answered locally without a Redis round-trip. The mirror is re-seeded every
+ttl seconds so expired entries drop out.
+
+Redis is an optimisation, not a dependency: every call degrades to a no-op
+(and the caller falls back to the process-local rtsp_pipeline.active_streams)
+when Redis is unreachable.
+"""
+import asyncio
+import json
+import socket
+import time
+from typing import Any, Dict, Optional
+from uuid import uuid4
+
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError
+from loguru import logger
+
+from config.settings import settings
+
+
+# Delete a stream entry only if it still belongs to the caller (ARGV[1]),
+# so a process never drops a stream another one has since registered
+_REMOVE_OWNED = """
+if redis.call('HGET', KEYS[1], 'owner') ~= ARGV[1] then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+redis.call('SREM', KEYS[2], ARGV[2])
+redis.call('PUBLISH', KEYS[3], ARGV[3])
+return 1
+"""
+
+
+class ActiveStreamRegistry:
+    """Redis-backed view of active streams shared by all backend processes."""
+
+    ACTIVE_SET_KEY = "vas:active_streams"
+    STREAM_KEY_PREFIX = "vas:stream:"
+    EVENTS_CHANNEL = "vas:stream_events"
+
+    def __init__(
+        self,
+        redis_url: str,
+        ttl_seconds: int,
+        retry_after: float = 30.0,
+        resync_interval: Optional[float] = None,
+        owner_id: Optional[str] = None
+    ):
+        """
+        Initialize the registry.
+
+        Args:
+            redis_url: Redis connection URL
+            ttl_seconds: Seconds an entry outlives its owner's last renewal
+            retry_after: Seconds to skip Redis after a connection failure
+            resync_interval: Seconds between full re-seeds of the local mirror
+                (default ttl_seconds)
+            owner_id: Identity of this process (default hostname plus a
+                random suffix)
+        """
+        self.ttl_seconds = ttl_seconds
+        self.retry_after = retry_after
+        self.resync_interval = resync_interval or ttl_seconds
+        self.owner_id = owner_id or f"{socket.gethostname()}:{uuid4().hex[:8]}"
+        # room_id -> info, maintained by the subscriber; None when not in sync
+        self._mirror: Optional[Dict[str, Dict[str, Any]]] = None
+        self._subscriber: Optional[asyncio.Task] = None
+        self._renewer: Optional[asyncio.Task] = None
+        # Rooms this process registered, renewed by _renew
+        self._owned: set = set()
+        self._redis = aioredis.from_url(
+            redis_url,
+            decode_responses=True,
+            socket_connect_timeout=1.0,
+            socket_timeout=1.0,
+        )
+        self._remove_owned = self._redis.register_script(_REMOVE_OWNED)
+        self._disabled_until = 0.0
+
+    def _available(self) -> bool:
+        return time.monotonic() >= self._disabled_until
+
+    def _mark_failed(self, op: str, error: Exception):
+        self._disabled_until = time.monotonic() + self.retry_after
+        logger.warning(f"Active stream registry {op} failed, skipping Redis for {self.retry_after}s: {error}")
+
+    @staticmethod
+    def _decode(info: Dict[str, Any]) -> Dict[str, Any]:
+        if "ssrc" in info:
+            info["ssrc"] = int(info["ssrc"])
+        return info
+
+    async def start(self):
+        """Start renewing this process's entries and mirroring the registry."""
+        if self._renewer is None:
+            self._renewer = asyncio.create_task(self._renew())
+        if self._subscriber is None:
+            self._subscriber = asyncio.create_task(self._subscribe())
+
+    async def stop(self):
+        """Stop the renewal and the local mirror."""
+        for task in (self._renewer, self._subscriber):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._renewer = None
+        self._subscriber = None
+        self._mirror = None
+
+    async def _renew(self):
+        """Push back the expiry of this process's stream entries every ttl/3."""
+        while True:
+            if self._owned and self._available():
+                try:
+                    async with self._redis.pipeline(transaction=False) as pipe:
+                        for room_id in self._owned:
+                            pipe.expire(self.STREAM_KEY_PREFIX + room_id, self.ttl_seconds)
+                        await pipe.execute()
+                except (RedisError, OSError) as e:
+                    self._mark_failed("renewal", e)
+            await asyncio.sleep(self.ttl_seconds / 3)
+
+    async def _load_all(self) -> Dict[str, Dict[str, Any]]:
+        room_ids = await self._redis.smembers(self.ACTIVE_SET_KEY)
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for room_id in room_ids:
+                pipe.hgetall(self.STREAM_KEY_PREFIX + room_id)
+            infos = await pipe.execute()
+        expired = [room_id for room_id, info in zip(room_ids, infos) if not info]
+        if expired:
+            await self._redis.srem(self.ACTIVE_SET_KEY, *expired)
+        return {room_id: self._decode(info) for room_id, info in zip(room_ids, infos) if info}
+
+    async def _subscribe(self):
+        """Keep self._mirror in sync with the events channel, reconnecting on failure."""
+        while True:
+            pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                # Subscribe before seeding so no event between the two is lost
+                await pubsub.subscribe(self.EVENTS_CHANNEL)
+                self._mirror = await self._load_all()
+                next_resync = time.monotonic() + self.resync_interval
+                logger.info(f"Active stream registry mirror synced ({len(self._mirror)} streams)")
+
+                while True:
+                    message = await pubsub.get_message(timeout=0.5)
+                    if message is not None:
+                        event = json.loads(message["data"])
+                        if event.get("info"):
+                            self._mirror[event["room_id"]] = self._decode(event["info"])
+                        else:
+                            self._mirror.pop(event["room_id"], None)
+                    if time.monotonic() >= next_resync:
+                        self._mirror = await self._load_all()
+                        next_resync = time.monotonic() + self.resync_interval
+            except asyncio.CancelledError:
+                raise
+            except (RedisError, OSError, ValueError, KeyError) as e:
+                self._mirror = None
+                logger.warning(f"Active stream registry subscriber failed, retrying in {self.retry_after}s: {e}")
+                await asyncio.sleep(self.retry_after)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except (RedisError, OSError):
+                    pass
+
+    async def is_active(self, room_id: str) -> bool:
+        """Check whether any process has registered room_id as active."""
+        if self._mirror is not None:
+            return room_id in self._mirror
+        return await self.get(room_id) is not None
+
+    async def get(self, room_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get shared stream info for room_id.
+
+        Returns:
+            Stream info dict, or None if not registered (or its hash expired)
+        """
+        if self._mirror is not None:
+            info = self._mirror.get(room_id)
+            return dict(info) if info is not None else None
+        if not self._available():
+            return None
+        try:
+            info = await self._redis.hgetall(self.STREAM_KEY_PREFIX + room_id)
+            if not info:
+                # Hash expired (e.g. owning process died) - drop the stale member
+                await self._redis.srem(self.ACTIVE_SET_KEY, room_id)
+                return None
+        except (RedisError, OSError) as e:
+            self._mark_failed("lookup", e)
+            return None
+
+        return self._decode(info)
+
+    async def add(self, room_id: str, info: Dict[str, Any]):
+        """Register room_id as active (and owned by this process) with its stream info."""
+        self._owned.add(room_id)
+        if not self._available():
+            return
+        key = self.STREAM_KEY_PREFIX + room_id
+        mapping = {k: str(v) for k, v in info.items() if v is not None}
+        mapping["owner"] = self.owner_id
+        try:
+            async with self._redis.pipeline(transaction=True) as pipe:
+                pipe.sadd(self.ACTIVE_SET_KEY, room_id)
+                pipe.delete(key)
+                pipe.hset(key, mapping=mapping)
+                pipe.expire(key, self.ttl_seconds)
+                pipe.publish(self.EVENTS_CHANNEL, json.dumps({"room_id": room_id, "info": mapping}))
+                await pipe.execute()
+        except (RedisError, OSError) as e:
+            self._mark_failed("add", e)
+
+    async def remove(self, room_id: str):
+        """Unregister room_id, unless another process has registered it since."""
+        self._owned.discard(room_id)
+        if not self._available():
+            return
+        try:
+            await self._remove_owned(
+                keys=[self.STREAM_KEY_PREFIX + room_id, self.ACTIVE_SET_KEY, self.EVENTS_CHANNEL],
+                args=[self.owner_id, room_id, json.dumps({"room_id": room_id, "info": None})]
+            )
+        except (RedisError, OSError) as e:
+            self._mark_failed("remove", e)
+
+
+# Global registry instance
+active_stream_registry = ActiveStreamRegistry(settings.redis_url, settings.active_stream_ttl)
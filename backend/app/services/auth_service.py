@@ -1,17 +1,67 @@
 """JWT authentication service."""
 import jwt
+import orjson
 import secrets
-import hashlib
+import hmac
+import threading
+import time
 from datetime import datetime, timedelta, timezone
+from functools import partial
+from hashlib import blake2b, sha256
 from typing import Optional, List, Dict, Any
+from cachetools import TTLCache
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
 from loguru import logger
 
 from app.models.auth import JWTToken, RefreshToken
 from config.settings import settings
 
 
+_BLAKE2B_PREFIX = "b2$"
+
+
+class TokenPayload(dict):
+    """
+    Decoded access-token claims, as returned by verify_token.
+
+    The token's scopes are also kept as a frozenset for has_scope. It is an
+    attribute rather than a key, so serializing the payload yields the
+    claims only.
+    """
+
+    __slots__ = ("scopes_set",)
+
+    def __init__(self, claims: Dict[str, Any], scopes_set: Optional[frozenset] = None):
+        super().__init__(claims)
+        self.scopes_set = scopes_set
+
+# Bound at import so the per-token hashing skips module attribute lookups
+_blake2b = partial(blake2b, digest_size=32)
+
+
+class _OrjsonJWT(jwt.PyJWT):
+    """PyJWT with the claims (de)serialized by orjson instead of stdlib json."""
+
+    def _encode_payload(self, payload, headers=None, json_encoder=None) -> bytes:
+        return orjson.dumps(payload)
+
+    def _decode_payload(self, decoded: Dict[str, Any]) -> Any:
+        try:
+            payload = orjson.loads(decoded["payload"])
+        except orjson.JSONDecodeError as e:
+            raise jwt.DecodeError(f"Invalid payload string: {e}")
+        if not isinstance(payload, dict):
+            raise jwt.DecodeError("Invalid payload string: must be a json object")
+        return payload
+
+
+def _sha256_hex(secret: str) -> str:
+    """Legacy (unprefixed) stored hash format."""
+    return sha256(secret.encode()).hexdigest()
+
+
 def _utcnow() -> datetime:
     """Return current UTC time as timezone-aware datetime."""
     return datetime.now(timezone.utc)
@@ -34,6 +84,21 @@ class AuthService:
         self.algorithm = "HS256"
         self.access_token_expire_minutes = 60  # 1 hour
         self.refresh_token_expire_days = 7  # 7 days
+        self._access_token_ttl = self.access_token_expire_minutes * 60  # seconds
+
+        # One PyJWT instance with this service's fixed claim set (no aud/iss
+        # checks, exp required) and the HMAC key pre-encoded
+        self._jwt = _OrjsonJWT(options={"require": ["exp"], "verify_aud": False, "verify_iss": False})
+        self._secret_bytes = self.secret_key.encode()
+        self._algorithms = [self.algorithm]
+
+        # Verified access-token payloads keyed by the raw token, so repeated
+        # requests skip the HMAC + JSON decode. get_current_user is a sync
+        # dependency (run in the thread pool), hence the lock.
+        self._verified: Optional[TTLCache] = (
+            TTLCache(maxsize=10000, ttl=settings.token_cache_ttl) if settings.token_cache_ttl > 0 else None
+        )
+        self._verified_lock = threading.Lock()
 
         if self.secret_key == "CHANGE_ME_IN_PRODUCTION":
             logger.warning("⚠️  Using default JWT secret key! Set JWT_SECRET_KEY in production!")
@@ -57,30 +122,30 @@ class AuthService:
         Returns:
             Dict with client_id, client_secret (plaintext, shown only once)
         """
-        # Check if client already exists
-        result = await db.execute(
-            select(JWTToken).filter(JWTToken.client_id == client_id)
-        )
-        existing = result.scalars().first()
-        if existing:
-            raise ValueError(f"Client {client_id} already exists")
-
         # Generate client secret
         client_secret = secrets.token_urlsafe(32)  # 32-byte random secret
         client_secret_hash = self._hash_secret(client_secret)
 
-        # Create JWT token record
-        jwt_token = JWTToken(
-            client_id=client_id,
-            client_secret_hash=client_secret_hash,
-            scopes=scopes,
-            is_active=True,
-            expires_at=expires_at
+        # Create JWT token record; an existing client_id inserts nothing
+        result = await db.execute(
+            insert(JWTToken)
+            .values(
+                client_id=client_id,
+                client_secret_hash=client_secret_hash,
+                scopes=scopes,
+                is_active=True,
+                expires_at=expires_at
+            )
+            .on_conflict_do_nothing(index_elements=[JWTToken.client_id])
+            .returning(JWTToken.created_at)
         )
+        created_at = result.scalar_one_or_none()
+
+        if created_at is None:
+            await db.rollback()
+            raise ValueError(f"Client {client_id} already exists")
 
-        db.add(jwt_token)
         await db.commit()
-        await db.refresh(jwt_token)
 
         logger.info(f"Created API client: {client_id} with scopes {scopes}")
 
@@ -88,7 +153,7 @@ class AuthService:
             "client_id": client_id,
             "client_secret": client_secret,  # ⚠️  Only returned once!
             "scopes": scopes,
-            "created_at": jwt_token.created_at.isoformat()
+            "created_at": created_at.isoformat()
         }
 
     async def generate_tokens(
@@ -128,19 +193,14 @@ class AuthService:
         if not client.is_active:
             raise ValueError("Client is inactive")
 
+        now = _utcnow()
+
         # Check if client has expired
-        if client.expires_at and client.expires_at < _utcnow():
+        if client.expires_at and client.expires_at < now:
             raise ValueError("Client credentials have expired")
 
         # Generate access token
-        access_token_payload = {
-            "sub": client_id,
-            "scopes": client.scopes,
-            "type": "access",
-            "iat": _utcnow(),
-            "exp": _utcnow() + timedelta(minutes=self.access_token_expire_minutes)
-        }
-        access_token = jwt.encode(access_token_payload, self.secret_key, algorithm=self.algorithm)
+        access_token = self._encode_access_token(client_id, client.scopes, now)
 
         # Generate refresh token
         refresh_token_value = secrets.token_urlsafe(32)
@@ -150,13 +210,13 @@ class AuthService:
             token_hash=refresh_token_hash,
             client_id=client_id,
             is_revoked=False,
-            expires_at=_utcnow() + timedelta(days=self.refresh_token_expire_days)
+            expires_at=now + timedelta(days=self.refresh_token_expire_days)
         )
 
         db.add(refresh_token_record)
 
         # Update last_used_at
-        client.last_used_at = _utcnow()
+        client.last_used_at = now
         await db.commit()
 
         logger.info(f"Generated tokens for client: {client_id}")
@@ -164,7 +224,7 @@ class AuthService:
         return {
             "access_token": access_token,
             "token_type": "Bearer",
-            "expires_in": self.access_token_expire_minutes * 60,  # seconds
+            "expires_in": self._access_token_ttl,  # seconds
             "refresh_token": refresh_token_value,
             "scopes": client.scopes
         }
@@ -187,47 +247,39 @@ class AuthService:
         Raises:
             ValueError: If refresh token is invalid or revoked
         """
-        refresh_token_hash = self._hash_secret(refresh_token)
-
-        # Fetch refresh token
-        result = await db.execute(
-            select(RefreshToken).filter(RefreshToken.token_hash == refresh_token_hash)
+        # Fetch refresh token and its client in one round trip (outer join so
+        # a missing client still reports as inactive after the token checks)
+        row = await self._find_refresh_token(
+            db,
+            refresh_token,
+            select(RefreshToken, JWTToken)
+            .outerjoin(JWTToken, JWTToken.client_id == RefreshToken.client_id)
         )
-        token_record = result.scalars().first()
 
-        if not token_record:
+        if not row:
             raise ValueError("Invalid refresh token")
 
+        token_record, client = row
+
         # Check if revoked
         if token_record.is_revoked:
             raise ValueError("Refresh token has been revoked")
 
+        now = _utcnow()
+
         # Check if expired
-        if token_record.expires_at < _utcnow():
+        if token_record.expires_at < now:
             raise ValueError("Refresh token has expired")
 
-        # Fetch client
-        result = await db.execute(
-            select(JWTToken).filter(JWTToken.client_id == token_record.client_id)
-        )
-        client = result.scalars().first()
-
         if not client or not client.is_active:
             raise ValueError("Client is inactive")
 
         # Generate new access token
-        access_token_payload = {
-            "sub": client.client_id,
-            "scopes": client.scopes,
-            "type": "access",
-            "iat": _utcnow(),
-            "exp": _utcnow() + timedelta(minutes=self.access_token_expire_minutes)
-        }
-        access_token = jwt.encode(access_token_payload, self.secret_key, algorithm=self.algorithm)
+        access_token = self._encode_access_token(client.client_id, client.scopes, now)
 
         # Token rotation: revoke old refresh token and create new one
         token_record.is_revoked = True
-        token_record.used_at = _utcnow()
+        token_record.used_at = now
 
         # Generate new refresh token
         new_refresh_token_value = secrets.token_urlsafe(32)
@@ -237,11 +289,11 @@ class AuthService:
             token_hash=new_refresh_token_hash,
             client_id=client.client_id,
             is_revoked=False,
-            expires_at=_utcnow() + timedelta(days=self.refresh_token_expire_days)
+            expires_at=now + timedelta(days=self.refresh_token_expire_days)
         )
 
         db.add(new_refresh_token_record)
-        client.last_used_at = _utcnow()
+        client.last_used_at = now
         await db.commit()
 
         logger.info(f"Refreshed tokens for client: {client.client_id} (token rotation)")
@@ -249,10 +301,25 @@ class AuthService:
         return {
             "access_token": access_token,
             "token_type": "Bearer",
-            "expires_in": self.access_token_expire_minutes * 60,
+            "expires_in": self._access_token_ttl,
             "refresh_token": new_refresh_token_value
         }
 
+    def _encode_access_token(self, client_id: str, scopes: List[str], now: datetime) -> str:
+        """Sign an access token issued at `now` (integer epoch iat/exp claims)."""
+        now_ts = int(now.timestamp())
+        return self._jwt.encode(
+            {
+                "sub": client_id,
+                "scopes": scopes,
+                "type": "access",
+                "iat": now_ts,
+                "exp": now_ts + self._access_token_ttl
+            },
+            self._secret_bytes,
+            algorithm=self.algorithm
+        )
+
     def verify_token(self, token: str) -> Dict[str, Any]:
         """
         Verify and decode a JWT access token.
@@ -266,14 +333,28 @@ class AuthService:
         Raises:
             ValueError: If token is invalid or expired
         """
+        if self._verified is not None:
+            with self._verified_lock:
+                entry = self._verified.get(token)
+            # Never serve a cached payload past the token's own expiry
+            if entry is not None and entry[0]["exp"] > time.time():
+                return TokenPayload(*entry)
+
         try:
-            payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
+            payload = self._jwt.decode(token, self._secret_bytes, algorithms=self._algorithms)
 
             # Verify token type
             if payload.get("type") != "access":
                 raise ValueError("Invalid token type")
 
-            return payload
+            # Built once per token (the cache entry keeps it) for has_scope
+            scopes = payload.get("scopes")
+            scopes_set = frozenset(scopes) if isinstance(scopes, list) else None
+
+            if self._verified is not None:
+                with self._verified_lock:
+                    self._verified[token] = (payload, scopes_set)
+            return TokenPayload(payload, scopes_set)
 
         except jwt.ExpiredSignatureError:
             raise ValueError("Token has expired")
@@ -291,7 +372,9 @@ class AuthService:
         Returns:
             True if token has the scope
         """
-        scopes = token_payload.get("scopes", [])
+        scopes = getattr(token_payload, "scopes_set", None)
+        if scopes is None:
+            scopes = token_payload.get("scopes", [])
         return required_scope in scopes
 
     async def revoke_refresh_token(
@@ -306,14 +389,10 @@ class AuthService:
             refresh_token: Refresh token to revoke
             db: Database session
         """
-        refresh_token_hash = self._hash_secret(refresh_token)
+        row = await self._find_refresh_token(db, refresh_token, select(RefreshToken))
 
-        result = await db.execute(
-            select(RefreshToken).filter(RefreshToken.token_hash == refresh_token_hash)
-        )
-        token_record = result.scalars().first()
-
-        if token_record:
+        if row:
+            token_record = row[0]
             token_record.is_revoked = True
             await db.commit()
             logger.info(f"Revoked refresh token for client: {token_record.client_id}")
@@ -326,27 +405,71 @@ class AuthService:
         """
         Deactivate a client (revoke all access).
 
+        Outstanding refresh tokens are revoked as well; access tokens already
+        issued stay valid until they expire.
+
         Args:
             client_id: Client to deactivate
             db: Database session
         """
         result = await db.execute(
-            select(JWTToken).filter(JWTToken.client_id == client_id)
+            update(JWTToken)
+            .where(JWTToken.client_id == client_id)
+            .values(is_active=False)
+            .returning(JWTToken.id)
         )
-        client = result.scalars().first()
 
-        if client:
-            client.is_active = False
+        if result.scalar_one_or_none() is not None:
+            await db.execute(
+                update(RefreshToken)
+                .where(RefreshToken.client_id == client_id, RefreshToken.is_revoked.is_(False))
+                .values(is_revoked=True)
+            )
             await db.commit()
             logger.info(f"Deactivated client: {client_id}")
 
+    async def _find_refresh_token(self, db: AsyncSession, refresh_token: str, query):
+        """
+        Run a refresh token query filtered by the token's stored hash.
+
+        Tokens issued before the BLAKE2b switch are stored as bare SHA-256
+        hashes; those are only tried when the BLAKE2b lookup misses.
+
+        Returns:
+            First result row, or None
+        """
+        for hash_secret in (self._hash_secret, _sha256_hex):
+            result = await db.execute(query.filter(RefreshToken.token_hash == hash_secret(refresh_token)))
+            row = result.first()
+            if row:
+                return row
+        return None
+
     def _hash_secret(self, secret: str) -> str:
-        """Hash a secret using SHA-256."""
-        return hashlib.sha256(secret.encode()).hexdigest()
+        """Hash a secret for storage: BLAKE2b-256 hex with a "b2$" prefix."""
+        # Sync by design: ~1us for a 43-char token, while a to_thread hop
+        # costs tens of us. Bulk revocation filters on client_id instead of
+        # hashing tokens (see deactivate_client).
+        return _BLAKE2B_PREFIX + _blake2b(secret.encode()).hexdigest()
 
     def _verify_secret(self, plaintext: str, hashed: str) -> bool:
-        """Verify a plaintext secret against a hash."""
-        return self._hash_secret(plaintext) == hashed
+        """
+        Verify a plaintext secret against a stored hash in constant time.
+
+        Unprefixed hashes are legacy SHA-256 hex digests.
+        """
+        if not isinstance(hashed, str):
+            return False
+        if hashed.startswith(_BLAKE2B_PREFIX):
+            hashed = hashed[len(_BLAKE2B_PREFIX):]
+            digest = _blake2b(plaintext.encode()).digest()
+        else:
+            digest = sha256(plaintext.encode()).digest()
+        try:
+            stored = bytes.fromhex(hashed)
+        except ValueError:
+            return False
+        return hmac.compare_digest(digest, stored)
 
 
 # Global auth service instance
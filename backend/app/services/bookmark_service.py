@@ -4,30 +4,380 @@ Bookmark service for capturing 6-second video clips from live and historical str
 V2 Version: Uses stream_id instead of device_id.
 """
 import os
+import re
 import asyncio
 import subprocess
+from bisect import bisect_left, bisect_right
 from datetime import datetime, timedelta
-from typing import Optional, List
+from typing import Optional, List, Tuple
+from uuid import UUID
 from pathlib import Path
+from cachetools import LRUCache
 from loguru import logger
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete
+from sqlalchemy import select, delete, update
 from app.models.bookmark import Bookmark
 from app.models.stream import Stream
 from app.models.device import Device
+from config.settings import settings
+
+
+# HLS playlist lines: "#EXTINF:<duration>," and "segment-<unix_ts>.ts"
+_EXTINF_RE = re.compile(rb'#EXTINF:([0-9.]+)')
+_SEGMENT_RE = re.compile(rb'segment-(\d+)\.ts')
 
 
 class BookmarkService:
     """Service for capturing and managing bookmarks (6-second video clips)."""
 
+    # Encoder arguments per H.264 encoder; NVENC runs on the GPU's encode
+    # block and leaves the CPU to concurrent captures
+    ENCODER_ARGS = {
+        "h264_nvenc": ["-c:v", "h264_nvenc", "-preset", "p4", "-tune", "ll", "-rc", "vbr", "-cq", "23", "-b:v", "4M"],
+        "libx264": ["-c:v", "libx264", "-preset", "fast", "-crf", "23"],
+    }
+    # Decode on the GPU too when encoding with NVENC (frames stay on-GPU)
+    CUDA_DECODE_ARGS = ["-hwaccel", "cuda", "-hwaccel_output_format", "cuda"]
+    # Historical clips are remuxed without re-encoding when a keyframe falls
+    # at most this far before the cut point (seek offsets are whole seconds)
+    COPY_SEEK_TOLERANCE = 1.0
+    # Parsed HLS playlists kept in memory (one per camera recording directory)
+    PLAYLIST_CACHE_SIZE = 64
+    # Probed keyframe offsets of recorded segments (immutable once listed)
+    KEYFRAME_CACHE_SIZE = 512
+
     def __init__(self):
         self.bookmark_base_dir = "/bookmarks"
         os.makedirs(self.bookmark_base_dir, exist_ok=True)
+        self._video_encoder: Optional[str] = None
+        self._encoder_lock = asyncio.Lock()
+        # playlist path -> ((mtime_ns, size), parsed segments, segment timestamps)
+        self._playlists: LRUCache = LRUCache(maxsize=self.PLAYLIST_CACHE_SIZE)
+        # segment path -> keyframe offsets in seconds from the segment start
+        self._keyframes: LRUCache = LRUCache(maxsize=self.KEYFRAME_CACHE_SIZE)
+        # Parallel encoders past the core count only slow each other down;
+        # NVENC runs are capped by the GPU's concurrent session limit instead
+        self._ffmpeg_sem = asyncio.Semaphore(
+            settings.bookmark_ffmpeg_concurrency or max(1, (os.cpu_count() or 2) // 2)
+        )
+        self._nvenc_sem = asyncio.Semaphore(max(1, settings.bookmark_nvenc_sessions))
         logger.info(f"Bookmark service initialized. Base directory: {self.bookmark_base_dir}")
 
+    async def video_encoder(self) -> str:
+        """
+        H.264 encoder for bookmark clips, resolved once per process.
+
+        BOOKMARK_VIDEO_ENCODER=auto picks h264_nvenc when a one-frame test
+        encode succeeds (the encoder may be compiled in without a usable GPU),
+        and libx264 otherwise.
+        """
+        if self._video_encoder is None:
+            async with self._encoder_lock:
+                if self._video_encoder is None:
+                    encoder = settings.bookmark_video_encoder
+                    if encoder not in self.ENCODER_ARGS:
+                        encoder = "h264_nvenc" if await self._nvenc_available() else "libx264"
+                    logger.info(f"Bookmark clips will be encoded with {encoder}")
+                    self._video_encoder = encoder
+        return self._video_encoder
+
+    def ffmpeg_slot(self, ffmpeg_cmd: List[str]) -> asyncio.Semaphore:
+        """
+        Semaphore to hold while running a bookmark FFmpeg command.
+
+        Commands encoding with h264_nvenc share the NVENC session limit;
+        everything else (libx264, stream copies) shares the CPU limit.
+        """
+        return self._nvenc_sem if "h264_nvenc" in ffmpeg_cmd else self._ffmpeg_sem
+
+    async def _nvenc_available(self) -> bool:
+        """Try encoding a single synthetic frame with h264_nvenc."""
+        try:
+            process = await asyncio.create_subprocess_exec(
+                "ffmpeg", "-hide_banner", "-loglevel", "error",
+                "-f", "lavfi", "-i", "color=size=256x256:rate=1",
+                "-frames:v", "1", "-c:v", "h264_nvenc", "-f", "null", "-",
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL
+            )
+            return await asyncio.wait_for(process.wait(), timeout=10.0) == 0
+        except (OSError, asyncio.TimeoutError) as e:
+            logger.debug(f"NVENC probe failed: {e}")
+            return False
+
+    async def historical_clip_command(
+        self,
+        concat_file_path: str,
+        first_segment_path: str,
+        seek_offset: float,
+        duration_seconds: int,
+        video_file_path: str,
+        audio: bool = True,
+        thumbnail_path: Optional[str] = None
+    ) -> List[str]:
+        """
+        Build the FFmpeg command cutting a clip out of concatenated HLS segments.
+
+        The recorded segments are already H.264, so when the cut lands on a
+        keyframe the clip is stream-copied (a container rewrite, no decode or
+        encode); otherwise it is re-encoded for a frame-accurate start.
+
+        Args:
+            concat_file_path: FFmpeg concat list of the segments
+            first_segment_path: First segment of the list (probed for keyframes)
+            seek_offset: Clip start, in seconds from the first segment's start
+            duration_seconds: Clip length
+            video_file_path: Output MP4 path
+            audio: Keep the audio track
+            thumbnail_path: Also write a thumbnail from the same run
+
+        Returns:
+            FFmpeg argument list
+        """
+        seek_offset = max(0, seek_offset)
+        if await self._keyframe_near(first_segment_path, seek_offset):
+            input_args: List[str] = []
+            codec_args = ["-c:v", "copy"] + (["-c:a", "copy"] if audio else ["-an"])
+            codec_args += ["-avoid_negative_ts", "make_zero"]
+        else:
+            encoder = await self.video_encoder()
+            input_args = self.CUDA_DECODE_ARGS if encoder == "h264_nvenc" else []
+            codec_args = self.ENCODER_ARGS[encoder] + (["-c:a", "aac", "-b:a", "128k"] if audio else ["-an"])
+
+        return [
+            "ffmpeg",
+            "-y",
+            *input_args,
+            "-ss", str(seek_offset),  # Input seek: the concat demuxer jumps straight there
+            "-f", "concat",
+            "-safe", "0",
+            "-i", concat_file_path,
+            "-t", str(duration_seconds),
+            *codec_args,
+            "-movflags", "+faststart",  # Enable web streaming
+            video_file_path,
+            *(self.thumbnail_output_args(thumbnail_path, hw_frames=bool(input_args)) if thumbnail_path else [])
+        ]
+
+    def thumbnail_output_args(self, thumbnail_path: str, seek_time: str = "00:00:03", hw_frames: bool = False) -> List[str]:
+        """
+        Second FFmpeg output writing one JPEG frame of the clip.
+
+        Appended after the clip output so the input is read and decoded once
+        instead of spawning another FFmpeg on the finished MP4.
+
+        Args:
+            thumbnail_path: Path to save thumbnail
+            seek_time: Position within the clip (format: HH:MM:SS)
+            hw_frames: Frames are decoded into GPU memory and must be downloaded
+        """
+        return [
+            "-ss", seek_time,
+            *(["-vf", "hwdownload,format=nv12"] if hw_frames else []),
+            "-frames:v", "1",
+            "-q:v", "2",
+            "-update", "1",
+            thumbnail_path
+        ]
+
+    async def _keyframe_near(self, segment_path: str, offset: float) -> bool:
+        """
+        Whether the segment has a video keyframe at most COPY_SEEK_TOLERANCE before offset.
+
+        A stream copy starts on the keyframe at or before the seek point, so
+        a keyframe just after the cut would drop the frames leading up to it.
+        """
+        keyframes = await self._segment_keyframes(segment_path)
+        return any(offset - self.COPY_SEEK_TOLERANCE <= kf <= offset for kf in keyframes)
+
+    async def _segment_keyframes(self, segment_path: str) -> Tuple[float, ...]:
+        """
+        Keyframe offsets of a recorded segment, probed once per segment.
+
+        Segments listed in the playlist are never rewritten, so the ffprobe
+        result is cached and later clips cut from the same segment skip the
+        extra process spawn. Failed probes are not cached.
+        """
+        cached = self._keyframes.get(segment_path)
+        if cached is not None:
+            return cached
+
+        try:
+            process = await asyncio.create_subprocess_exec(
+                "ffprobe", "-v", "error",
+                "-select_streams", "v:0",
+                "-show_entries", "packet=pts_time,flags",
+                "-of", "csv=p=0",
+                segment_path,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL
+            )
+            stdout, _ = await asyncio.wait_for(process.communicate(), timeout=5.0)
+        except (OSError, asyncio.TimeoutError) as e:
+            logger.warning(f"Keyframe probe failed for {segment_path}: {e}")
+            return ()
+        if process.returncode != 0:
+            return ()
+
+        # Packet timestamps are relative to the stream's first packet
+        start = None
+        keyframes = []
+        for line in stdout.decode(errors="replace").splitlines():
+            pts_time, _, flags = line.partition(",")
+            try:
+                pts = float(pts_time)
+            except ValueError:
+                continue
+            if start is None:
+                start = pts
+            if "K" in flags:
+                keyframes.append(pts - start)
+
+        self._keyframes[segment_path] = tuple(keyframes)
+        return self._keyframes[segment_path]
+
+    async def _playlist_segments(
+        self, playlist_path: str
+    ) -> Tuple[List[Tuple[str, float, int]], List[int]]:
+        """
+        Segments of an HLS playlist, parsed once per playlist version.
+
+        Cached per path until the file's mtime or size changes; the read and
+        parse run in a thread so long DVR playlists do not block the loop.
+
+        Returns:
+            Tuple of (segments, timestamps): segments as (segment_filename,
+            duration, unix_timestamp) sorted by timestamp, and the parallel
+            list of timestamps for bisect lookups. Both are shared with later
+            callers, so they must not be mutated
+        """
+        stat = await asyncio.to_thread(os.stat, playlist_path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        cached = self._playlists.get(playlist_path)
+        if cached is not None and cached[0] == version:
+            return cached[1], cached[2]
+
+        segments = await asyncio.to_thread(self._parse_playlist, playlist_path)
+        timestamps = [seg_ts for _, _, seg_ts in segments]
+        self._playlists[playlist_path] = (version, segments, timestamps)
+        return segments, timestamps
+
+    @staticmethod
+    def _select_segments(
+        segments: List[Tuple[str, float, int]],
+        timestamps: List[int],
+        start_unix_ts: int,
+        end_unix_ts: int
+    ) -> List[Tuple[str, float, int]]:
+        """
+        Segments overlapping [start_unix_ts, end_unix_ts], in timestamp order.
+
+        Bisects to the segment starting at or before start_unix_ts and walks
+        forward until segments start after end_unix_ts, so the cost depends on
+        the clip length rather than the playlist length.
+        """
+        selected = []
+        i = max(bisect_right(timestamps, start_unix_ts) - 1, 0)
+        while i < len(segments) and timestamps[i] <= end_unix_ts:
+            seg_filename, duration, seg_ts = segments[i]
+            seg_end_ts = seg_ts + duration
+            # Include segment if it overlaps with our requested range
+            if (seg_ts <= start_unix_ts < seg_end_ts) or \
+               (seg_ts <= end_unix_ts < seg_end_ts) or \
+               (start_unix_ts <= seg_ts < end_unix_ts):
+                selected.append(segments[i])
+            i += 1
+        return selected
+
+    @staticmethod
+    def _closest_segment(
+        segments: List[Tuple[str, float, int]],
+        timestamps: List[int],
+        unix_ts: int
+    ) -> Tuple[str, float, int]:
+        """Segment whose start timestamp is closest to unix_ts (earlier wins ties)."""
+        i = bisect_left(timestamps, unix_ts)
+        if i == 0:
+            return segments[0]
+        if i == len(timestamps):
+            return segments[-1]
+        if unix_ts - timestamps[i - 1] <= timestamps[i] - unix_ts:
+            return segments[i - 1]
+        return segments[i]
+
+    @staticmethod
+    def _parse_playlist(playlist_path: str) -> List[Tuple[str, float, int]]:
+        """
+        Parse (segment_filename, duration, unix_timestamp) entries from an HLS playlist.
+
+        Single pass over the file in binary mode: an #EXTINF duration applies
+        to the next URI line, and only segment-{unix_ts}.ts URIs are kept.
+        """
+        segments_info = []
+        duration = None
+
+        with open(playlist_path, 'rb') as f:
+            for raw in f:
+                if raw.startswith(b'#'):
+                    match = _EXTINF_RE.match(raw)
+                    if match:
+                        duration = float(match.group(1))
+                    continue
+                if duration is None:
+                    continue
+                match = _SEGMENT_RE.fullmatch(raw.rstrip())
+                if match:
+                    segments_info.append((match.group(0).decode(), duration, int(match.group(1))))
+                duration = None
+
+        # Epoch-numbered segments are already ascending; the sort is a cheap
+        # guard so bisect lookups stay correct after a wall-clock step back
+        segments_info.sort(key=lambda x: x[2])
+        return segments_info
+
+    @staticmethod
+    def remove_files(*paths: Optional[str]) -> List[str]:
+        """Remove the given files that exist; returns the paths removed."""
+        removed = []
+        for path in paths:
+            if not path:
+                continue
+            # One unlink instead of an exists() check followed by remove()
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            removed.append(path)
+        return removed
+
+    @staticmethod
+    def clip_outputs(video_file_path: str, thumbnail_path: str) -> Tuple[Optional[int], bool]:
+        """
+        Size of the written clip (None if missing) and whether the thumbnail exists.
+
+        One stat() per file: the clip's existence and size come from the same
+        call rather than exists() followed by getsize().
+        """
+        try:
+            file_size = os.stat(video_file_path).st_size
+        except FileNotFoundError:
+            file_size = None
+        try:
+            os.stat(thumbnail_path)
+        except FileNotFoundError:
+            return file_size, False
+        return file_size, True
+
+    @staticmethod
+    def _write_concat_file(concat_file_path: str, segment_paths: List[str]):
+        """Write an FFmpeg concat demuxer list for the given segments."""
+        with open(concat_file_path, 'w') as f:
+            for seg_path in segment_paths:
+                f.write(f"file '{seg_path}'\n")
+
     async def capture_from_live_stream(
         self,
-        stream_id: str,
+        stream_id: UUID,
         rtsp_url: str,
         label: Optional[str],
         db: AsyncSession
@@ -49,8 +399,8 @@ class BookmarkService:
         start_timestamp = center_timestamp - timedelta(seconds=6)
         end_timestamp = center_timestamp
 
-        stream_dir = os.path.join(self.bookmark_base_dir, stream_id)
-        os.makedirs(stream_dir, exist_ok=True)
+        stream_dir = os.path.join(self.bookmark_base_dir, str(stream_id))
+        await asyncio.to_thread(os.makedirs, stream_dir, exist_ok=True)
 
         filename = f"live_{center_timestamp.strftime('%Y%m%d_%H%M%S')}.mp4"
         video_file_path = os.path.join(stream_dir, filename)
@@ -59,6 +409,8 @@ class BookmarkService:
 
         logger.info(f"Capturing live bookmark (6s clip) from {rtsp_url} -> {video_file_path}")
 
+        encoder = await self.video_encoder()
+
         # FFmpeg command to capture 6 seconds of video
         ffmpeg_cmd = [
             "ffmpeg",
@@ -67,32 +419,33 @@ class BookmarkService:
             "-timeout", "5000000",  # 5 second timeout
             "-i", rtsp_url,
             "-t", "6",  # Capture 6 seconds
-            "-c:v", "libx264",  # H.264 codec
-            "-preset", "fast",
-            "-crf", "23",  # Good quality
+            *self.ENCODER_ARGS[encoder],  # H.264
             "-c:a", "aac",  # Audio codec (if available)
             "-b:a", "128k",
             "-movflags", "+faststart",  # Enable web streaming
-            video_file_path
+            video_file_path,
+            # Thumbnail from center frame (3 seconds into the clip)
+            *self.thumbnail_output_args(thumbnail_path)
         ]
 
         try:
-            # Run FFmpeg with timeout
-            process = await asyncio.create_subprocess_exec(
-                *ffmpeg_cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
-            )
-
-            try:
-                stdout, stderr = await asyncio.wait_for(
-                    process.communicate(),
-                    timeout=15.0  # Longer timeout for video capture
+            # Run FFmpeg with timeout, queued behind other bookmark encodes
+            async with self.ffmpeg_slot(ffmpeg_cmd):
+                process = await asyncio.create_subprocess_exec(
+                    *ffmpeg_cmd,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE
                 )
-            except asyncio.TimeoutError:
-                process.kill()
-                await process.wait()
-                raise RuntimeError("FFmpeg bookmark capture timed out after 15 seconds")
+
+                try:
+                    stdout, stderr = await asyncio.wait_for(
+                        process.communicate(),
+                        timeout=15.0  # Longer timeout for video capture
+                    )
+                except asyncio.TimeoutError:
+                    process.kill()
+                    await process.wait()
+                    raise RuntimeError("FFmpeg bookmark capture timed out after 15 seconds")
 
             if process.returncode != 0:
                 error_msg = stderr.decode() if stderr else "Unknown error"
@@ -100,48 +453,43 @@ class BookmarkService:
                 raise RuntimeError(f"FFmpeg failed: {error_msg}")
 
             # Verify file was created
-            if not os.path.exists(video_file_path):
+            file_size, has_thumbnail = await asyncio.to_thread(
+                self.clip_outputs, video_file_path, thumbnail_path
+            )
+            if file_size is None:
                 raise RuntimeError("Bookmark video file was not created")
 
-            file_size = os.path.getsize(video_file_path)
             logger.info(f"Bookmark captured successfully: {video_file_path} ({file_size} bytes)")
 
-            # Generate thumbnail from center frame (3 seconds into the clip)
-            await self._generate_thumbnail(video_file_path, thumbnail_path, seek_time="00:00:03")
-
             # Create database entry
             bookmark = Bookmark(
                 stream_id=stream_id,
                 center_timestamp=center_timestamp,
-                start_time=start_timestamp,
-                end_time=end_timestamp,
-                file_path=video_file_path,
-                thumbnail_path=thumbnail_path if os.path.exists(thumbnail_path) else None,
+                start_timestamp=start_timestamp,
+                end_timestamp=end_timestamp,
+                video_file_path=video_file_path,
+                thumbnail_path=thumbnail_path if has_thumbnail else None,
                 label=label,
                 source="live",
-                duration_seconds=6,
-                format="mp4",
+                duration=6,
+                video_format="mp4",
                 file_size=file_size
             )
 
             db.add(bookmark)
             await db.commit()
-            await db.refresh(bookmark)
 
             return bookmark
 
         except Exception as e:
             logger.error(f"Failed to capture live bookmark: {e}")
             # Cleanup partial files
-            if os.path.exists(video_file_path):
-                os.remove(video_file_path)
-            if os.path.exists(thumbnail_path):
-                os.remove(thumbnail_path)
+            await asyncio.to_thread(self.remove_files, video_file_path, thumbnail_path)
             raise
 
     async def capture_from_historical(
         self,
-        stream_id: str,
+        stream_id: UUID,
         center_timestamp: datetime,
         label: Optional[str],
         db: AsyncSession
@@ -178,11 +526,11 @@ class BookmarkService:
         date_folder = start_timestamp.strftime("%Y%m%d")
         date_folder_path = os.path.join(device_recording_dir, date_folder)
 
-        if not os.path.exists(date_folder_path):
+        if not await asyncio.to_thread(os.path.exists, date_folder_path):
             raise FileNotFoundError(f"No recordings found for stream {stream_id} on date {date_folder}")
 
-        stream_dir = os.path.join(self.bookmark_base_dir, stream_id)
-        os.makedirs(stream_dir, exist_ok=True)
+        stream_dir = os.path.join(self.bookmark_base_dir, str(stream_id))
+        await asyncio.to_thread(os.makedirs, stream_dir, exist_ok=True)
 
         filename = f"historical_{center_timestamp.strftime('%Y%m%d_%H%M%S')}.mp4"
         video_file_path = os.path.join(stream_dir, filename)
@@ -195,30 +543,11 @@ class BookmarkService:
         # This matches the frontend's approach in getTimestampFromHLSPosition()
         hls_playlist_path = os.path.join(os.path.dirname(date_folder_path), "stream.m3u8")
 
-        if not os.path.exists(hls_playlist_path):
+        if not await asyncio.to_thread(os.path.exists, hls_playlist_path):
             raise FileNotFoundError(f"HLS playlist not found at {hls_playlist_path}")
 
-        # Parse HLS playlist to map timestamps to segments
-        segments_info = []  # List of (segment_filename, duration, unix_timestamp)
-
-        with open(hls_playlist_path, 'r') as f:
-            lines = f.readlines()
-            i = 0
-            while i < len(lines):
-                line = lines[i].strip()
-                if line.startswith('#EXTINF:'):
-                    # Get duration
-                    duration = float(line.split(':')[1].split(',')[0])
-                    # Get segment filename from next line
-                    if i + 1 < len(lines):
-                        seg_filename = lines[i + 1].strip()
-                        # Extract Unix timestamp from segment filename
-                        if seg_filename.startswith('segment-') and seg_filename.endswith('.ts'):
-                            seg_ts = int(seg_filename.split('-')[1].split('.')[0])
-                            segments_info.append((seg_filename, duration, seg_ts))
-                    i += 2
-                else:
-                    i += 1
+        # Parse HLS playlist to map timestamps to segments (shared, do not mutate)
+        segments_info, segment_timestamps = await self._playlist_segments(hls_playlist_path)
 
         if not segments_info:
             raise FileNotFoundError(f"No valid segments found in HLS playlist")
@@ -231,28 +560,22 @@ class BookmarkService:
         # Find segments that cover the requested time range (start_timestamp to end_timestamp)
         # We need 6 seconds total: from start_unix_ts to (start_unix_ts + 6)
         end_unix_ts = int(end_timestamp.timestamp())
-        required_segments = []
-
-        for seg_filename, duration, seg_ts in segments_info:
-            seg_end_ts = seg_ts + duration
-            # Include segment if it overlaps with our requested range
-            if (seg_ts <= start_unix_ts < seg_end_ts) or \
-               (seg_ts <= end_unix_ts < seg_end_ts) or \
-               (start_unix_ts <= seg_ts < end_unix_ts):
-                seg_path = os.path.join(date_folder_path, seg_filename)
-                required_segments.append((seg_ts, seg_path, duration))
+        required_segments = [
+            (seg_ts, os.path.join(date_folder_path, seg_filename), duration)
+            for seg_filename, duration, seg_ts in self._select_segments(
+                segments_info, segment_timestamps, start_unix_ts, end_unix_ts
+            )
+        ]
 
         if not required_segments:
             # Fallback: find closest segments
-            segments_info.sort(key=lambda x: abs(x[2] - center_unix_ts))
-            seg_filename, duration, seg_ts = segments_info[0]
+            seg_filename, duration, seg_ts = self._closest_segment(
+                segments_info, segment_timestamps, center_unix_ts
+            )
             seg_path = os.path.join(date_folder_path, seg_filename)
             required_segments = [(seg_ts, seg_path, duration)]
             logger.warning(f"No exact segment match, using closest: {seg_filename}")
 
-        # Sort segments by timestamp
-        required_segments.sort(key=lambda x: x[0])
-
         first_segment_ts = required_segments[0][0]
         last_segment_ts = required_segments[-1][0]
 
@@ -273,44 +596,34 @@ class BookmarkService:
 
         # Create a concat file for FFmpeg to process multiple segments
         concat_file_path = os.path.join(stream_dir, f"concat_temp_{center_timestamp.timestamp()}.txt")
-        with open(concat_file_path, 'w') as f:
-            for seg_ts, seg_path in target_segments:
-                f.write(f"file '{seg_path}'\n")
+        await asyncio.to_thread(
+            self._write_concat_file, concat_file_path, [seg_path for _, seg_path in target_segments]
+        )
 
         # FFmpeg command to extract 6-second clip from concatenated segments
-        ffmpeg_cmd = [
-            "ffmpeg",
-            "-y",
-            "-f", "concat",
-            "-safe", "0",
-            "-i", concat_file_path,
-            "-ss", str(max(0, seek_offset)),  # Seek to the position within concat
-            "-t", "6",  # Duration: 6 seconds from that position
-            "-c:v", "libx264",
-            "-preset", "fast",
-            "-crf", "23",
-            "-c:a", "aac",
-            "-b:a", "128k",
-            "-movflags", "+faststart",
-            video_file_path
-        ]
+        ffmpeg_cmd = await self.historical_clip_command(
+            concat_file_path, target_segments[0][1], seek_offset, 6, video_file_path,
+            thumbnail_path=thumbnail_path  # Center frame, written by the same run
+        )
 
         try:
-            process = await asyncio.create_subprocess_exec(
-                *ffmpeg_cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
-            )
-
-            try:
-                stdout, stderr = await asyncio.wait_for(
-                    process.communicate(),
-                    timeout=20.0
+            # Queued behind other bookmark encodes; the timeout covers the run only
+            async with self.ffmpeg_slot(ffmpeg_cmd):
+                process = await asyncio.create_subprocess_exec(
+                    *ffmpeg_cmd,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE
                 )
-            except asyncio.TimeoutError:
-                process.kill()
-                await process.wait()
-                raise RuntimeError("FFmpeg historical bookmark capture timed out")
+
+                try:
+                    stdout, stderr = await asyncio.wait_for(
+                        process.communicate(),
+                        timeout=20.0
+                    )
+                except asyncio.TimeoutError:
+                    process.kill()
+                    await process.wait()
+                    raise RuntimeError("FFmpeg historical bookmark capture timed out")
 
             # Log FFmpeg output for debugging
             stderr_output = stderr.decode() if stderr else ""
@@ -322,10 +635,12 @@ class BookmarkService:
                 logger.error(f"FFmpeg historical bookmark failed (exit code {process.returncode}): {error_msg}")
                 raise RuntimeError(f"FFmpeg failed: {error_msg}")
 
-            if not os.path.exists(video_file_path):
+            file_size, has_thumbnail = await asyncio.to_thread(
+                self.clip_outputs, video_file_path, thumbnail_path
+            )
+            if file_size is None:
                 raise RuntimeError("Historical bookmark video file was not created")
 
-            file_size = os.path.getsize(video_file_path)
             logger.info(f"✅ Historical bookmark captured: {video_file_path} ({file_size} bytes)")
 
             # Check if file is suspiciously small
@@ -333,90 +648,41 @@ class BookmarkService:
                 logger.error(f"⚠️ Warning: Bookmark file is very small ({file_size} bytes), likely corrupt!")
                 logger.error(f"FFmpeg stderr: {stderr_output[-500:]}")
 
-            # Generate thumbnail from center frame
-            await self._generate_thumbnail(video_file_path, thumbnail_path, seek_time="00:00:03")
-
             # Create database entry
             bookmark = Bookmark(
                 stream_id=stream_id,
                 center_timestamp=center_timestamp,
-                start_time=start_timestamp,
-                end_time=end_timestamp,
-                file_path=video_file_path,
-                thumbnail_path=thumbnail_path if os.path.exists(thumbnail_path) else None,
+                start_timestamp=start_timestamp,
+                end_timestamp=end_timestamp,
+                video_file_path=video_file_path,
+                thumbnail_path=thumbnail_path if has_thumbnail else None,
                 label=label,
                 source="historical",
-                duration_seconds=6,
-                format="mp4",
+                duration=6,
+                video_format="mp4",
                 file_size=file_size
             )
 
             db.add(bookmark)
             await db.commit()
-            await db.refresh(bookmark)
 
             # Cleanup temporary concat file
-            if os.path.exists(concat_file_path):
-                os.remove(concat_file_path)
+            await asyncio.to_thread(self.remove_files, concat_file_path)
 
             return bookmark
 
         except Exception as e:
             logger.error(f"Failed to capture historical bookmark: {e}")
             # Cleanup partial files
-            if os.path.exists(video_file_path):
-                os.remove(video_file_path)
-            if os.path.exists(thumbnail_path):
-                os.remove(thumbnail_path)
-            if os.path.exists(concat_file_path):
-                os.remove(concat_file_path)
-            raise
-
-    async def _generate_thumbnail(
-        self,
-        video_path: str,
-        thumbnail_path: str,
-        seek_time: str = "00:00:03"
-    ):
-        """
-        Generate thumbnail from video at specified time.
-
-        Args:
-            video_path: Path to source video
-            thumbnail_path: Path to save thumbnail
-            seek_time: Time to extract frame (format: HH:MM:SS)
-        """
-        ffmpeg_cmd = [
-            "ffmpeg",
-            "-y",
-            "-ss", seek_time,
-            "-i", video_path,
-            "-frames:v", "1",
-            "-q:v", "2",
-            thumbnail_path
-        ]
-
-        try:
-            process = await asyncio.create_subprocess_exec(
-                *ffmpeg_cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
+            await asyncio.to_thread(
+                self.remove_files, video_file_path, thumbnail_path, concat_file_path
             )
-
-            await asyncio.wait_for(process.communicate(), timeout=5.0)
-
-            if process.returncode == 0 and os.path.exists(thumbnail_path):
-                logger.info(f"Thumbnail generated: {thumbnail_path}")
-            else:
-                logger.warning(f"Failed to generate thumbnail for {video_path}")
-
-        except Exception as e:
-            logger.warning(f"Thumbnail generation error: {e}")
+            raise
 
     async def get_bookmarks(
         self,
         db: AsyncSession,
-        stream_id: Optional[str] = None,
+        stream_id: Optional[UUID] = None,
         skip: int = 0,
         limit: int = 100
     ) -> List[Bookmark]:
@@ -441,27 +707,31 @@ class BookmarkService:
         result = await db.execute(query)
         return list(result.scalars().all())
 
-    async def get_bookmark(self, bookmark_id: str, db: AsyncSession) -> Optional[Bookmark]:
+    async def get_bookmark(self, bookmark_id: UUID, db: AsyncSession) -> Optional[Bookmark]:
         """Get a single bookmark by ID."""
         result = await db.execute(select(Bookmark).filter(Bookmark.id == bookmark_id))
         return result.scalars().first()
 
     async def update_bookmark(
         self,
-        bookmark_id: str,
+        bookmark_id: UUID,
         label: Optional[str],
         db: AsyncSession
     ) -> Optional[Bookmark]:
         """Update bookmark label."""
-        bookmark = await self.get_bookmark(bookmark_id, db)
-        if bookmark:
-            if label is not None:
-                bookmark.label = label
-            await db.commit()
-            await db.refresh(bookmark)
+        if label is None:
+            return await self.get_bookmark(bookmark_id, db)
+        result = await db.execute(
+            update(Bookmark)
+            .where(Bookmark.id == bookmark_id)
+            .values(label=label)
+            .returning(Bookmark)
+        )
+        bookmark = result.scalar_one_or_none()
+        await db.commit()
         return bookmark
 
-    async def delete_bookmark(self, bookmark_id: str, db: AsyncSession) -> bool:
+    async def delete_bookmark(self, bookmark_id: UUID, db: AsyncSession) -> bool:
         """Delete bookmark and associated files."""
         bookmark = await self.get_bookmark(bookmark_id, db)
         if not bookmark:
@@ -469,13 +739,11 @@ class BookmarkService:
 
         # Delete files
         try:
-            if os.path.exists(bookmark.file_path):
-                os.remove(bookmark.file_path)
-                logger.info(f"Deleted video file: {bookmark.file_path}")
-
-            if bookmark.thumbnail_path and os.path.exists(bookmark.thumbnail_path):
-                os.remove(bookmark.thumbnail_path)
-                logger.info(f"Deleted thumbnail: {bookmark.thumbnail_path}")
+            removed = await asyncio.to_thread(
+                self.remove_files, bookmark.video_file_path, bookmark.thumbnail_path
+            )
+            for path in removed:
+                logger.info(f"Deleted bookmark file: {path}")
         except Exception as e:
             logger.error(f"Error deleting bookmark files: {e}")
 
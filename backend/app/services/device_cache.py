@@ -0,0 +1,161 @@
+"""
+Device Cache
+
+Cache-aside store for serialized DeviceResponse payloads in Redis, so the
+device list/detail endpoints do not hit Postgres on every poll.
+
+Layout:
+- devices:list:{skip}:{limit}   JSON array of DeviceResponse
+- device:{device_id}            JSON DeviceResponse
+- vas:validate:{sha256(url)}    JSON result of an RTSP URL validation
+
+Entries expire after DEVICE_CACHE_TTL and are invalidated after every
+commit that changes a device or its stream state: the device routes on
+create/update/delete/start/stop, the V2 stream services and routes, and
+the health monitor / restart handler.
+
+In front of Redis sits a small per-process TTL cache of device rows
+(DEVICE_ROW_CACHE_TTL, a few seconds) for the hottest polled lookups. It is
+only invalidated in the worker that handled the write, so keep its TTL short
+(or 0) in multi-worker deployments.
+
+Like the active stream registry, Redis is optional: every call degrades to
+a cache miss / no-op when Redis is unreachable.
+"""
+import hashlib
+import time
+from typing import Any, Dict, Optional, Union
+from uuid import UUID
+
+import redis.asyncio as aioredis
+from cachetools import TTLCache
+from redis.exceptions import RedisError
+from loguru import logger
+
+from config.settings import settings
+
+
+class DeviceCache:
+    """Redis cache for device API payloads."""
+
+    LIST_KEY_PREFIX = "devices:list:"
+    DEVICE_KEY_PREFIX = "device:"
+    VALIDATION_KEY_PREFIX = "vas:validate:"
+
+    def __init__(
+        self,
+        redis_url: str,
+        ttl_seconds: int,
+        retry_after: float = 30.0,
+        row_ttl_seconds: float = 0,
+        row_maxsize: int = 4096
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            redis_url: Redis connection URL
+            ttl_seconds: Expiry for cached payloads
+            retry_after: Seconds to skip Redis after a connection failure
+            row_ttl_seconds: Expiry for in-process device rows (0 disables)
+            row_maxsize: Maximum number of in-process device rows
+        """
+        self._rows: Optional[TTLCache] = (
+            TTLCache(maxsize=row_maxsize, ttl=row_ttl_seconds) if row_ttl_seconds > 0 else None
+        )
+        self.ttl_seconds = ttl_seconds
+        self.retry_after = retry_after
+        self._redis = aioredis.from_url(
+            redis_url,
+            socket_connect_timeout=1.0,
+            socket_timeout=1.0,
+        )
+        self._disabled_until = 0.0
+
+    def _available(self) -> bool:
+        return self.ttl_seconds > 0 and time.monotonic() >= self._disabled_until
+
+    def _mark_failed(self, op: str, error: Exception):
+        self._disabled_until = time.monotonic() + self.retry_after
+        logger.warning(f"Device cache {op} failed, skipping Redis for {self.retry_after}s: {error}")
+
+    @classmethod
+    def list_key(cls, skip: int, limit: int) -> str:
+        return f"{cls.LIST_KEY_PREFIX}{skip}:{limit}"
+
+    @classmethod
+    def device_key(cls, device_id: Union[UUID, str]) -> str:
+        return f"{cls.DEVICE_KEY_PREFIX}{device_id}"
+
+    @classmethod
+    def validation_key(cls, rtsp_url: str) -> str:
+        # Hash so credentials embedded in the URL never appear in key names
+        return cls.VALIDATION_KEY_PREFIX + hashlib.sha256(rtsp_url.encode()).hexdigest()
+
+    def get_row(self, device_id: Union[UUID, str]) -> Optional[Dict[str, Any]]:
+        """Get an in-process cached device row (DeviceResponse fields), or None."""
+        if self._rows is None:
+            return None
+        return self._rows.get(str(device_id))
+
+    def set_row(self, device_id: Union[UUID, str], row: Dict[str, Any]):
+        """Cache a device row in-process. Callers must not mutate it afterwards."""
+        if self._rows is not None:
+            self._rows[str(device_id)] = row
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """Get a cached JSON payload, or None on miss."""
+        if not self._available():
+            return None
+        try:
+            return await self._redis.get(key)
+        except (RedisError, OSError) as e:
+            self._mark_failed("get", e)
+            return None
+
+    async def set(self, key: str, payload: bytes, ttl_seconds: Optional[int] = None):
+        """Store a JSON payload with the configured (or given) TTL."""
+        if not self._available():
+            return
+        try:
+            await self._redis.set(key, payload, ex=ttl_seconds or self.ttl_seconds)
+        except (RedisError, OSError) as e:
+            self._mark_failed("set", e)
+
+    async def invalidate(self, device_id: Optional[Union[UUID, str]] = None):
+        """
+        Drop cached payloads affected by a device change.
+
+        Args:
+            device_id: Device whose detail entry to drop (all list pages are
+                always dropped)
+        """
+        if device_id is not None and self._rows is not None:
+            self._rows.pop(str(device_id), None)
+        if not self._available():
+            return
+        try:
+            keys = [key async for key in self._redis.scan_iter(match=f"{self.LIST_KEY_PREFIX}*", count=100)]
+            if device_id is not None:
+                keys.append(self.device_key(device_id))
+            if keys:
+                await self._redis.delete(*keys)
+        except (RedisError, OSError) as e:
+            self._mark_failed("invalidate", e)
+
+    async def invalidate_validation(self, rtsp_url: str):
+        """Drop the cached validation result for an RTSP URL."""
+        if not self._available():
+            return
+        try:
+            await self._redis.delete(self.validation_key(rtsp_url))
+        except (RedisError, OSError) as e:
+            self._mark_failed("invalidate", e)
+
+
+# Global cache instance
+device_cache = DeviceCache(
+    settings.redis_url,
+    settings.device_cache_ttl,
+    row_ttl_seconds=settings.device_row_cache_ttl
+)
@@ -0,0 +1,711 @@
+"""
+Device Stream Service - Starts and stops the RTSP -> MediaSoup pipeline for a device.
+
+Holds the orchestration behind the /devices/{id}/start-stream and
+/devices/{id}/stop-stream routes so the route handlers only resolve the
+device and map failures to HTTP errors.
+"""
+import asyncio
+import os
+import signal
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Coroutine, Dict, List, Optional, Set, Tuple
+
+import psutil
+from loguru import logger
+from sqlalchemy import select, insert, update, and_, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload
+
+from config.settings import settings
+from app.models import Device
+from app.models.stream import Stream, StreamState
+from app.models.producer import Producer, ProducerState
+from app.services.active_stream_registry import active_stream_registry
+from app.services.device_cache import device_cache
+from app.services.mediasoup_client import mediasoup_client
+from app.services.rtsp_pipeline import rtsp_pipeline
+from app.services.stream_health_monitor import stream_health_monitor
+
+
+# Static H264 RTP parameters shared by every producer; only the SSRC varies.
+# Never mutate these - splice per-stream fields in with {**BASE, ...}.
+_H264_CODEC = {
+    "mimeType": "video/H264",
+    "clockRate": 90000,
+    "payloadType": 96,
+    "parameters": {"packetization-mode": 1, "profile-level-id": "42e01f"}
+}
+_VIDEO_RTP_BASE = {"mid": "video", "codecs": [_H264_CODEC]}
+_PRODUCER_RTP_BASE = {"codecs": [_H264_CODEC]}
+_VIDEO_CODEC_CONFIG = {"video": {"codec": "H264", "profile": "42e01f", "payloadType": 96}}
+
+
+def video_rtp_parameters(ssrc: int) -> Dict[str, Any]:
+    """Build MediaSoup producer RTP parameters for an H264 stream with the given SSRC."""
+    return {**_VIDEO_RTP_BASE, "encodings": [{"ssrc": ssrc}]}
+
+
+class StreamStartError(Exception):
+    """Raised when a pipeline stage fails in a way that should surface as a 500."""
+
+
+def _scan_ffmpeg_cmdlines() -> Dict[str, List[int]]:
+    """
+    Map every input URL (-i argument) of running FFmpeg processes to their PIDs.
+
+    One /proc pass answers the lookup for all RTSP URLs. Command lines are only
+    read for processes named ffmpeg, not for every process on the host.
+    """
+    pids_by_input: Dict[str, List[int]] = defaultdict(list)
+    for proc in psutil.process_iter(['pid', 'name']):
+        if "ffmpeg" not in (proc.info['name'] or ""):
+            continue
+        try:
+            cmdline = proc.cmdline()
+        except psutil.Error:
+            continue
+        for flag, value in zip(cmdline, cmdline[1:]):
+            if flag == "-i":
+                pids_by_input[value].append(proc.info['pid'])
+    return dict(pids_by_input)
+
+
+def _wait_procs(pids: List[int], timeout: float) -> List[int]:
+    """Blocking fallback for _wait_for_exit (polls via psutil)."""
+    procs = []
+    for pid in pids:
+        try:
+            procs.append(psutil.Process(pid))
+        except psutil.NoSuchProcess:
+            pass
+    _, alive = psutil.wait_procs(procs, timeout=timeout)
+    return [proc.pid for proc in alive]
+
+
+async def _wait_for_exit(pids: List[int], timeout: float) -> List[int]:
+    """
+    Wait up to timeout for all pids to exit; return the PIDs still alive.
+
+    Uses pidfds (Linux >= 5.3), which become readable when the process exits,
+    so the event loop is woken on exit instead of polling. Falls back to
+    psutil in a worker thread where pidfd_open is unavailable.
+    """
+    if not hasattr(os, "pidfd_open"):
+        return await asyncio.to_thread(_wait_procs, pids, timeout)
+
+    loop = asyncio.get_running_loop()
+    waiters: Dict[int, asyncio.Future] = {}
+    fds: List[int] = []
+
+    def on_exit(fd: int, fut: asyncio.Future):
+        loop.remove_reader(fd)
+        if not fut.done():
+            fut.set_result(None)
+
+    try:
+        for pid in pids:
+            try:
+                fd = os.pidfd_open(pid)
+            except ProcessLookupError:
+                continue  # Already gone
+            fds.append(fd)
+            fut = loop.create_future()
+            loop.add_reader(fd, on_exit, fd, fut)
+            waiters[pid] = fut
+
+        if waiters:
+            await asyncio.wait(waiters.values(), timeout=timeout)
+        return [pid for pid, fut in waiters.items() if not fut.done()]
+    finally:
+        for fd in fds:
+            loop.remove_reader(fd)
+            os.close(fd)
+
+
+class DeviceStreamService:
+    """Orchestrates device stream start/stop across FFmpeg, MediaSoup and the database."""
+
+    # Seconds a /proc scan for orphaned FFmpeg is reused by other sweeps
+    FFMPEG_SCAN_TTL = 1.0
+
+    def __init__(self):
+        # Strong references to fire-and-forget tasks so they are not GC'd mid-flight
+        self._background_tasks: Set[asyncio.Task] = set()
+        # Per-device start locks (see start_lock)
+        self._start_locks: Dict[str, asyncio.Lock] = {}
+        # RTSP URLs already swept for FFmpeg left behind by a previous backend
+        # process; after the sweep every FFmpeg for the URL is tracked
+        self._swept_urls: Set[str] = set()
+        # Most recent /proc scan, shared by sweeps started within FFMPEG_SCAN_TTL
+        self._ffmpeg_scan: Optional[Tuple[float, asyncio.Task]] = None
+
+    def start_lock(self, device_id) -> asyncio.Lock:
+        """
+        Lock serializing starts of one device within this worker.
+
+        Hold it around load() + start() so a queued request sees the stream
+        started by the one ahead of it (and fresh DB rows) rather than
+        starting a duplicate.
+        """
+        return self._start_locks.setdefault(str(device_id), asyncio.Lock())
+
+    def _run_in_background(self, coro: Coroutine, description: str):
+        """Run bookkeeping off the request path, logging (not raising) failures."""
+        async def runner():
+            try:
+                await coro
+            except Exception as e:
+                logger.warning(f"Background {description} failed: {e}")
+
+        task = asyncio.create_task(runner())
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    def publish_active(self, room_id: str, info: Dict[str, Any]):
+        """
+        Register a started stream with the cross-worker registry.
+
+        info must include the stream's rtsp_url, so other workers only reuse
+        it while the device still points there.
+
+        Runs in the background (a Redis round-trip the start response does
+        not depend on).
+        """
+        self._run_in_background(
+            active_stream_registry.add(room_id, info),
+            f"active stream registration for {room_id}"
+        )
+
+    async def load(
+        self,
+        db: AsyncSession,
+        device_id
+    ) -> Optional[Tuple[Device, Optional[Stream], Optional[Producer]]]:
+        """
+        Fetch a device with its latest V2 Stream and active Producer in one query.
+
+        Args:
+            db: Database session
+            device_id: Device identifier
+
+        Returns:
+            (device, stream, active_producer), or None if the device does not exist
+        """
+        result = await db.execute(
+            select(Device, Stream, Producer)
+            .select_from(Device)
+            .outerjoin(Stream, Stream.camera_id == Device.id)
+            .outerjoin(Producer, and_(
+                Producer.stream_id == Stream.id,
+                Producer.state == ProducerState.ACTIVE
+            ))
+            .where(Device.id == device_id)
+            # A device can accumulate several streams; use the latest, as the device listings do
+            .order_by(Stream.created_at.desc(), Producer.created_at.desc())
+            .options(raiseload("*"))
+        )
+        row = result.first()
+        return tuple(row) if row else None
+
+    async def find_active(self, room_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a running stream on this worker, then on any worker via Redis.
+
+        Args:
+            room_id: Room identifier (the device ID)
+
+        Returns:
+            Stream info, or None if no worker has the stream running
+        """
+        stream_info = rtsp_pipeline.active_streams.get(room_id)
+        if stream_info is None:
+            stream_info = await active_stream_registry.get(room_id)
+        return stream_info
+
+    async def find_reusable(self, room_id: str, rtsp_url: str) -> Optional[Dict[str, Any]]:
+        """
+        Like find_active, but only for a stream a repeated start can reattach to.
+
+        A stream running on this worker is reused only while its FFmpeg is
+        alive and reads the device's current RTSP URL; otherwise it is stopped
+        here so the caller rebuilds it. A stream registered by another worker
+        is reused only while it reads the current RTSP URL.
+
+        Args:
+            room_id: Room identifier (the device ID)
+            rtsp_url: The device's current RTSP URL
+
+        Returns:
+            Stream info, or None if the stream must be (re)started
+        """
+        stream_info = await self.find_active(room_id)
+        if room_id in rtsp_pipeline.active_streams and (
+            stream_info.get("rtsp_url") != rtsp_url or not rtsp_pipeline.is_healthy(room_id)
+        ):
+            logger.info(f"Active stream for {room_id} is stale (FFmpeg exited or RTSP URL changed), restarting")
+            await rtsp_pipeline.stop_stream(room_id)
+            return None
+        if stream_info is not None and stream_info.get("rtsp_url") != rtsp_url:
+            logger.info(f"Stream for {room_id} on another worker reads an old RTSP URL, restarting here")
+            return None
+        return stream_info
+
+    async def start(
+        self,
+        db: AsyncSession,
+        device: Device,
+        v2_stream: Optional[Stream] = None,
+        active_producer: Optional[Producer] = None
+    ) -> Dict[str, Any]:
+        """
+        Start (or reattach to) the stream for a device.
+
+        Args:
+            db: Database session
+            device: Device to stream
+            v2_stream: The device's V2 Stream, as fetched by load() (created
+                here if None)
+            active_producer: The stream's active Producer, as fetched by load()
+
+        Returns:
+            Stream start response payload
+
+        Raises:
+            StreamStartError: If FFmpeg or the PlainRTP transport fails to start
+        """
+        device_id = device.id
+        room_id = str(device_id)
+
+        # 0. CHECK: If stream is already active, return existing stream info instead of restarting
+        # This prevents disrupting active streams when Ruth AI or VAS portal reconnects
+        stream_info = await self.find_reusable(room_id, device.rtsp_url)
+        if stream_info is not None:
+            logger.info(f"Stream already active for device {device_id}, returning existing stream info")
+
+            # Get existing producers for this room (the V2 Stream and its active
+            # Producer were fetched together with the device by load())
+            try:
+                existing_producers = await mediasoup_client.get_producers(room_id)
+                if existing_producers:
+                    # Ensure Producer database record exists for reconnecting streams
+                    if v2_stream and not active_producer:
+                        # Create missing Producer record
+                        logger.info(f"Creating missing Producer record for reconnecting stream {v2_stream.id}")
+                        new_producer = Producer(
+                            stream_id=v2_stream.id,
+                            mediasoup_producer_id=existing_producers[-1],
+                            mediasoup_transport_id=stream_info.get("transport_id", "unknown"),
+                            mediasoup_router_id=room_id,
+                            ssrc=stream_info.get("ssrc", 0),
+                            rtp_parameters={**_PRODUCER_RTP_BASE, "encodings": [{"ssrc": stream_info.get("ssrc", 0)}]},
+                            state=ProducerState.ACTIVE
+                        )
+                        db.add(new_producer)
+                        await db.commit()
+                        logger.info(f"Created Producer record for reconnecting stream")
+
+                    # Return info about existing stream
+                    response = {
+                        "status": "success",
+                        "device_id": str(device_id),
+                        "room_id": room_id,
+                        "transport_id": stream_info.get("transport_id", "unknown"),
+                        "producers": {
+                            "video": existing_producers[-1] if existing_producers else "unknown"
+                        },
+                        "stream": {
+                            "status": "active",
+                            "message": "Stream already running",
+                            "started_at": stream_info.get("started_at")
+                        },
+                        "reconnect": True  # Flag indicating this was a reconnect, not a new stream
+                    }
+
+                    # Include v2_stream_id if V2 Stream record exists
+                    if v2_stream:
+                        response["v2_stream_id"] = str(v2_stream.id)
+
+                    return response
+            except Exception as e:
+                logger.warning(f"Error getting existing producers, will restart stream: {e}")
+                # If we can't get producer info, fall through to restart the stream
+                await rtsp_pipeline.stop_stream(room_id)
+        
+        # SSRC Capture Workflow:
+        # 0. Close old transports and producers (releases the port for SSRC capture),
+        #    overlapped with the orphaned FFmpeg cleanup
+        # 1. Get deterministic port for this room
+        # 2. Start SSRC capture (binds UDP socket) and FFmpeg (sends to that port) concurrently
+        # 3. SSRC capture extracts SSRC from first packet, closes socket
+        # 4. Create MediaSoup transport on same port (now available)
+        # 5. Create producer (before connecting transport)
+        # 6. Connect transport to FFmpeg source
+
+        mediasoup_host = settings.mediasoup_host
+
+        # Killing orphaned FFmpeg is local process work while room preparation is
+        # MediaSoup RPCs, so run them concurrently; both must finish before SSRC
+        # capture so a stale FFmpeg cannot be captured instead of the new one
+        _, video_port = await asyncio.gather(
+            self.kill_orphaned_ffmpeg(device.rtsp_url),
+            self._prepare_room(room_id)
+        )
+
+        # Step 2: Start SSRC capture and FFmpeg concurrently
+        # We need FFmpeg to start sending packets so we can capture the SSRC
+        logger.info(f"Starting SSRC capture and FFmpeg concurrently...")
+
+        # Run SSRC capture and FFmpeg start in a TaskGroup: FFmpeg starts once
+        # the capture request is on the wire (the MediaSoup server binds the
+        # port on receipt), and an FFmpeg failure cancels the capture at once
+        # instead of waiting out its timeout. A failed capture is not fatal.
+        # Timeout is 15 seconds to allow for slow RTSP camera connections
+        capture_ready = asyncio.Event()
+
+        async def capture():
+            try:
+                return await mediasoup_client.capture_ssrc(
+                    video_port, timeout_ms=15000, ready_event=capture_ready
+                )
+            except Exception as e:
+                logger.error(f"SSRC capture failed: {e}")
+                return {"ssrc": None, "success": False}
+            finally:
+                capture_ready.set()
+
+        async def start_ffmpeg():
+            await capture_ready.wait()
+            try:
+                info = await rtsp_pipeline.start_stream(
+                    stream_id=room_id,
+                    rtsp_url=device.rtsp_url,
+                    mediasoup_ip=mediasoup_host,
+                    mediasoup_video_port=video_port,
+                    ssrc=None  # FFmpeg will use random SSRC, we'll capture it
+                )
+            except Exception as e:
+                logger.error(f"FFmpeg start failed: {e}")
+                raise StreamStartError(f"Failed to start FFmpeg: {e}") from e
+            if info.get("status") == "error":
+                raise StreamStartError(f"Failed to start FFmpeg: {info.get('error')}")
+            return info
+
+        try:
+            async with asyncio.TaskGroup() as tg:
+                ssrc_capture_task = tg.create_task(capture())
+                ffmpeg_task = tg.create_task(start_ffmpeg())
+        except* StreamStartError as eg:
+            raise eg.exceptions[0]
+
+        ssrc_result = ssrc_capture_task.result()
+        stream_info = ffmpeg_task.result()
+
+        captured_ssrc = ssrc_result.get("ssrc")
+        if not captured_ssrc:
+            logger.warning(f"Failed to capture SSRC - stream may not work correctly")
+            # Try to continue anyway - the stream might still work
+            captured_ssrc = 0
+
+        logger.info(f"✅ SSRC captured: {captured_ssrc} (0x{captured_ssrc:08x})")
+        logger.info(f"✅ FFmpeg started sending to port {video_port}")
+        # Single timestamp for the stream record, the shared registry and the
+        # local pipeline entry (read by reconnects and the status endpoint)
+        started_at = datetime.now(timezone.utc).isoformat()
+        stream_info["started_at"] = started_at
+
+        # Step 3: Create PlainRTP transport on the same port
+        # The capture socket is now closed, so we can bind MediaSoup to this port
+        logger.info(f"Creating PlainRTP transport on port {video_port}...")
+        transport_info = await mediasoup_client.create_plain_rtp_transport(room_id, fixed_port=video_port)
+
+        if not transport_info:
+            raise StreamStartError("Failed to create PlainRTP transport")
+
+        transport_id = transport_info["id"]
+        logger.info(f"PlainRTP transport created: {transport_id}")
+
+        # Step 4: Create producer FIRST (before connecting transport)
+        # This ensures the producer is ready when packets start arriving
+        logger.info(f"Creating producer with SSRC {captured_ssrc}...")
+        video_producer = await mediasoup_client.create_producer(
+            transport_id, "video", video_rtp_parameters(captured_ssrc)
+        )
+        producer_id = video_producer.get('id')
+        logger.info(f"✅ Producer created: {producer_id}")
+
+        # Step 5: NOW connect transport to FFmpeg source
+        # The producer is already waiting for packets with the correct SSRC
+        ffmpeg_source_port = rtsp_pipeline.get_ffmpeg_source_port(room_id)
+        logger.info(f"Connecting transport to FFmpeg source 127.0.0.1:{ffmpeg_source_port}...")
+        await mediasoup_client.connect_plain_transport(
+            transport_id=transport_id,
+            ip="127.0.0.1",
+            port=ffmpeg_source_port
+        )
+
+        # 7. Wait for producer to actually receive RTP packets before returning success
+        # This prevents the race condition where frontend connects before FFmpeg is streaming
+        logger.info(f"Waiting for producer {producer_id} to receive RTP packets...")
+
+        producer_ready = await mediasoup_client.wait_for_producer_ready(
+            producer_id,
+            timeout=8.0,  # 8 seconds max (FFmpeg takes ~0.5s to start, packets should arrive within 1-2s more)
+            poll_interval=0.3
+        )
+
+        if not producer_ready:
+            logger.warning(f"Producer {producer_id} not receiving packets after timeout - stream may have issues")
+            # Don't fail the request - the stream might still work, frontend has retry logic
+
+        # Update device as active
+        device.is_active = True
+
+        # Create or update V2 Stream record for snapshot/bookmark support
+        # (the existing stream, if any, was already fetched by load())
+        stream_metadata = {
+            "transport_id": transport_id,
+            "producer_id": video_producer["id"],
+            "ssrc": captured_ssrc,
+            "started_at": started_at
+        }
+
+        if v2_stream:
+            # Update existing stream to LIVE state
+            v2_stream.state = StreamState.LIVE
+            v2_stream.stream_metadata = stream_metadata
+            logger.info(f"Updated V2 Stream {v2_stream.id} to LIVE state")
+        else:
+            # Create new V2 Stream record; INSERT ... RETURNING hands back the
+            # ID without flushing the session
+            result = await db.execute(
+                insert(Stream)
+                .values(
+                    camera_id=device_id,
+                    name=device.name or f"Stream-{device_id}",
+                    state=StreamState.LIVE,
+                    codec_config=_VIDEO_CODEC_CONFIG,
+                    stream_metadata=stream_metadata
+                )
+                .returning(Stream)
+            )
+            v2_stream = result.scalar_one()
+            logger.info(f"Created V2 Stream {v2_stream.id} for device {device_id}")
+
+        # Create Producer database record for consumer attachment support
+        # First, close any existing producers for this stream
+        existing_producers_query = select(Producer).where(
+            Producer.stream_id == v2_stream.id,
+            Producer.state != ProducerState.CLOSED
+        )
+        existing_producers_result = await db.execute(existing_producers_query)
+        for old_producer in existing_producers_result.scalars().all():
+            old_producer.state = ProducerState.CLOSED
+            logger.info(f"Closed existing producer record {old_producer.id}")
+
+        # Create new Producer record with ACTIVE state
+        new_producer = Producer(
+            stream_id=v2_stream.id,
+            mediasoup_producer_id=video_producer["id"],
+            mediasoup_transport_id=transport_id,
+            mediasoup_router_id=room_id,  # Using room_id as router_id
+            ssrc=captured_ssrc,  # SSRC captured from FFmpeg's RTP packets
+            rtp_parameters={**_PRODUCER_RTP_BASE, "encodings": [{"ssrc": captured_ssrc}]},
+            state=ProducerState.ACTIVE
+        )
+        db.add(new_producer)
+        logger.info(f"Created Producer record {new_producer.id} with ACTIVE state for stream {v2_stream.id}")
+
+        await db.commit()
+        await device_cache.invalidate(device_id)
+
+        # Publish to other workers so their reconnect checks see this stream
+        self.publish_active(room_id, {**stream_metadata, "rtsp_url": device.rtsp_url})
+
+        # Register stream with health monitor for continuous monitoring
+        stream_health_monitor.register_stream(room_id, video_producer["id"])
+        logger.info(f"Registered stream with health monitor: room={room_id}, producer={video_producer['id']}")
+
+        return {
+            "status": "success",
+            "device_id": str(device_id),
+            "room_id": room_id,
+            "transport_id": transport_id,
+            "producers": {
+                "video": video_producer["id"]
+            },
+            "stream": stream_info,
+            "v2_stream_id": str(v2_stream.id)  # Include V2 stream ID in response
+        }
+
+    async def _scan_ffmpeg(self) -> Dict[str, List[int]]:
+        """
+        Return the FFmpeg input URL -> PIDs map, scanning /proc in a worker thread.
+
+        Sweeps started within FFMPEG_SCAN_TTL of each other (e.g. a fleet of
+        devices restarted together) share one scan instead of walking /proc
+        once per URL.
+        """
+        now = time.monotonic()
+        if self._ffmpeg_scan is None or now - self._ffmpeg_scan[0] > self.FFMPEG_SCAN_TTL:
+            self._ffmpeg_scan = (now, asyncio.ensure_future(asyncio.to_thread(_scan_ffmpeg_cmdlines)))
+        return await asyncio.shield(self._ffmpeg_scan[1])
+
+    async def kill_orphaned_ffmpeg(self, rtsp_url: str):
+        """
+        Kill any orphaned FFmpeg processes for this RTSP URL as a safety measure.
+
+        FFmpeg spawned by this worker is stopped through its tracked process
+        handle. The /proc scan for untracked processes (e.g. left by a crashed
+        backend) runs in a worker thread, once per URL per process lifetime.
+        """
+        await rtsp_pipeline.terminate_ffmpeg_for_url(rtsp_url)
+        if rtsp_url in self._swept_urls:
+            return
+        self._swept_urls.add(rtsp_url)
+
+        try:
+            pids = (await self._scan_ffmpeg()).get(rtsp_url, [])
+            if pids:
+                for pid in pids:
+                    try:
+                        os.kill(pid, signal.SIGTERM)
+                        logger.info(f"Killed orphaned FFmpeg process {pid} (SIGTERM)")
+                    except ProcessLookupError:
+                        pass
+
+                # Wait (up to 1.5s) for SIGTERM to take effect, returning as soon
+                # as every process has exited
+                survivor_pids = await _wait_for_exit(pids, 1.5)
+
+                # Force kill any survivors with SIGKILL
+                if survivor_pids:
+                    for pid in survivor_pids:
+                        try:
+                            os.kill(pid, signal.SIGKILL)
+                            logger.warning(f"Force killed stubborn FFmpeg process {pid} (SIGKILL)")
+                        except ProcessLookupError:
+                            pass
+                    await _wait_for_exit(survivor_pids, 0.5)
+        except Exception as e:
+            logger.warning(f"Error cleaning up orphaned FFmpeg processes: {e}")
+
+    async def _cleanup_old_producers(self, room_id: str):
+        """Close any old MediaSoup producers for this room."""
+        try:
+            old_producers = await mediasoup_client.get_producers(room_id)
+            if old_producers:
+                logger.info(f"Found {len(old_producers)} old producer(s), cleaning up...")
+                failures = await mediasoup_client.close_producers(old_producers)
+                for old_producer_id, error in failures.items():
+                    logger.warning(f"Failed to close old producer {old_producer_id}: {error}")
+        except Exception as e:
+            logger.warning(f"Error cleaning up old producers: {e}")
+
+    async def _prepare_room(self, room_id: str) -> int:
+        """
+        Release the room's MediaSoup resources and return its capture port.
+
+        Returns:
+            Deterministic RTP port for this room
+        """
+        # Close old transports for this room (releases the port)
+        try:
+            closed_count = await mediasoup_client.close_transports_for_room(room_id)
+            if closed_count > 0:
+                logger.info(f"Closed {closed_count} old transport(s) for room {room_id}")
+                await asyncio.sleep(0.3)  # Brief delay to ensure port is released
+        except Exception as e:
+            logger.warning(f"Error closing old transports: {e}")
+
+        await self._cleanup_old_producers(room_id)
+
+        # Get deterministic port for this room
+        logger.info(f"Getting port for room {room_id}...")
+        video_port = await mediasoup_client.get_port_for_room(room_id)
+        logger.info(f"Using port {video_port} for room {room_id}")
+        return video_port
+
+    async def stop(self, db: AsyncSession, device_id) -> Optional[bool]:
+        """
+        Stop the stream for a device and mark its records stopped.
+
+        Args:
+            db: Database session
+            device_id: Device identifier
+
+        Returns:
+            True if a running pipeline was stopped, False if none was, or None
+            if the device does not exist
+        """
+        room_id = str(device_id)
+        stopped = await rtsp_pipeline.stop_stream(room_id)
+
+        lock = self._start_locks.get(room_id)
+        if lock is not None and not lock.locked():
+            del self._start_locks[room_id]
+
+        # Unregister from health monitor
+        stream_health_monitor.unregister_stream(room_id)
+        logger.info(f"Unregistered stream from health monitor: room={room_id}")
+
+        if not stopped:
+            exists = (await db.execute(
+                select(Device.id).where(Device.id == device_id)
+            )).scalar_one_or_none()
+            return False if exists else None
+
+        # Mark the device inactive, its V2 Stream(s) STOPPED and their open
+        # producers CLOSED in one statement (data-modifying CTEs)
+        devices = (
+            update(Device)
+            .where(Device.id == device_id)
+            .values(is_active=False)
+            .returning(Device.id)
+            .cte("devices_stopped")
+        )
+        streams = (
+            update(Stream)
+            .where(Stream.camera_id == device_id)
+            .values(state=StreamState.STOPPED)
+            .returning(Stream.id)
+            .cte("streams_stopped")
+        )
+        producers = (
+            update(Producer)
+            .where(
+                Producer.stream_id.in_(select(streams.c.id)),
+                Producer.state != ProducerState.CLOSED
+            )
+            .values(state=ProducerState.CLOSED)
+            .returning(Producer.id)
+            .cte("producers_closed")
+        )
+        row = (await db.execute(
+            select(
+                select(func.count()).select_from(devices).scalar_subquery(),
+                select(func.array_agg(streams.c.id)).scalar_subquery(),
+                select(func.array_agg(producers.c.id)).scalar_subquery()
+            )
+        )).one()
+        device_count, stream_ids, closed_ids = row
+
+        if not device_count:
+            await db.rollback()
+            return None
+
+        if stream_ids:
+            logger.info(f"Updated V2 Stream(s) {', '.join(map(str, stream_ids))} to STOPPED state")
+        for producer_id in closed_ids or ():
+            logger.info(f"Closed Producer record {producer_id}")
+
+        await db.commit()
+        await device_cache.invalidate(device_id)
+
+        return stopped
+
+
+# Global service instance
+device_stream_service = DeviceStreamService()
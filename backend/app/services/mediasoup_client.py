@@ -4,8 +4,9 @@ MediaSoup Client Service
 Communicates with the MediaSoup Node.js server via WebSocket
 """
 import asyncio
-import json
+import orjson
 import websockets
+from uuid import uuid4
 from typing import Dict, Optional, Any, List
 from loguru import logger
 
@@ -15,14 +16,23 @@ class MediaSoupClient:
     Client for communicating with MediaSoup server.
     """
 
-    def __init__(self, mediasoup_url: str = "ws://localhost:3001"):
-        """Initialize MediaSoup client."""
+    def __init__(self, mediasoup_url: str = "ws://localhost:3001", request_timeout: float = 10.0):
+        """
+        Initialize MediaSoup client.
+
+        Args:
+            mediasoup_url: MediaSoup server WebSocket URL
+            request_timeout: Seconds to wait for a response to a request
+        """
         self.mediasoup_url = mediasoup_url
+        self.request_timeout = request_timeout
         self.websocket: Optional[websockets.WebSocketClientProtocol] = None
+        # Pending requests by id; the listener task resolves them as replies arrive
         self.response_futures: Dict[str, asyncio.Future] = {}
         self.connected = False
-        # Lock to prevent concurrent WebSocket requests (responses aren't correlated)
-        self._request_lock = asyncio.Lock()
+        self._listener: Optional[asyncio.Task] = None
+        # Serializes (re)connects only - requests themselves are pipelined
+        self._connect_lock = asyncio.Lock()
 
         logger.info(f"MediaSoup client initialized (server: {mediasoup_url})")
     
@@ -30,12 +40,10 @@ class MediaSoupClient:
         """Connect to MediaSoup server."""
         # Close existing connection if any
         if self.websocket:
-            try:
-                if not self.websocket.closed:
-                    await self.websocket.close()
-            except:
-                pass
-            self.websocket = None
+            await self._drop_connection(self.websocket)
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
         
         self.connected = False
         
@@ -43,69 +51,136 @@ class MediaSoupClient:
             self.websocket = await websockets.connect(self.mediasoup_url)
             self.connected = True
             logger.info("Connected to MediaSoup server")
-            # No background listener - we read responses directly in _send_request
+            self._listener = asyncio.create_task(self._reader_loop(self.websocket))
             
         except Exception as e:
             self.connected = False
             logger.error(f"Failed to connect to MediaSoup server: {e}")
             raise
+
+    async def _ensure_connected(self):
+        """Reconnect if the connection is down (one reconnect for concurrent callers)."""
+        async with self._connect_lock:
+            if not self.connected or not self.websocket or (hasattr(self.websocket, 'closed') and self.websocket.closed):
+                logger.warning("WebSocket connection lost, reconnecting...")
+                await self.connect()
+
+    async def _reader_loop(self, websocket: websockets.WebSocketClientProtocol):
+        """
+        Read responses off the socket and hand each to its waiting request.
+
+        Replies carry the id of the request they answer, so any number of
+        requests can be outstanding on the one connection. Replies nobody is
+        waiting for (the caller timed out or was cancelled) are dropped.
+        """
+        try:
+            async for message in websocket:
+                try:
+                    response = orjson.loads(message)
+                except ValueError:
+                    logger.warning("Ignoring malformed MediaSoup message")
+                    continue
+                future = self.response_futures.pop(response.get("id"), None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        except websockets.exceptions.ConnectionClosed as e:
+            logger.warning(f"MediaSoup WebSocket connection closed: {e}")
+        finally:
+            await self._drop_connection(websocket)
+
+    async def _drop_connection(self, websocket: websockets.WebSocketClientProtocol):
+        """
+        Tear down a connection after a transport failure.
+
+        Closes the socket and fails every request still waiting on it, so
+        callers get an error instead of hanging until their timeout. A socket
+        that has already been replaced by a reconnect is only closed.
+        """
+        if self.websocket is websocket:
+            self.connected = False
+            self.websocket = None
+            # Fail whatever was still waiting on this connection
+            futures, self.response_futures = self.response_futures, {}
+            for future in futures.values():
+                if not future.done():
+                    future.set_exception(
+                        RuntimeError("MediaSoup connection closed. Please try again.")
+                    )
+        try:
+            if not websocket.closed:
+                await websocket.close()
+        except Exception:
+            pass
     
-    async def _send_request(self, request_type: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    async def _send_request(
+        self,
+        request_type: str,
+        payload: Dict[str, Any],
+        sent_event: Optional[asyncio.Event] = None,
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
         """
         Send request to MediaSoup server and wait for response.
 
-        Uses a lock to prevent concurrent requests since responses aren't correlated
-        by ID - we just read the next message as the response.
+        Each request is tagged with a unique id that the server echoes back,
+        so concurrent callers share the socket without waiting on each other.
 
         Args:
             request_type: Type of request
             payload: Request payload
+            sent_event: Optional event set once the request has been written
+                to the socket (before the response arrives)
+            timeout: Seconds to wait for the response (default request_timeout)
 
         Returns:
             Response data
         """
-        # Use lock to serialize requests - responses aren't correlated by ID
-        async with self._request_lock:
-            # Check if connection is alive, reconnect if needed
-            if not self.connected or not self.websocket or (hasattr(self.websocket, 'closed') and self.websocket.closed):
-                logger.warning("WebSocket connection lost, reconnecting...")
-                await self.connect()
-
-            message = {
-                "type": request_type,
-                "payload": payload
-            }
-
-            try:
-                await self.websocket.send(json.dumps(message))
-                logger.debug(f"MediaSoup request sent: {request_type}")
-
-                # Wait for response
-                response_message = await self.websocket.recv()
-                response = json.loads(response_message)
-
-                # Check for errors in response
-                if "error" in response:
-                    error_msg = response.get("error", "Unknown error")
-                    logger.error(f"MediaSoup error for {request_type}: {error_msg}")
-                    raise RuntimeError(f"MediaSoup error: {error_msg}")
-
-                logger.debug(f"MediaSoup response received for {request_type}")
-                return response
-
-            except (websockets.exceptions.ConnectionClosed, websockets.exceptions.ConnectionClosedError) as e:
-                # Connection closed, mark as disconnected and reconnect
-                logger.warning(f"WebSocket connection closed during {request_type}: {e}")
-                self.connected = False
-                self.websocket = None
-                raise RuntimeError(f"MediaSoup connection closed. Please try again.")
+        # Check if connection is alive, reconnect if needed
+        await self._ensure_connected()
+
+        websocket = self.websocket
+        request_id = str(uuid4())
+        future = asyncio.get_running_loop().create_future()
+        self.response_futures[request_id] = future
+        message = {
+            "id": request_id,
+            "type": request_type,
+            "payload": payload
+        }
 
-            except Exception as e:
-                # On any other error, mark as disconnected if it's a connection error
-                if "connection" in str(e).lower() or "closed" in str(e).lower():
-                    self.connected = False
-                    self.websocket = None
-                raise
+        try:
+            # Sent as a binary frame; the server's JSON.parse decodes the buffer as UTF-8
+            await websocket.send(orjson.dumps(message))
+            logger.debug(f"MediaSoup request sent: {request_type}")
+            if sent_event is not None:
+                sent_event.set()
+
+            # Wait for response
+            response = await asyncio.wait_for(future, timeout or self.request_timeout)
+
+            # Check for errors in response
+            if "error" in response:
+                error_msg = response.get("error", "Unknown error")
+                logger.error(f"MediaSoup error for {request_type}: {error_msg}")
+                raise RuntimeError(f"MediaSoup error: {error_msg}")
+
+            logger.debug(f"MediaSoup response received for {request_type}")
+            return response
+
+        except asyncio.TimeoutError:
+            logger.error(f"MediaSoup request {request_type} timed out")
+            raise RuntimeError(f"MediaSoup request {request_type} timed out")
+
+        except websockets.exceptions.ConnectionClosed as e:
+            # Transport failure: drop this socket so the next request reconnects.
+            # MediaSoup error replies (RuntimeError above) leave the socket alone.
+            logger.warning(f"WebSocket connection closed during {request_type}: {e}")
+            await self._drop_connection(websocket)
+            raise RuntimeError(f"MediaSoup connection closed. Please try again.")
+
+        finally:
+            # A late reply to a cancelled/timed-out request is simply dropped
+            self.response_futures.pop(request_id, None)
     
     async def get_router_rtp_capabilities(self, room_id: str) -> Dict[str, Any]:
         """
@@ -161,7 +236,8 @@ class MediaSoupClient:
     async def capture_ssrc(
         self,
         port: int,
-        timeout_ms: int = 8000
+        timeout_ms: int = 8000,
+        ready_event: Optional[asyncio.Event] = None
     ) -> Dict[str, Any]:
         """
         Capture SSRC from incoming RTP packets on a specific port.
@@ -171,20 +247,23 @@ class MediaSoupClient:
         The socket is closed after capture (or timeout).
 
         IMPORTANT: FFmpeg must be started AFTER this method is called (so the
-        socket is bound) but BEFORE the timeout. Use asyncio.gather() to run
-        FFmpeg start in parallel with this method.
+        socket is bound) but BEFORE the timeout. Run this as a task, wait for
+        ready_event, then start FFmpeg.
 
         Args:
             port: Port to listen on (from get_port_for_room)
             timeout_ms: Timeout in milliseconds
+            ready_event: Optional event set once the capture request has been
+                handed to the MediaSoup server (which binds on receipt)
 
         Returns:
             Dict with 'ssrc' (or None if failed), 'success' bool
         """
+        # The server holds the reply until capture finishes or times out
         response = await self._send_request("captureSSRC", {
             "port": port,
             "timeoutMs": timeout_ms
-        })
+        }, sent_event=ready_event, timeout=timeout_ms / 1000 + self.request_timeout)
         return {
             "ssrc": response.get("ssrc"),
             "success": response.get("success", False),
@@ -413,6 +492,29 @@ class MediaSoupClient:
         """
         await self._send_request("closeProducer", {"producerId": producer_id})
         logger.info(f"Closed producer: {producer_id}")
+
+    async def close_producers(self, producer_ids: List[str]) -> Dict[str, Exception]:
+        """
+        Close several producers, continuing past individual failures.
+
+        The close requests are pipelined over the shared WebSocket (see
+        _send_request), so this costs about one round-trip, not one per producer.
+
+        Args:
+            producer_ids: Producer identifiers
+
+        Returns:
+            Mapping of producer_id to the exception for each close that failed
+        """
+        results = await asyncio.gather(
+            *[self.close_producer(pid) for pid in producer_ids],
+            return_exceptions=True
+        )
+        return {
+            pid: result
+            for pid, result in zip(producer_ids, results)
+            if isinstance(result, Exception)
+        }
     
     async def close_transport(self, transport_id: str):
         """
@@ -444,6 +546,9 @@ class MediaSoupClient:
     
     async def disconnect(self):
         """Disconnect from MediaSoup server."""
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
         if self.websocket:
             await self.websocket.close()
             self.connected = False
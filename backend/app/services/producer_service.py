@@ -19,6 +19,7 @@ from app.models.stream import Stream, StreamState
 from app.models.producer import Producer, ProducerState
 from app.services.mediasoup_client import MediaSoupClient
 from app.services.stream_state_machine import transition
+from app.services.device_cache import device_cache
 import os
 
 
@@ -165,7 +166,7 @@ class ProducerService:
             )
 
             await db.commit()
-            await db.refresh(new_producer)
+            await device_cache.invalidate(stream.camera_id)
 
             # Track active producer
             self.active_producers[producer_id] = {
@@ -200,6 +201,7 @@ class ProducerService:
                 db=db
             )
             await db.commit()
+            await device_cache.invalidate(stream.camera_id)
 
             raise RuntimeError(f"Producer creation failed: {str(e)}")
 
@@ -267,6 +269,8 @@ class ProducerService:
                 )
 
             await db.commit()
+            if stream:
+                await device_cache.invalidate(stream.camera_id)
 
             # Remove from tracking
             if producer.mediasoup_producer_id in self.active_producers:
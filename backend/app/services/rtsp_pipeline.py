@@ -8,8 +8,30 @@ import asyncio
 import socket
 import struct
 import os
-from typing import Dict, Optional, Any
+import shutil
+import signal
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Any, Set, Tuple
+import psutil
 from loguru import logger
+from config.settings import settings
+from app.services.active_stream_registry import active_stream_registry
+from app.services.mediasoup_client import mediasoup_client
+
+
+# PID files for spawned FFmpeg; they outlive a backend restart, so a stop can
+# still find an FFmpeg this process holds no handle for
+FFMPEG_PID_DIR = "/tmp/vas/ffmpeg"
+
+
+def _is_ffmpeg_for(pid: int, stream_id: str) -> bool:
+    """True if pid is an FFmpeg whose command line mentions stream_id (guards PID reuse)."""
+    try:
+        cmdline = psutil.Process(pid).cmdline()
+    except psutil.Error:
+        return False
+    return bool(cmdline) and "ffmpeg" in os.path.basename(cmdline[0]) and any(stream_id in arg for arg in cmdline)
 
 
 class RTSPPipeline:
@@ -27,8 +49,14 @@ class RTSPPipeline:
         """Initialize RTSP Pipeline service."""
         self.active_streams: Dict[str, Any] = {}
         self.ffmpeg_processes: Dict[str, subprocess.Popen] = {}
+        # rtsp_url -> live FFmpeg processes this worker spawned for it
+        self.ffmpeg_by_url: Dict[str, Set[asyncio.subprocess.Process]] = {}
         self.recording_retention_days = 7  # Keep recordings for 7 days
         self.cleanup_task = None
+        # rtsp_url -> (ssrc, monotonic capture time); see capture_ssrc_cached
+        self._ssrc_cache: Dict[str, Tuple[int, float]] = {}
+        # rtsp_url -> in-flight probe shared by concurrent callers
+        self._ssrc_probes: Dict[str, asyncio.Task] = {}
 
         logger.info("RTSP Pipeline service initialized")
 
@@ -43,6 +71,9 @@ class RTSPPipeline:
         Capture SSRC by starting FFmpeg on a temporary port and reading the first RTP packet.
         This is more reliable than tcpdump as it doesn't require root permissions.
 
+        Concurrent calls for the same URL share one probe (single-flight), so
+        racing validates/starts never spawn parallel FFmpegs on the same port.
+
         Args:
             rtsp_url: RTSP source URL
             timeout: Maximum time to wait for RTP packet (seconds)
@@ -50,6 +81,18 @@ class RTSPPipeline:
         Returns:
             SSRC value if found, None otherwise
         """
+        probe = self._ssrc_probes.get(rtsp_url)
+        if probe is None:
+            probe = asyncio.create_task(self._probe_ssrc(rtsp_url, timeout))
+            self._ssrc_probes[rtsp_url] = probe
+            probe.add_done_callback(lambda _: self._ssrc_probes.pop(rtsp_url, None))
+        else:
+            logger.info("Joining in-flight SSRC probe for this RTSP URL")
+        # Shield so one caller going away does not cancel the probe for the others
+        return await asyncio.shield(probe)
+
+    async def _probe_ssrc(self, rtsp_url: str, timeout: float) -> Optional[int]:
+        """Run one temporary-FFmpeg SSRC probe (see capture_ssrc_with_temp_ffmpeg)."""
         temp_port = 50000 + (abs(hash(rtsp_url)) % 10000)  # Use a high port based on URL hash
         temp_socket = None
         temp_process = None
@@ -113,6 +156,7 @@ class RTSPPipeline:
                     # Extract SSRC (big-endian, 32-bit unsigned integer at offset 8)
                     ssrc = struct.unpack('>I', data[8:12])[0]
                     logger.info(f"✅ Successfully captured SSRC: {ssrc} (0x{ssrc:08x})")
+                    self._ssrc_cache[rtsp_url] = (ssrc, time.monotonic())
 
                     # Cancel error monitor
                     error_monitor_task.cancel()
@@ -158,6 +202,75 @@ class RTSPPipeline:
                     except:
                         pass
     
+    async def capture_ssrc_cached(
+        self,
+        rtsp_url: str,
+        timeout: float = 10.0
+    ) -> Optional[int]:
+        """
+        Like capture_ssrc_with_temp_ffmpeg, but reuse a recent capture for the URL.
+
+        Only for callers that hand the SSRC to FFmpeg via start_stream(ssrc=...),
+        where any recently valid value works. Entries expire after
+        SSRC_CACHE_TTL and are dropped when the URL's stream is stopped.
+
+        Args:
+            rtsp_url: RTSP source URL
+            timeout: Maximum time to wait for RTP packet (seconds)
+
+        Returns:
+            SSRC value if found, None otherwise
+        """
+        cached = self._ssrc_cache.get(rtsp_url)
+        if cached and time.monotonic() - cached[1] < settings.ssrc_cache_ttl:
+            logger.info(f"Reusing SSRC {cached[0]} captured {time.monotonic() - cached[1]:.1f}s ago")
+            return cached[0]
+        return await self.capture_ssrc_with_temp_ffmpeg(rtsp_url, timeout=timeout)
+
+    def forget_ssrc(self, rtsp_url: str):
+        """Drop the cached SSRC for an RTSP URL."""
+        self._ssrc_cache.pop(rtsp_url, None)
+
+    def _write_pid_file(self, stream_id: str, pid: int):
+        """Record the PID of the FFmpeg spawned for stream_id."""
+        try:
+            os.makedirs(FFMPEG_PID_DIR, exist_ok=True)
+            with open(os.path.join(FFMPEG_PID_DIR, f"{stream_id}.pid"), "w") as f:
+                f.write(str(pid))
+        except OSError as e:
+            logger.warning(f"Could not write FFmpeg PID file for {stream_id}: {e}")
+
+    def _pop_pid_file(self, stream_id: str, pid: Optional[int] = None) -> Optional[int]:
+        """
+        Read and remove the FFmpeg PID file for stream_id.
+
+        Args:
+            stream_id: Stream identifier
+            pid: Only remove the file if it still records this PID (a newer
+                FFmpeg for the stream may have replaced it)
+
+        Returns:
+            The recorded PID, or None if there was no (matching) file
+        """
+        path = os.path.join(FFMPEG_PID_DIR, f"{stream_id}.pid")
+        try:
+            with open(path) as f:
+                recorded = int(f.read().strip())
+        except (OSError, ValueError):
+            return None
+        if pid is not None and recorded != pid:
+            return None
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return recorded
+
+    def is_healthy(self, stream_id: str) -> bool:
+        """True if this worker runs the stream and its FFmpeg has not exited."""
+        process = self.ffmpeg_processes.get(stream_id)
+        return stream_id in self.active_streams and process is not None and process.returncode is None
+
     async def capture_rtp_ssrc(
         self,
         listen_port: int,
@@ -264,10 +377,9 @@ class RTSPPipeline:
 
         try:
             # Create recording directory for this device
-            import os
-            from datetime import datetime
             recording_base = f"/recordings/hot/{stream_id}"
-            recording_date_path = os.path.join(recording_base, datetime.now().strftime("%Y%m%d"))
+            now = datetime.now()
+            recording_date_path = os.path.join(recording_base, now.strftime("%Y%m%d"))
             os.makedirs(recording_date_path, exist_ok=True)
 
             hls_playlist_path = os.path.join(recording_base, "stream.m3u8")
@@ -357,8 +469,10 @@ class RTSPPipeline:
             )
 
             self.ffmpeg_processes[stream_id] = process
+            self.ffmpeg_by_url.setdefault(rtsp_url, set()).add(process)
+            self._write_pid_file(stream_id, process.pid)
 
-            # Log FFmpeg errors in background
+            # Log FFmpeg errors in background, untracking the process once it exits
             async def log_ffmpeg(process):
                 while True:
                     line = await process.stderr.readline()
@@ -367,6 +481,13 @@ class RTSPPipeline:
                     line_str = line.decode().strip()
                     if line_str:  # Only log non-empty lines
                         logger.error(f"FFmpeg[{stream_id}]: {line_str}")
+                await process.wait()
+                self._pop_pid_file(stream_id, process.pid)
+                tracked = self.ffmpeg_by_url.get(rtsp_url)
+                if tracked is not None:
+                    tracked.discard(process)
+                    if not tracked:
+                        del self.ffmpeg_by_url[rtsp_url]
 
             asyncio.create_task(log_ffmpeg(process))
 
@@ -396,7 +517,7 @@ class RTSPPipeline:
                     "enabled": True,
                     "path": recording_base,
                     "playlist": hls_playlist_path,
-                    "started_at": datetime.now().isoformat()
+                    "started_at": now.isoformat()
                 }
             }
 
@@ -413,6 +534,48 @@ class RTSPPipeline:
 
         return stream_info
     
+    async def terminate_ffmpeg_for_url(self, rtsp_url: str, timeout: float = 1.5) -> int:
+        """
+        Stop the FFmpeg processes this worker spawned for an RTSP URL.
+
+        SIGTERM first (lets FFmpeg finalize its HLS output), SIGKILL for any
+        process still running after timeout.
+
+        Args:
+            rtsp_url: RTSP source URL
+            timeout: Seconds to wait for a clean exit before SIGKILL
+
+        Returns:
+            Number of processes that were still running
+        """
+        processes = [p for p in self.ffmpeg_by_url.pop(rtsp_url, ()) if p.returncode is None]
+        for stream_id, process in list(self.ffmpeg_processes.items()):
+            if process in processes:
+                del self.ffmpeg_processes[stream_id]
+        if not processes:
+            return 0
+
+        for process in processes:
+            try:
+                process.terminate()
+                logger.info(f"Terminated FFmpeg process {process.pid} for {rtsp_url}")
+            except ProcessLookupError:
+                pass
+
+        _, pending = await asyncio.wait(
+            [asyncio.ensure_future(p.wait()) for p in processes], timeout=timeout
+        )
+        if pending:
+            for process in processes:
+                if process.returncode is None:
+                    try:
+                        process.kill()
+                        logger.warning(f"Force killed FFmpeg process {process.pid} (SIGKILL)")
+                    except ProcessLookupError:
+                        pass
+            await asyncio.wait(pending, timeout=0.5)
+        return len(processes)
+
     async def stop_stream(self, stream_id: str) -> bool:
         """
         Stop RTSP stream.
@@ -431,7 +594,8 @@ class RTSPPipeline:
             logger.info(f"Stopping stream: {stream_id}")
 
         # Stop tracked FFmpeg process if running
-        if stream_id in self.ffmpeg_processes:
+        tracked = stream_id in self.ffmpeg_processes
+        if tracked:
             process = self.ffmpeg_processes[stream_id]
             try:
                 process.terminate()
@@ -443,47 +607,39 @@ class RTSPPipeline:
             finally:
                 del self.ffmpeg_processes[stream_id]
 
-        # Also kill any orphaned FFmpeg processes for this device (by matching device ID in paths)
-        # This catches processes that weren't properly tracked
-        try:
-            import os
-            result = subprocess.run(
-                ["pgrep", "-f", f"ffmpeg.*{stream_id}"],
-                capture_output=True,
-                text=True,
-                timeout=2
-            )
-            if result.returncode == 0:
-                pids = result.stdout.strip().split('\n')
-                for pid in pids:
-                    if pid:
-                        try:
-                            os.kill(int(pid), 15)  # SIGTERM
-                            logger.info(f"Killed orphaned FFmpeg process {pid} for {stream_id}")
-                        except (ProcessLookupError, ValueError):
-                            pass
-                # Give SIGTERM a moment to work
-                await asyncio.sleep(0.5)
-        except Exception as e:
-            logger.warning(f"Error killing orphaned FFmpeg processes: {e}")
+        # Fall back to the PID file when this worker holds no handle, e.g. after a
+        # backend restart - a direct kill, no pgrep regex or /proc scan
+        if not tracked:
+            pid = self._pop_pid_file(stream_id)
+            if pid is not None and _is_ffmpeg_for(pid, stream_id):
+                try:
+                    os.kill(pid, signal.SIGTERM)
+                    logger.info(f"Killed orphaned FFmpeg process {pid} for {stream_id}")
+                    # Give SIGTERM a moment to work
+                    await asyncio.sleep(0.5)
+                except ProcessLookupError:
+                    pass
 
         # Remove from active streams if it was tracked
         if was_active:
-            del self.active_streams[stream_id]
+            stream_info = self.active_streams.pop(stream_id)
+            self.forget_ssrc(stream_info["rtsp_url"])
+
+        # Drop the cross-worker entry as well (left alone if another worker
+        # has registered the room since)
+        await active_stream_registry.remove(stream_id)
 
         # Cleanup MediaSoup producers and transports (close them to prevent accumulation)
         try:
-            from app.services.mediasoup_client import mediasoup_client
-
             # Get all producers for this room and close them
             try:
                 producers = await mediasoup_client.get_producers(stream_id)
+                failures = await mediasoup_client.close_producers(producers)
                 for producer_id in producers:
-                    try:
-                        await mediasoup_client.close_producer(producer_id)
+                    if producer_id in failures:
+                        logger.warning(f"Error closing producer {producer_id}: {failures[producer_id]}")
+                    else:
                         logger.info(f"Closed producer {producer_id} for stream {stream_id}")
-                    except Exception as e:
-                        logger.warning(f"Error closing producer {producer_id}: {e}")
             except Exception as e:
                 logger.warning(f"Could not get producers for cleanup: {e}")
 
@@ -594,7 +750,6 @@ class RTSPPipeline:
 
     async def _start_cleanup_service(self):
         """Background task to clean up old recordings."""
-        import time
         await asyncio.sleep(60)  # Wait 1 minute before first cleanup
 
         logger.info("Recording cleanup service started")
@@ -615,10 +770,6 @@ class RTSPPipeline:
 
     async def _cleanup_old_recordings(self):
         """Delete recordings older than retention period."""
-        import os
-        import shutil
-        from datetime import datetime, timedelta
-
         recording_base = "/recordings/hot"
         if not os.path.exists(recording_base):
             return
@@ -678,8 +829,6 @@ class RTSPPipeline:
 
     async def _check_disk_space(self):
         """Monitor disk space and trigger emergency cleanup if needed."""
-        import shutil
-
         recording_base = "/recordings/hot"
         if not os.path.exists(recording_base):
             return
@@ -709,10 +858,6 @@ class RTSPPipeline:
 
     async def _emergency_cleanup(self, target_percent: float = 80):
         """Emergency cleanup when disk is critically full."""
-        import os
-        import shutil
-        from datetime import datetime
-
         recording_base = "/recordings/hot"
         if not os.path.exists(recording_base):
             return
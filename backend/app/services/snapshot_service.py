@@ -7,8 +7,9 @@ import os
 import asyncio
 import subprocess
 from datetime import datetime
-from typing import Optional, List
+from typing import Dict, Optional, List
 from pathlib import Path
+from fastapi.responses import FileResponse, Response
 from loguru import logger
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, delete
@@ -16,6 +17,7 @@ from sqlalchemy.orm import selectinload
 from app.models.snapshot import Snapshot
 from app.models.stream import Stream
 from app.models.device import Device
+from config.settings import settings
 
 
 class SnapshotService:
@@ -107,7 +109,6 @@ class SnapshotService:
 
             db.add(snapshot)
             await db.commit()
-            await db.refresh(snapshot)
 
             return snapshot
 
@@ -229,7 +230,6 @@ class SnapshotService:
 
             db.add(snapshot)
             await db.commit()
-            await db.refresh(snapshot)
 
             return snapshot
 
@@ -243,7 +243,8 @@ class SnapshotService:
         self,
         db: AsyncSession,
         stream_id: Optional[str] = None,
-        limit: int = 100
+        limit: int = 100,
+        eager: bool = False
     ) -> List[Snapshot]:
         """
         List snapshots, optionally filtered by stream.
@@ -252,11 +253,15 @@ class SnapshotService:
             db: Database session
             stream_id: Optional stream ID filter
             limit: Maximum number of snapshots to return
+            eager: Load each snapshot's stream name up front (one extra query
+                for the whole page instead of a lazy load per snapshot)
 
         Returns:
             List of Snapshot objects
         """
         query = select(Snapshot)
+        if eager:
+            query = query.options(selectinload(Snapshot.stream).load_only(Stream.name))
 
         if stream_id:
             query = query.filter(Snapshot.stream_id == stream_id)
@@ -266,18 +271,26 @@ class SnapshotService:
         snapshots = result.scalars().all()
         return list(snapshots)
 
-    async def get_snapshot(self, db: AsyncSession, snapshot_id: str) -> Optional[Snapshot]:
+    async def get_snapshot(
+        self,
+        db: AsyncSession,
+        snapshot_id: str,
+        eager: bool = False
+    ) -> Optional[Snapshot]:
         """
         Get a specific snapshot by ID.
 
         Args:
             db: Database session
             snapshot_id: Snapshot UUID
+            eager: Load the snapshot's stream name up front
 
         Returns:
             Snapshot object or None
         """
         query = select(Snapshot).filter(Snapshot.id == snapshot_id)
+        if eager:
+            query = query.options(selectinload(Snapshot.stream).load_only(Stream.name))
         result = await db.execute(query)
         return result.scalars().first()
 
@@ -311,6 +324,48 @@ class SnapshotService:
 
         return True
 
+    def image_response(
+        self,
+        file_path: Optional[str],
+        media_type: str,
+        headers: Optional[Dict[str, str]] = None,
+        filename: Optional[str] = None
+    ) -> Optional[Response]:
+        """
+        Build the HTTP response that serves a snapshot image.
+
+        With SNAPSHOT_ACCEL_REDIRECT set, returns an empty response carrying an
+        X-Accel-Redirect header so nginx sendfile()s the image itself; nginx
+        answers 404 if the file is gone. Otherwise the file is served directly,
+        reusing the stat result from the existence check.
+
+        Args:
+            file_path: Image path on disk
+            media_type: Content type of the image
+            headers: Extra response headers
+            filename: Download filename (sets Content-Disposition)
+
+        Returns:
+            Response, or None if the file does not exist (direct serving only)
+        """
+        if not file_path:
+            return None
+
+        headers = dict(headers or {})
+        if filename:
+            headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+
+        relative_path = os.path.relpath(file_path, self.snapshot_base_dir)
+        if settings.snapshot_accel_redirect and not relative_path.startswith(".."):
+            headers["X-Accel-Redirect"] = settings.snapshot_accel_redirect.rstrip("/") + "/" + relative_path
+            return Response(media_type=media_type, headers=headers)
+
+        try:
+            stat_result = os.stat(file_path)
+        except FileNotFoundError:
+            return None
+        return FileResponse(file_path, media_type=media_type, headers=headers, stat_result=stat_result)
+
 
 # Global instance
 snapshot_service = SnapshotService()
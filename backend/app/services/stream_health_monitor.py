@@ -340,6 +340,7 @@ class StreamHealthMonitor:
         try:
             from database import AsyncSessionLocal
             from app.models import Device
+            from app.services.device_cache import device_cache
             from app.models.stream import Stream, StreamState
             from sqlalchemy import select
             from uuid import UUID
@@ -365,6 +366,7 @@ class StreamHealthMonitor:
                             logger.info(f"Updated stream {v2_stream.id} state to ERROR")
 
                     await db.commit()
+                    await device_cache.invalidate(room_id)
                 else:
                     logger.warning(f"Device not found for room_id={room_id}")
 
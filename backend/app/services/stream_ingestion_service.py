@@ -21,6 +21,7 @@ from sqlalchemy import select
 from app.models.stream import Stream, StreamState
 from app.models.producer import Producer, ProducerState
 from app.models.device import Device
+from app.services.device_cache import device_cache
 from app.services.stream_state_machine import transition, stream_state_machine
 from app.services.rtsp_pipeline import (
     capture_ssrc_with_temp_ffmpeg,
@@ -102,6 +103,7 @@ class StreamIngestionService:
             db=db
         )
         await db.commit()
+        await device_cache.invalidate(stream.camera_id)
 
         try:
             # 3. Capture SSRC (BLACK BOX - using existing function)
@@ -157,6 +159,7 @@ class StreamIngestionService:
             stream.started_at = datetime.now(timezone.utc)
 
             await db.commit()
+            await device_cache.invalidate(stream.camera_id)
 
             logger.info(f"Stream {stream_id} transitioned to READY")
 
@@ -181,6 +184,7 @@ class StreamIngestionService:
                 db=db
             )
             await db.commit()
+            await device_cache.invalidate(stream.camera_id)
 
             # Cleanup
             if stream_id_str in self.active_processes:
@@ -236,6 +240,7 @@ class StreamIngestionService:
 
             stream.stopped_at = datetime.now(timezone.utc)
             await db.commit()
+            await device_cache.invalidate(stream.camera_id)
 
             # Clean up tracking
             if stream_id_str in self.active_processes:
@@ -27,7 +27,7 @@ async def restart_stream_handler(room_id: str) -> bool:
     from database import AsyncSessionLocal
     from app.models import Device
     from sqlalchemy import select
-    import os
+    from config.settings import settings
 
     logger.info(f"Stream restart requested for room: {room_id}")
 
@@ -66,7 +66,7 @@ async def restart_stream_handler(room_id: str) -> bool:
         # 3. Create MediaSoup transport on same port
         # 4. Connect transport and create producer with SSRC
 
-        mediasoup_host = os.getenv("MEDIASOUP_HOST", "127.0.0.1")
+        mediasoup_host = settings.mediasoup_host
 
         # Step 3: Get deterministic port for this room
         video_port = await mediasoup_client.get_port_for_room(room_id)
@@ -194,6 +194,7 @@ async def _update_stream_records(
     from database import AsyncSessionLocal
     from app.models.stream import Stream, StreamState
     from app.models.producer import Producer, ProducerState
+    from app.services.device_cache import device_cache
     from sqlalchemy import select
     from datetime import datetime, timezone
     from uuid import UUID
@@ -246,6 +247,7 @@ async def _update_stream_records(
                 db.add(new_producer)
 
                 await db.commit()
+                await device_cache.invalidate(room_id)
                 logger.info(f"Updated stream records after restart: room={room_id}")
 
     except Exception as e:
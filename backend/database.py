@@ -1,19 +1,39 @@
 """
 Database connection and session management.
 """
+import functools
+from typing import Any, Awaitable, Callable, TypeVar
+
+from loguru import logger
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from config.settings import settings
 
 
 # Database engine
+# Sized for start/stop storms where each request holds a connection across
+# several awaits. AsyncAdaptedQueuePool (not QueuePool) is required for asyncpg.
+# Pre-ping stays on so every DB path survives a Postgres restart/failover;
+# retry_on_disconnect additionally covers read-only routes if it is disabled.
+# Queries here are short OLTP lookups: prepared statements are cached per
+# connection, and Postgres JIT (pure compile overhead at this size) is off.
 engine = create_async_engine(
     settings.database_url.replace("postgresql://", "postgresql+asyncpg://"),
     echo=settings.log_level == "DEBUG",
     future=True,
-    pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20,
+    poolclass=AsyncAdaptedQueuePool,
+    pool_pre_ping=settings.db_pool_pre_ping,
+    pool_reset_on_return="rollback",
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
+    pool_recycle=settings.db_pool_recycle,
+    connect_args={
+        "prepared_statement_cache_size": settings.db_statement_cache_size,
+        "server_settings": {"jit": "on" if settings.db_jit else "off"},
+    },
 )
 
 # Session factory
@@ -25,16 +45,51 @@ AsyncSessionLocal = async_sessionmaker(
     autoflush=False,
 )
 
+class _EagerDefaults:
+    # Fetch server-generated columns (created_at on INSERT, updated_at on
+    # UPDATE) with RETURNING during flush. Together with expire_on_commit=False
+    # this leaves rows fully loaded after commit, so no refresh() is needed.
+    __mapper_args__ = {"eager_defaults": True}
+
+
 # Base class for models
-Base = declarative_base()
+Base = declarative_base(cls=_EagerDefaults)
 
 
 async def get_db() -> AsyncSession:
-    """Dependency for getting database session."""
+    """
+    Dependency for getting database session.
+
+    Routes commit explicitly. The session is closed exactly once when the
+    request finishes, which rolls back anything left uncommitted (including
+    after an exception); rows stay usable since expire_on_commit is off.
+    """
     async with AsyncSessionLocal() as session:
-        try:
-            yield session
-        finally:
-            await session.close()
+        yield session
+
+
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
 
+def retry_on_disconnect(max_retries: int = 1) -> Callable[[F], F]:
+    """
+    Re-run a read-only route handler when its pooled connection was dead.
 
+    The handler must take its session as the ``db`` keyword argument. Only
+    use this on handlers that are safe to repeat.
+    """
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            for attempt in range(max_retries + 1):
+                try:
+                    return await func(*args, **kwargs)
+                except DBAPIError as e:
+                    if not e.connection_invalidated or attempt == max_retries:
+                        raise
+                    logger.warning(f"Database connection lost in {func.__name__}, retrying: {e}")
+                    db = kwargs.get("db")
+                    if db is not None:
+                        await db.rollback()
+        return wrapper
+    return decorator
@@ -1,17 +1,19 @@
 """
 Main FastAPI application entry point.
 """
-from fastapi import FastAPI, Request, status, WebSocket, WebSocketDisconnect
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, HTTPException, Request, status, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 from datetime import datetime
 from sqlalchemy import text
 import sys
 import os
 import asyncio
+import anyio.to_thread
 import websockets
 
 # Add current directory to path for imports
@@ -21,6 +23,7 @@ from config.logging_config import setup_logging
 from database import engine, Base
 from loguru import logger
 from app.middleware.auth import api_key_middleware
+from app.middleware.compression import TextGZipMiddleware
 
 # Initialize logging
 logger = setup_logging()
@@ -30,6 +33,11 @@ logger = setup_logging()
 # In production, use environment variables
 DEFAULT_CLIENT_ID = os.getenv("VAS_DEFAULT_CLIENT_ID", "vas-portal")
 DEFAULT_CLIENT_SECRET = os.getenv("VAS_DEFAULT_CLIENT_SECRET", "vas-portal-secret-2024")
+# MediaSoup server the /ws/mediasoup proxy connects to
+MEDIASOUP_URL = os.getenv("MEDIASOUP_URL", "ws://10.30.250.245:3001")
+# Worker threads for blocking calls (asyncio.to_thread, sync deps, file responses)
+THREAD_POOL_SIZE = int(os.getenv("VAS_THREAD_POOL_SIZE", min(32, (os.cpu_count() or 1) * 2)))
+
 DEFAULT_SCOPES = [
     "streams:read",
     "streams:consume",
@@ -44,34 +52,41 @@ async def seed_default_client():
     """Create or update default API client."""
     from database import AsyncSessionLocal
     from app.models.auth import JWTToken
+    from app.services.auth_service import auth_service
     from sqlalchemy import select
-    import hashlib
+    from sqlalchemy.dialects.postgresql import insert
 
     async with AsyncSessionLocal() as db:
         try:
-            # Check if default client exists
-            result = await db.execute(
-                select(JWTToken).filter(JWTToken.client_id == DEFAULT_CLIENT_ID)
-            )
-            existing = result.scalars().first()
-            secret_hash = hashlib.sha256(DEFAULT_CLIENT_SECRET.encode()).hexdigest()
+            secret_hash = auth_service._hash_secret(DEFAULT_CLIENT_SECRET)
 
-            if not existing:
-                # Create the default client with known credentials
-                jwt_token = JWTToken(
+            # Create the default client with known credentials; a no-op if it
+            # exists (also when several workers start at once)
+            result = await db.execute(
+                insert(JWTToken)
+                .values(
                     client_id=DEFAULT_CLIENT_ID,
                     client_secret_hash=secret_hash,
                     scopes=DEFAULT_SCOPES,
                     is_active=True
                 )
-
-                db.add(jwt_token)
+                .on_conflict_do_nothing(index_elements=[JWTToken.client_id])
+                .returning(JWTToken.id)
+            )
+            if result.scalar_one_or_none() is not None:
                 await db.commit()
 
                 logger.info(f"✅ Created default API client: {DEFAULT_CLIENT_ID}")
                 logger.info(f"   Client ID: {DEFAULT_CLIENT_ID}")
                 logger.info(f"   Client Secret: {DEFAULT_CLIENT_SECRET}")
-            elif existing.client_secret_hash != secret_hash:
+                return
+
+            result = await db.execute(
+                select(JWTToken).filter(JWTToken.client_id == DEFAULT_CLIENT_ID)
+            )
+            existing = result.scalars().first()
+
+            if existing.client_secret_hash != secret_hash:
                 # Update the secret to match the expected value
                 existing.client_secret_hash = secret_hash
                 existing.scopes = DEFAULT_SCOPES
@@ -94,6 +109,13 @@ async def lifespan(app: FastAPI):
     """Lifespan events for application startup and shutdown."""
     logger.info("Starting VAS Backend Application...")
 
+    # Pin thread pool sizes so blocking calls can't balloon worker threads
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=THREAD_POOL_SIZE)
+    )
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREAD_POOL_SIZE
+    logger.info(f"Thread pool size: {THREAD_POOL_SIZE}")
+
     # Create database tables
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
@@ -114,6 +136,11 @@ async def lifespan(app: FastAPI):
     await stream_health_monitor.start()
     logger.info("Stream health monitor started")
 
+    # Keep this process's registry entries alive and mirror the registry
+    # locally (status polls then answer without a Redis round-trip)
+    from app.services.active_stream_registry import active_stream_registry
+    await active_stream_registry.start()
+
     logger.info("VAS Backend Application started successfully")
 
     yield
@@ -124,6 +151,8 @@ async def lifespan(app: FastAPI):
     await stream_health_monitor.stop()
     logger.info("Stream health monitor stopped")
 
+    await active_stream_registry.stop()
+
     await engine.dispose()
 
 # Create FastAPI app
@@ -132,6 +161,8 @@ app = FastAPI(
     description="MediaSoup-based video streaming service for RTSP to WebRTC conversion",
     version="1.0.0",
     lifespan=lifespan,
+    # orjson for every JSON response (routers may still override)
+    default_response_class=ORJSONResponse,
 )
 
 # CORS middleware - configured for frontend at port 3200
@@ -147,6 +178,9 @@ app.add_middleware(
     max_age=600,  # Cache preflight response for 10 minutes
 )
 
+# Compress JSON/text responses (bookmark/snapshot listings run to hundreds of KB)
+app.add_middleware(TextGZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # API Key authentication middleware
 app.middleware("http")(api_key_middleware)
 
@@ -250,6 +284,22 @@ async def health_check_detailed():
     }
 
 
+@app.get("/health/db-pool")
+async def db_pool_status():
+    """Get database connection pool usage."""
+    from database import engine
+
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "status": pool.status(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+
 @app.get("/health/streams")
 async def stream_health_status():
     """Get detailed stream health status."""
@@ -307,7 +357,6 @@ from fastapi.responses import FileResponse
 @app.get("/streams/{stream_id}/playlist.m3u8")
 async def serve_hls_playlist(stream_id: str, request: Request):
     """Serve HLS playlist."""
-    from fastapi import HTTPException
     playlist_path = f"/tmp/streams/{stream_id}/stream.m3u8"
     
     if not os.path.exists(playlist_path):
@@ -329,7 +378,6 @@ async def serve_hls_playlist(stream_id: str, request: Request):
 @app.get("/streams/{stream_id}/{segment_name}")
 async def serve_hls_segment(stream_id: str, segment_name: str, request: Request):
     """Serve HLS segment."""
-    from fastapi import HTTPException
     segment_path = f"/tmp/streams/{stream_id}/{segment_name}"
     
     if not os.path.exists(segment_path):
@@ -358,7 +406,7 @@ async def mediasoup_websocket_proxy(websocket: WebSocket):
     await websocket.accept()
     logger.info(f"WebSocket proxy: Client connected from {websocket.client.host}")
     
-    mediasoup_url = os.getenv("MEDIASOUP_URL", "ws://10.30.250.245:3001")
+    mediasoup_url = MEDIASOUP_URL
     mediasoup_ws = None
     
     try:
@@ -409,5 +457,5 @@ async def mediasoup_websocket_proxy(websocket: WebSocket):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8080)
+    uvicorn.run(app, host="0.0.0.0", port=8080, loop="uvloop", http="httptools")
 
@@ -0,0 +1,134 @@
+"""
+Unit Tests for the Active Stream Registry
+=========================================
+
+Redis is optional: the registry must degrade to a no-op when it is down.
+Entries expire unless the process that registered them keeps renewing them.
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from app.services.active_stream_registry import ActiveStreamRegistry
+
+
+class TestActiveStreamRegistry:
+    """Test suite for ActiveStreamRegistry without a reachable Redis"""
+
+    @pytest.fixture
+    def registry(self):
+        """Registry pointed at a port nothing listens on"""
+        return ActiveStreamRegistry("redis://127.0.0.1:1", ttl_seconds=60)
+
+    async def test_lookups_fall_back_when_redis_unreachable(self, registry):
+        """Lookups report 'not active' instead of raising"""
+        assert await registry.is_active("room-1") is False
+        assert await registry.get("room-1") is None
+
+    async def test_writes_are_noops_when_redis_unreachable(self, registry):
+        """add/remove swallow connection errors"""
+        await registry.add("room-1", {"transport_id": "t1", "ssrc": 1234})
+        await registry.remove("room-1")
+
+    async def test_failure_backs_off(self, registry):
+        """After a failure, Redis is skipped until retry_after elapses"""
+        assert registry._available()
+        await registry.is_active("room-1")
+        assert not registry._available()
+
+    async def test_mirror_answers_without_redis(self, registry):
+        """While the subscriber's mirror is in sync, lookups stay local"""
+        registry._mirror = {"room-1": {"transport_id": "t1", "ssrc": 1234}}
+        assert await registry.is_active("room-1") is True
+        assert await registry.is_active("room-2") is False
+        assert await registry.get("room-1") == {"transport_id": "t1", "ssrc": 1234}
+        assert registry._available()
+
+    async def test_subscriber_without_redis_leaves_mirror_unset(self, registry):
+        """A subscriber that cannot connect falls back to direct lookups"""
+        await registry.start()
+        await asyncio.sleep(0.1)
+        assert registry._mirror is None
+        await registry.stop()
+        assert registry._subscriber is None
+
+
+class FakePipeline:
+    """Records queued commands; execute() returns canned results"""
+
+    def __init__(self, results=()):
+        self.results = list(results)
+        self.calls = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append((name, args))
+
+    async def execute(self):
+        return self.results
+
+
+class TestRegistryExpiry:
+    """Test suite for entry renewal and expired entries"""
+
+    @pytest.fixture
+    def registry(self):
+        registry = ActiveStreamRegistry("redis://127.0.0.1:1", ttl_seconds=30, owner_id="host:1")
+        registry._redis = Mock()
+        registry._redis.srem = AsyncMock()
+        return registry
+
+    async def test_add_records_owner(self, registry):
+        """Entries carry the registering process and an expiry"""
+        pipe = FakePipeline()
+        registry._redis.pipeline = Mock(return_value=pipe)
+
+        await registry.add("room-1", {"transport_id": "t1", "ssrc": 1234})
+
+        assert ("hset", ("vas:stream:room-1",)) in pipe.calls
+        assert ("expire", ("vas:stream:room-1", 30)) in pipe.calls
+        assert registry._owned == {"room-1"}
+
+    async def test_renewal_extends_owned_entries(self, registry):
+        """Only entries this process registered are renewed"""
+        registry._owned = {"room-1"}
+        pipe = FakePipeline()
+        registry._redis.pipeline = Mock(return_value=pipe)
+
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(registry._renew(), timeout=0.05)
+
+        assert pipe.calls == [("expire", ("vas:stream:room-1", 30))]
+
+    async def test_expired_entry_is_dropped(self, registry):
+        """A member whose hash expired is removed from the set"""
+        registry._redis.hgetall = AsyncMock(return_value={})
+        assert await registry.get("room-1") is None
+        registry._redis.srem.assert_awaited_once_with(registry.ACTIVE_SET_KEY, "room-1")
+
+    async def test_mirror_seed_skips_expired_entries(self, registry):
+        """Members whose hash expired are left out and removed from the set"""
+        registry._redis.smembers = AsyncMock(return_value=["room-1", "room-2"])
+        registry._redis.pipeline = Mock(return_value=FakePipeline([{}, {"ssrc": "1234", "owner": "host:2"}]))
+
+        assert await registry._load_all() == {"room-2": {"ssrc": 1234, "owner": "host:2"}}
+        registry._redis.srem.assert_awaited_once_with(registry.ACTIVE_SET_KEY, "room-1")
+
+    async def test_remove_only_drops_own_entry(self, registry):
+        """Removal is an owner-checked delete, so another process's entry survives"""
+        registry._owned = {"room-1"}
+        registry._remove_owned = AsyncMock(return_value=0)
+
+        await registry.remove("room-1")
+
+        kwargs = registry._remove_owned.await_args.kwargs
+        assert kwargs["keys"][0] == "vas:stream:room-1"
+        assert kwargs["args"][:2] == ["host:1", "room-1"]
+        assert registry._owned == set()
@@ -0,0 +1,138 @@
+"""
+Unit Tests for Bookmark Media Responses
+=======================================
+
+Bookmark media is revalidated by an ETag taken from the file's mtime and
+size; the file is checked before any 304 is returned. Bookmarks belong to
+a stream, so the V1 routes reach the device through it.
+"""
+
+import json
+import os
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, Mock
+from uuid import uuid4
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects import postgresql
+
+from app.models.bookmark import Bookmark
+from app.routes import bookmarks
+from app.routes.bookmarks import _bookmarks_q, _media_response, _stream_json_page
+from database import get_db
+
+
+@pytest.fixture
+def clip(tmp_path):
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(b"mp4")
+    return path
+
+
+@pytest.fixture
+def client(clip):
+    """App serving the clip file through _media_response"""
+    app = FastAPI()
+
+    @app.get("/video")
+    async def video(request: Request):
+        return await _media_response(str(clip), request, "Video file not found", media_type="video/mp4")
+
+    return TestClient(app)
+
+
+class TestMediaResponse:
+    """Test suite for bookmark media ETag handling"""
+
+    def test_matching_etag_gets_304(self, client):
+        etag = client.get("/video").headers["etag"]
+        assert client.get("/video", headers={"If-None-Match": etag}).status_code == 304
+
+    def test_rewritten_file_gets_new_etag(self, client, clip):
+        """A regenerated file is served again instead of a 304"""
+        etag = client.get("/video").headers["etag"]
+        clip.write_bytes(b"new mp4 data")
+        response = client.get("/video", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.content == b"new mp4 data"
+
+    def test_deleted_file_is_404_despite_matching_etag(self, client, clip):
+        etag = client.get("/video").headers["etag"]
+        os.remove(clip)
+        assert client.get("/video", headers={"If-None-Match": etag}).status_code == 404
+
+
+class TestV1BookmarkRoutes:
+    """Test suite for the V1 bookmark routes' stream-based device lookup"""
+
+    def test_bookmarks_join_device_through_stream(self):
+        sql = str(_bookmarks_q().compile(dialect=postgresql.dialect()))
+        assert "JOIN streams ON streams.id = bookmarks.stream_id" in sql
+        assert "LEFT OUTER JOIN devices ON devices.id = streams.camera_id" in sql
+
+    @staticmethod
+    def _bookmark():
+        now = datetime.now(timezone.utc)
+        return Bookmark(
+            id=uuid4(), stream_id=uuid4(), center_timestamp=now, start_timestamp=now,
+            end_timestamp=now, video_file_path="/b/clip.mp4", source="live", duration=6,
+            video_format="mp4"
+        )
+
+    def test_get_bookmark_reports_stream_device(self):
+        """The device comes from the bookmark's stream; ids stay UUIDs until serialized"""
+        bookmark = self._bookmark()
+        device_id = uuid4()
+        db = AsyncMock()
+        db.execute.return_value = Mock(first=Mock(return_value=(bookmark, device_id, "Gate")))
+
+        app = FastAPI()
+        app.include_router(bookmarks.router)
+        app.dependency_overrides[get_db] = lambda: db
+        response = TestClient(app).get(f"/api/v1/bookmarks/{bookmark.id}")
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["id"] == str(bookmark.id)
+        assert body["device_id"] == str(device_id)
+        assert body["device_name"] == "Gate"
+        assert body["video_url"] == f"/api/v1/bookmarks/{bookmark.id}/video"
+
+    def test_malformed_bookmark_id_is_422(self):
+        app = FastAPI()
+        app.include_router(bookmarks.router)
+        app.dependency_overrides[get_db] = lambda: AsyncMock()
+        assert TestClient(app).get("/api/v1/bookmarks/not-a-uuid").status_code == 422
+
+    async def test_listing_streams_cursor_batches(self):
+        """Each cursor batch is written as it arrives; the session is closed at the end"""
+        device_id = uuid4()
+        batches = [[(self._bookmark(), device_id, "Gate")] * 2, [(self._bookmark(), None, None)]]
+
+        async def partitions():
+            for batch in batches:
+                yield batch
+
+        result = Mock(partitions=partitions)
+        session = AsyncMock()
+        head = {"total": 3, "page": 1, "page_size": 100}
+
+        chunks = [chunk async for chunk in _stream_json_page(session, result, head)]
+
+        assert len(chunks) == 4  # head, two batches, closing bracket
+        body = json.loads(b"".join(chunks))
+        assert body["total"] == 3
+        assert [b["device_name"] for b in body["bookmarks"]] == ["Gate", "Gate", "Unknown"]
+        assert body["bookmarks"][0]["device_id"] == str(device_id)
+        session.close.assert_awaited_once()
+
+    async def test_empty_listing_is_valid_json(self):
+        async def partitions():
+            return
+            yield
+
+        session = AsyncMock()
+        chunks = [c async for c in _stream_json_page(session, Mock(partitions=partitions), {"total": 0})]
+        assert json.loads(b"".join(chunks)) == {"total": 0, "bookmarks": []}
@@ -0,0 +1,257 @@
+"""
+Unit Tests for Bookmark Clip Encoding
+=====================================
+
+Clips are encoded with NVENC when a GPU encoder is usable and with
+libx264 otherwise; the choice is probed once per process. Historical clips
+cut on a keyframe are stream-copied instead. The thumbnail is a second
+output of the same FFmpeg run. Filesystem work runs in worker threads.
+"""
+
+from unittest.mock import AsyncMock, Mock, patch
+from uuid import uuid4
+
+import pytest
+
+from app.services.bookmark_service import BookmarkService
+
+
+class TestVideoEncoder:
+    """Test suite for BookmarkService.video_encoder"""
+
+    @pytest.fixture
+    def service(self, monkeypatch):
+        """Fresh service with encoder auto-detection"""
+        monkeypatch.setattr("app.services.bookmark_service.settings.bookmark_video_encoder", "auto")
+        return BookmarkService()
+
+    async def test_auto_uses_nvenc_when_probe_succeeds(self, service):
+        """A working NVENC is picked, and the probe runs only once"""
+        with patch.object(service, "_nvenc_available", AsyncMock(return_value=True)) as probe:
+            assert await service.video_encoder() == "h264_nvenc"
+            assert await service.video_encoder() == "h264_nvenc"
+        probe.assert_awaited_once()
+
+    async def test_auto_falls_back_to_libx264(self, service):
+        """Without a usable GPU encoder clips use libx264"""
+        with patch.object(service, "_nvenc_available", AsyncMock(return_value=False)):
+            assert await service.video_encoder() == "libx264"
+
+    async def test_explicit_encoder_skips_probe(self, service, monkeypatch):
+        """BOOKMARK_VIDEO_ENCODER pins the encoder"""
+        monkeypatch.setattr("app.services.bookmark_service.settings.bookmark_video_encoder", "libx264")
+        with patch.object(service, "_nvenc_available", AsyncMock()) as probe:
+            assert await service.video_encoder() == "libx264"
+        probe.assert_not_called()
+
+    async def test_probe_without_ffmpeg_reports_unavailable(self, service):
+        """A missing ffmpeg binary is not an error"""
+        with patch("asyncio.create_subprocess_exec", AsyncMock(side_effect=FileNotFoundError)):
+            assert await service._nvenc_available() is False
+
+
+class TestHistoricalClipCommand:
+    """Test suite for BookmarkService.historical_clip_command"""
+
+    @pytest.fixture
+    def service(self, monkeypatch):
+        """Service pinned to libx264 for the re-encode fallback"""
+        monkeypatch.setattr("app.services.bookmark_service.settings.bookmark_video_encoder", "libx264")
+        return BookmarkService()
+
+    async def _command(self, service, keyframe_near: bool, audio: bool = True):
+        with patch.object(service, "_keyframe_near", AsyncMock(return_value=keyframe_near)):
+            return await service.historical_clip_command(
+                "/tmp/concat.txt", "/rec/segment-1.ts", 4, 6, "/bookmarks/out.mp4", audio=audio
+            )
+
+    async def test_keyframe_cut_is_stream_copied(self, service):
+        """A cut on a keyframe remuxes without re-encoding, seeking on the input"""
+        cmd = await self._command(service, keyframe_near=True)
+        assert cmd[cmd.index("-c:v") + 1] == "copy"
+        assert cmd[cmd.index("-c:a") + 1] == "copy"
+        assert cmd.index("-ss") < cmd.index("-i")
+
+    async def test_mid_gop_cut_is_re_encoded(self, service):
+        """Otherwise the clip is re-encoded for a frame-accurate start"""
+        cmd = await self._command(service, keyframe_near=False, audio=False)
+        assert cmd[cmd.index("-c:v") + 1] == "libx264"
+        assert "-an" in cmd
+
+    async def test_keyframe_probe_parses_packet_flags(self, service):
+        """Keyframe times are taken relative to the segment's first packet"""
+        process = AsyncMock(returncode=0)
+        process.communicate.return_value = (b"10.000000,K__\n10.040000,___\n14.000000,K__\n", b"")
+        with patch("asyncio.create_subprocess_exec", AsyncMock(return_value=process)) as spawn:
+            assert await service._keyframe_near("/rec/segment-1.ts", 4) is True
+            assert await service._keyframe_near("/rec/segment-1.ts", 2) is False
+            # Only a keyframe at or just before the cut counts, never one after it
+            assert await service._keyframe_near("/rec/segment-1.ts", 4.1) is True
+            assert await service._keyframe_near("/rec/segment-1.ts", 3.9) is False
+        # The segment is probed once; the second cut reuses its keyframes
+        assert spawn.await_count == 1
+
+    async def test_failed_keyframe_probe_is_not_cached(self, service):
+        """A probe that fails falls back to re-encoding and is retried next time"""
+        process = AsyncMock(returncode=1)
+        process.communicate.return_value = (b"", b"")
+        with patch("asyncio.create_subprocess_exec", AsyncMock(return_value=process)) as spawn:
+            assert await service._keyframe_near("/rec/segment-1.ts", 0) is False
+            assert await service._keyframe_near("/rec/segment-1.ts", 0) is False
+        assert spawn.await_count == 2
+
+    async def test_thumbnail_is_a_second_output(self, service):
+        """The thumbnail follows the clip output in one command"""
+        with patch.object(service, "_keyframe_near", AsyncMock(return_value=True)):
+            cmd = await service.historical_clip_command(
+                "/tmp/concat.txt", "/rec/segment-1.ts", 4, 6, "/bookmarks/out.mp4",
+                thumbnail_path="/bookmarks/out_thumb.jpg"
+            )
+        assert cmd.index("/bookmarks/out.mp4") < cmd.index("/bookmarks/out_thumb.jpg") == len(cmd) - 1
+        assert cmd.count("-i") == 1
+
+    def test_gpu_frames_are_downloaded_for_the_thumbnail(self, service):
+        """CUDA-decoded frames need hwdownload before the JPEG encoder"""
+        assert "hwdownload,format=nv12" in service.thumbnail_output_args("t.jpg", hw_frames=True)
+        assert "-vf" not in service.thumbnail_output_args("t.jpg")
+
+
+class TestFFmpegSlots:
+    """Test suite for the bookmark FFmpeg concurrency limits"""
+
+    def test_nvenc_and_cpu_runs_use_separate_limits(self, monkeypatch):
+        """NVENC commands queue on the session limit, the rest on the CPU limit"""
+        monkeypatch.setattr("app.services.bookmark_service.settings.bookmark_ffmpeg_concurrency", 3)
+        monkeypatch.setattr("app.services.bookmark_service.settings.bookmark_nvenc_sessions", 2)
+        service = BookmarkService()
+
+        nvenc = service.ffmpeg_slot(["ffmpeg", *service.ENCODER_ARGS["h264_nvenc"]])
+        cpu = service.ffmpeg_slot(["ffmpeg", *service.ENCODER_ARGS["libx264"]])
+        copy = service.ffmpeg_slot(["ffmpeg", "-c", "copy"])
+
+        assert nvenc is not cpu
+        assert copy is cpu
+        assert nvenc._value == 2
+        assert cpu._value == 3
+
+
+class TestPlaylistCache:
+    """Test suite for the parsed HLS playlist cache"""
+
+    PLAYLIST = (
+        "#EXTM3U\n"
+        "#EXT-X-TARGETDURATION:2\n"
+        "#EXTINF:2.000000,\n"
+        "segment-1767225600.ts\n"
+        "#EXTINF:2.000000,\n"
+        "segment-1767225602.ts\n"
+    )
+
+    @pytest.fixture
+    def playlist(self, tmp_path):
+        """A two-segment recording playlist on disk"""
+        path = tmp_path / "stream.m3u8"
+        path.write_text(self.PLAYLIST)
+        return path
+
+    async def test_unchanged_playlist_is_parsed_once(self, playlist):
+        """Repeat captures reuse the parsed segments"""
+        service = BookmarkService()
+        with patch.object(service, "_parse_playlist", wraps=service._parse_playlist) as parse:
+            first, timestamps = await service._playlist_segments(str(playlist))
+            second, _ = await service._playlist_segments(str(playlist))
+        assert parse.call_count == 1
+        assert second is first
+        assert timestamps == [seg_ts for _, _, seg_ts in first] == [1767225600, 1767225602]
+
+    async def test_appended_playlist_is_reparsed(self, playlist):
+        """A new segment (size/mtime change) invalidates the cached parse"""
+        service = BookmarkService()
+        await service._playlist_segments(str(playlist))
+        with open(playlist, "a") as f:
+            f.write("#EXTINF:2.000000,\nsegment-1767225604.ts\n")
+        segments, timestamps = await service._playlist_segments(str(playlist))
+        assert segments[-1][2] == timestamps[-1] == 1767225604
+
+    def test_parser_pairs_durations_with_segment_uris(self, tmp_path):
+        """Tags between #EXTINF and its URI are skipped; other URIs are ignored"""
+        path = tmp_path / "stream.m3u8"
+        path.write_bytes(
+            b"#EXTM3U\r\n"
+            b"#EXTINF:6.006000,\r\n"
+            b"#EXT-X-PROGRAM-DATE-TIME:2026-01-01T00:00:00Z\r\n"
+            b"segment-1767225600.ts\r\n"
+            b"#EXT-X-DISCONTINUITY\n"
+            b"#EXTINF:5.5,\n"
+            b"other-1.ts\n"
+            b"#EXTINF:4,\n"
+            b"segment-1767225612.ts"
+        )
+        assert BookmarkService._parse_playlist(str(path)) == [
+            ("segment-1767225600.ts", 6.006, 1767225600),
+            ("segment-1767225612.ts", 4.0, 1767225612),
+        ]
+
+
+class TestSegmentSelection:
+    """Test suite for the bisect-based segment lookup"""
+
+    SEGMENTS = [(f"segment-{ts}.ts", 2.0, ts) for ts in range(1000, 1020, 2)]
+    TIMESTAMPS = [ts for _, _, ts in SEGMENTS]
+
+    def _linear(self, start, end):
+        """Reference: the original full scan"""
+        return [
+            seg for seg in self.SEGMENTS
+            if (seg[2] <= start < seg[2] + seg[1])
+            or (seg[2] <= end < seg[2] + seg[1])
+            or (start <= seg[2] < end)
+        ]
+
+    def test_matches_linear_scan(self):
+        """Every window selects the same segments as a full scan"""
+        for start in range(990, 1025):
+            for length in (0, 1, 6, 7):
+                assert BookmarkService._select_segments(
+                    self.SEGMENTS, self.TIMESTAMPS, start, start + length
+                ) == self._linear(start, start + length)
+
+    def test_closest_segment_picks_nearest_neighbour(self):
+        """Out-of-range and in-between timestamps snap to the nearest start"""
+        closest = BookmarkService._closest_segment
+        assert closest(self.SEGMENTS, self.TIMESTAMPS, 0)[2] == 1000
+        assert closest(self.SEGMENTS, self.TIMESTAMPS, 5000)[2] == 1018
+        assert closest(self.SEGMENTS, self.TIMESTAMPS, 1005)[2] == 1004
+        assert closest(self.SEGMENTS, self.TIMESTAMPS, 1006)[2] == 1006
+
+
+class TestBookmarkFiles:
+    """Test suite for bookmark file handling off the event loop"""
+
+    async def test_delete_removes_existing_files(self, tmp_path):
+        """The clip and thumbnail are removed; a missing file is not an error"""
+        clip = tmp_path / "clip.mp4"
+        clip.write_bytes(b"mp4")
+        bookmark = Mock(video_file_path=str(clip), thumbnail_path=str(tmp_path / "missing.jpg"))
+        db = AsyncMock()
+
+        service = BookmarkService()
+        with patch.object(service, "get_bookmark", AsyncMock(return_value=bookmark)):
+            assert await service.delete_bookmark(uuid4(), db) is True
+
+        assert not clip.exists()
+        db.delete.assert_awaited_once_with(bookmark)
+
+    def test_clip_outputs_reports_missing_clip(self, tmp_path):
+        """A clip FFmpeg did not write reads as size None"""
+        thumb = tmp_path / "thumb.jpg"
+        thumb.write_bytes(b"jpg")
+        assert BookmarkService.clip_outputs(str(tmp_path / "none.mp4"), str(thumb)) == (None, True)
+
+    def test_remove_files_skips_missing_paths(self, tmp_path):
+        """Only files that were actually removed are reported"""
+        clip = tmp_path / "clip.mp4"
+        clip.write_bytes(b"mp4")
+        removed = BookmarkService.remove_files(str(clip), str(tmp_path / "gone.jpg"), None)
+        assert removed == [str(clip)]
+        assert not clip.exists()
@@ -0,0 +1,51 @@
+"""
+Unit Tests for Response Compression
+===================================
+
+Only JSON/text bodies are gzipped; binary media and NDJSON streams pass
+through unchanged, without a stray Content-Encoding header.
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import Response
+from fastapi.testclient import TestClient
+
+from app.middleware.compression import TextGZipMiddleware
+
+BODY = b"x" * 4096
+
+
+@pytest.fixture
+def client():
+    """App serving one large body per content type behind the middleware"""
+    app = FastAPI()
+    app.add_middleware(TextGZipMiddleware, minimum_size=1024)
+
+    @app.get("/{kind}")
+    async def body(kind: str):
+        media_type = {
+            "json": "application/json",
+            "ndjson": "application/x-ndjson",
+            "video": "video/mp4",
+        }[kind]
+        return Response(BODY, media_type=media_type)
+
+    return TestClient(app)
+
+
+class TestTextGZipMiddleware:
+    """Test suite for TextGZipMiddleware"""
+
+    def test_json_is_compressed(self, client):
+        response = client.get("/json", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.content == BODY
+
+    @pytest.mark.parametrize("kind", ["video", "ndjson"])
+    def test_other_types_pass_through(self, client, kind):
+        """Skipped bodies are sent as-is and carry no Content-Encoding"""
+        response = client.get(f"/{kind}", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
+        assert response.headers["content-length"] == str(len(BODY))
+        assert response.content == BODY
@@ -0,0 +1,92 @@
+"""
+Unit Tests for V2 Consumer Schemas
+==================================
+
+Typed WebRTC models must pass MediaSoup/mediasoup-client blobs through
+unchanged: unknown keys are kept, and nothing is added on the way out.
+"""
+
+import warnings
+from uuid import uuid4
+
+import pytest
+from pydantic import ValidationError
+
+from app.schemas.v2.consumer import (
+    ConsumerAttachRequest,
+    ConsumerAttachResponse,
+    ConsumerConnectRequest,
+    TransportInfo,
+)
+
+MEDIASOUP_TRANSPORT = {
+    "id": "transport-1",
+    "iceParameters": {"usernameFragment": "abc", "password": "def", "iceLite": True},
+    "iceCandidates": [
+        {
+            "foundation": "udpcandidate",
+            "priority": 1076302079,
+            "address": "10.30.250.245",
+            "port": 40123,
+            "type": "host",
+            "protocol": "udp"
+        }
+    ],
+    "dtlsParameters": {
+        "role": "auto",
+        "fingerprints": [{"algorithm": "sha-256", "value": "A1:B2"}]
+    }
+}
+
+
+class TestConsumerSchemas:
+    """Test suite for the typed consumer/WebRTC schemas"""
+
+    def test_request_blobs_round_trip_unchanged(self):
+        """Client capabilities and DTLS parameters are forwarded as sent"""
+        capabilities = {
+            "codecs": [
+                {
+                    "mimeType": "video/H264",
+                    "kind": "video",
+                    "clockRate": 90000,
+                    "parameters": {"packetization-mode": 1},
+                    "rtcpFeedback": [{"type": "nack"}]
+                }
+            ],
+            "headerExtensions": []
+        }
+        request = ConsumerAttachRequest(client_id="c1", rtp_capabilities=capabilities)
+        assert request.rtp_capabilities.model_dump(exclude_unset=True) == capabilities
+
+        dtls = {"fingerprints": [{"algorithm": "sha-256", "value": "A1:B2"}]}
+        connect = ConsumerConnectRequest(dtls_parameters=dtls)
+        assert connect.dtls_parameters.model_dump(exclude_unset=True) == dtls
+
+    def test_malformed_blob_is_rejected(self):
+        """Missing keys MediaSoup needs fail validation up front"""
+        with pytest.raises(ValidationError):
+            ConsumerConnectRequest(dtls_parameters={"role": "client"})
+
+    def test_response_serializes_mediasoup_transport_as_is(self):
+        """from_mediasoup output dumps back to the MediaSoup shape without warnings"""
+        response = ConsumerAttachResponse.model_construct(
+            consumer_id=uuid4(),
+            transport=TransportInfo.from_mediasoup(MEDIASOUP_TRANSPORT),
+            rtp_parameters={"codecs": []}
+        )
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            dumped = response.model_dump(mode="json")
+
+        transport = dumped["transport"]
+        assert transport["ice_parameters"] == MEDIASOUP_TRANSPORT["iceParameters"]
+        assert transport["ice_candidates"] == MEDIASOUP_TRANSPORT["iceCandidates"]
+        assert transport["dtls_parameters"] == MEDIASOUP_TRANSPORT["dtlsParameters"]
+        # FastAPI re-validates the dumped response against the model
+        assert ConsumerAttachResponse.model_validate(dumped).transport.id == "transport-1"
+
+    def test_models_are_frozen(self):
+        transport = TransportInfo.from_mediasoup(MEDIASOUP_TRANSPORT)
+        with pytest.raises(ValidationError):
+            transport.id = "other"
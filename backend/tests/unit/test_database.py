@@ -0,0 +1,92 @@
+"""
+Unit Tests for Database Helpers
+===============================
+
+retry_on_disconnect re-runs read-only handlers once when the pooled
+connection turns out to be dead (when pool pre-ping is disabled).
+Models fetch server defaults with RETURNING so routes need no refresh().
+"""
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import app.models  # noqa: F401 - registers the mappers
+from database import Base, get_db, retry_on_disconnect
+
+
+def _db_error(invalidated: bool) -> DBAPIError:
+    return DBAPIError("SELECT 1", {}, Exception("boom"), connection_invalidated=invalidated)
+
+
+class TestRetryOnDisconnect:
+    """Test suite for the retry_on_disconnect decorator"""
+
+    async def test_retries_once_after_invalidated_connection(self):
+        """A dropped connection is rolled back and the handler re-run"""
+        db = AsyncMock()
+        calls = []
+
+        @retry_on_disconnect()
+        async def handler(db):
+            calls.append(db)
+            if len(calls) == 1:
+                raise _db_error(invalidated=True)
+            return "ok"
+
+        assert await handler(db=db) == "ok"
+        assert len(calls) == 2
+        db.rollback.assert_awaited_once()
+
+    async def test_other_database_errors_propagate(self):
+        """Errors on a live connection are not retried"""
+        calls = []
+
+        @retry_on_disconnect()
+        async def handler(db):
+            calls.append(db)
+            raise _db_error(invalidated=False)
+
+        with pytest.raises(DBAPIError):
+            await handler(db=AsyncMock())
+        assert len(calls) == 1
+
+    async def test_gives_up_after_max_retries(self):
+        """The last disconnect error is raised once retries run out"""
+        calls = []
+
+        @retry_on_disconnect(max_retries=1)
+        async def handler(db):
+            calls.append(db)
+            raise _db_error(invalidated=True)
+
+        with pytest.raises(DBAPIError):
+            await handler(db=AsyncMock())
+        assert len(calls) == 2
+
+
+class TestEagerDefaults:
+    """Test suite for server-default loading on the model base"""
+
+    def test_all_models_fetch_server_defaults_on_flush(self):
+        """created_at/updated_at come back with the INSERT/UPDATE itself"""
+        mappers = list(Base.registry.mappers)
+        assert mappers
+        assert all(mapper.eager_defaults is True for mapper in mappers)
+
+
+class TestGetDb:
+    """Test suite for the get_db dependency"""
+
+    async def test_session_is_closed_once(self):
+        """The request's session is closed exactly once on teardown"""
+        with patch.object(AsyncSession, "close", new=AsyncMock()) as close:
+            dependency = get_db()
+            session = await dependency.__anext__()
+            assert isinstance(session, AsyncSession)
+            with pytest.raises(StopAsyncIteration):
+                await dependency.__anext__()
+
+        close.assert_awaited_once()
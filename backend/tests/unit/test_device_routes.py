@@ -0,0 +1,22 @@
+"""
+Unit Tests for Device Route Queries
+===================================
+
+Device listings join each device to its most recent stream only, so a
+camera with several streams is listed once and skip/limit count devices.
+"""
+
+from sqlalchemy.dialects import postgresql
+
+from app.routes.devices import _device_state_q
+
+
+class TestDeviceStateQuery:
+    """Test suite for the device + stream state listing query"""
+
+    def test_joins_one_stream_per_device(self):
+        """Streams are reduced to the latest per camera before the join"""
+        sql = str(_device_state_q().compile(dialect=postgresql.dialect()))
+        assert "DISTINCT ON (streams.camera_id)" in sql
+        assert "streams.created_at DESC" in sql
+        assert "LEFT OUTER JOIN (SELECT DISTINCT ON" in sql
@@ -0,0 +1,279 @@
+"""
+Unit Tests for the Device Stream Service
+========================================
+
+Pipeline, MediaSoup and database collaborators are mocked.
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, Mock, patch
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.services import device_stream_service as svc_module
+from app.services.device_stream_service import DeviceStreamService
+
+
+class TestDeviceStreamServiceStop:
+    """Test suite for DeviceStreamService.stop"""
+
+    @pytest.fixture
+    def device_id(self):
+        """Device identifier"""
+        return uuid4()
+
+    async def test_stop_without_running_pipeline_leaves_records(self, device_id):
+        """Nothing is written when no pipeline was running"""
+        db = AsyncMock()
+        found = Mock()
+        found.scalar_one_or_none.return_value = device_id
+        db.execute.return_value = found
+        with patch.object(svc_module, "rtsp_pipeline") as pipeline, \
+                patch.object(svc_module, "stream_health_monitor") as monitor:
+            pipeline.stop_stream = AsyncMock(return_value=False)
+
+            stopped = await DeviceStreamService().stop(db, device_id)
+
+        assert stopped is False
+        pipeline.stop_stream.assert_awaited_once_with(str(device_id))
+        monitor.unregister_stream.assert_called_once_with(str(device_id))
+        db.commit.assert_not_called()
+
+    async def test_stop_marks_records_in_one_statement(self, device_id):
+        """A stopped pipeline flips device/stream/producers in one round-trip"""
+        db = AsyncMock()
+        counts = Mock()
+        counts.one.return_value = (1, [uuid4()], [uuid4(), uuid4()])
+        db.execute.return_value = counts
+        with patch.object(svc_module, "rtsp_pipeline") as pipeline, \
+                patch.object(svc_module, "stream_health_monitor"), \
+                patch.object(svc_module, "device_cache") as cache:
+            pipeline.stop_stream = AsyncMock(return_value=True)
+            cache.invalidate = AsyncMock()
+
+            stopped = await DeviceStreamService().stop(db, device_id)
+
+        assert stopped is True
+        db.execute.assert_awaited_once()
+        db.commit.assert_awaited_once()
+        cache.invalidate.assert_awaited_once_with(device_id)
+
+    async def test_stop_unknown_device_returns_none(self, device_id):
+        """No device row updated means the device does not exist"""
+        db = AsyncMock()
+        counts = Mock()
+        counts.one.return_value = (0, None, None)
+        db.execute.return_value = counts
+        with patch.object(svc_module, "rtsp_pipeline") as pipeline, \
+                patch.object(svc_module, "stream_health_monitor"):
+            pipeline.stop_stream = AsyncMock(return_value=True)
+
+            stopped = await DeviceStreamService().stop(db, device_id)
+
+        assert stopped is None
+        db.commit.assert_not_called()
+        db.rollback.assert_awaited_once()
+
+
+class TestDeviceStreamServiceLoad:
+    """Test suite for DeviceStreamService.load"""
+
+    async def test_prefers_latest_stream(self):
+        """A device with several streams resolves to its most recent one"""
+        db = AsyncMock()
+        db.execute.return_value.first = Mock(return_value=None)
+
+        assert await DeviceStreamService().load(db, uuid4()) is None
+
+        sql = str(db.execute.await_args.args[0].compile(dialect=postgresql.dialect()))
+        assert "ORDER BY streams.created_at DESC" in sql
+
+
+class TestDeviceStreamServiceStartLock:
+    """Test suite for per-device start serialization"""
+
+    async def test_same_device_shares_lock(self):
+        """Starts of one device (UUID or str) queue on the same lock"""
+        service = DeviceStreamService()
+        device_id = uuid4()
+        assert service.start_lock(device_id) is service.start_lock(str(device_id))
+        assert service.start_lock(device_id) is not service.start_lock(uuid4())
+
+    async def test_stop_drops_idle_lock(self):
+        """stop() forgets the device's lock once no start holds it"""
+        service = DeviceStreamService()
+        device_id = uuid4()
+        service.start_lock(device_id)
+        db = AsyncMock()
+        found = Mock()
+        found.scalar_one_or_none.return_value = device_id
+        db.execute.return_value = found
+        with patch.object(svc_module, "rtsp_pipeline") as pipeline, \
+                patch.object(svc_module, "stream_health_monitor"):
+            pipeline.stop_stream = AsyncMock(return_value=False)
+            await service.stop(db, device_id)
+
+        assert str(device_id) not in service._start_locks
+
+
+class TestDeviceStreamServiceOrphanCleanup:
+    """Test suite for DeviceStreamService.kill_orphaned_ffmpeg"""
+
+    async def test_process_scan_runs_once_per_url(self):
+        """Tracked FFmpeg is always stopped; /proc is only scanned once per URL"""
+        service = DeviceStreamService()
+        with patch.object(svc_module, "rtsp_pipeline") as pipeline, \
+                patch.object(svc_module, "_scan_ffmpeg_cmdlines", return_value={}) as scan:
+            pipeline.terminate_ffmpeg_for_url = AsyncMock(return_value=0)
+
+            await service.kill_orphaned_ffmpeg("rtsp://cam/1")
+            await service.kill_orphaned_ffmpeg("rtsp://cam/1")
+
+        assert pipeline.terminate_ffmpeg_for_url.await_count == 2
+        scan.assert_called_once_with()
+
+    async def test_sweeps_for_many_urls_share_one_scan(self):
+        """A burst of starts walks /proc once, not once per RTSP URL"""
+        service = DeviceStreamService()
+        with patch.object(svc_module, "rtsp_pipeline") as pipeline, \
+                patch.object(svc_module, "_scan_ffmpeg_cmdlines", return_value={}) as scan:
+            pipeline.terminate_ffmpeg_for_url = AsyncMock(return_value=0)
+
+            await asyncio.gather(*[service.kill_orphaned_ffmpeg(f"rtsp://cam/{i}") for i in range(5)])
+
+        scan.assert_called_once_with()
+
+    def test_scan_maps_ffmpeg_inputs_to_pids(self):
+        """Only FFmpeg command lines are read, keyed by their -i argument"""
+        def fake_proc(pid, name, cmdline):
+            proc = Mock(info={"pid": pid, "name": name})
+            proc.cmdline.return_value = cmdline
+            return proc
+
+        procs = [
+            fake_proc(10, "ffmpeg", ["ffmpeg", "-rtsp_transport", "tcp", "-i", "rtsp://cam/1", "-f", "rtp"]),
+            fake_proc(11, "ffmpeg", ["ffmpeg", "-i", "rtsp://cam/1"]),
+            fake_proc(12, "ffmpeg", ["ffmpeg", "-i", "rtsp://cam/2"]),
+            fake_proc(13, "python", ["python", "-i", "rtsp://cam/1"]),
+        ]
+        with patch.object(svc_module.psutil, "process_iter", return_value=procs):
+            assert svc_module._scan_ffmpeg_cmdlines() == {"rtsp://cam/1": [10, 11], "rtsp://cam/2": [12]}
+        procs[3].cmdline.assert_not_called()
+
+
+class TestDeviceStreamServiceBackground:
+    """Test suite for DeviceStreamService background bookkeeping"""
+
+    async def test_background_failures_are_logged_not_raised(self):
+        """A failing background coroutine is dropped from the task set"""
+        service = DeviceStreamService()
+
+        async def boom():
+            raise RuntimeError("redis down")
+
+        service._run_in_background(boom(), "test")
+        assert len(service._background_tasks) == 1
+        await asyncio.gather(*service._background_tasks)
+        await asyncio.sleep(0)
+        assert not service._background_tasks
+
+
+class TestDeviceStreamServiceStart:
+    """Test suite for DeviceStreamService.start failure paths"""
+
+    async def test_ffmpeg_failure_cancels_ssrc_capture(self):
+        """An FFmpeg start error surfaces without waiting out the SSRC capture timeout"""
+        device = Mock(id=uuid4(), rtsp_url="rtsp://camera/stream")
+        capture_cancelled = asyncio.Event()
+
+        async def slow_capture(port, timeout_ms, ready_event):
+            ready_event.set()
+            try:
+                await asyncio.sleep(timeout_ms / 1000)
+            except asyncio.CancelledError:
+                capture_cancelled.set()
+                raise
+
+        with patch.object(svc_module, "rtsp_pipeline") as pipeline, \
+                patch.object(svc_module, "mediasoup_client") as client, \
+                patch.object(svc_module, "active_stream_registry") as registry, \
+                patch.object(svc_module, "_scan_ffmpeg_cmdlines", return_value={}):
+            pipeline.active_streams = {}
+            pipeline.start_stream = AsyncMock(return_value={"status": "error", "error": "boom"})
+            pipeline.terminate_ffmpeg_for_url = AsyncMock(return_value=0)
+            registry.get = AsyncMock(return_value=None)
+            client.close_transports_for_room = AsyncMock(return_value=0)
+            client.get_port_for_room = AsyncMock(return_value=20100)
+            client.capture_ssrc = slow_capture
+
+            with pytest.raises(svc_module.StreamStartError, match="boom"):
+                await asyncio.wait_for(DeviceStreamService().start(AsyncMock(), device), timeout=2)
+
+        assert capture_cancelled.is_set()
+
+
+class TestDeviceStreamServiceReuse:
+    """Test suite for DeviceStreamService.find_reusable"""
+
+    @pytest.fixture
+    def pipeline(self):
+        """Pipeline running room-1 from rtsp://cam/1"""
+        with patch.object(svc_module, "rtsp_pipeline") as pipeline:
+            pipeline.active_streams = {"room-1": {"rtsp_url": "rtsp://cam/1"}}
+            pipeline.is_healthy = Mock(return_value=True)
+            pipeline.stop_stream = AsyncMock(return_value=True)
+            yield pipeline
+
+    async def test_healthy_stream_is_reused(self, pipeline):
+        """A repeated start with the same URL reattaches without stopping"""
+        info = await DeviceStreamService().find_reusable("room-1", "rtsp://cam/1")
+        assert info == {"rtsp_url": "rtsp://cam/1"}
+        pipeline.stop_stream.assert_not_awaited()
+
+    async def test_changed_url_stops_stream(self, pipeline):
+        """A stream still reading the old RTSP URL is rebuilt"""
+        assert await DeviceStreamService().find_reusable("room-1", "rtsp://cam/2") is None
+        pipeline.stop_stream.assert_awaited_once_with("room-1")
+
+    async def test_exited_ffmpeg_stops_stream(self, pipeline):
+        """A stream whose FFmpeg died is rebuilt"""
+        pipeline.is_healthy.return_value = False
+        assert await DeviceStreamService().find_reusable("room-1", "rtsp://cam/1") is None
+        pipeline.stop_stream.assert_awaited_once_with("room-1")
+
+    async def test_remote_stream_with_old_url_is_not_reused(self, pipeline):
+        """Another worker's entry only counts while it reads the current URL"""
+        pipeline.active_streams = {}
+        with patch.object(svc_module, "active_stream_registry") as registry:
+            registry.get = AsyncMock(return_value={"rtsp_url": "rtsp://cam/1", "owner": "host:2"})
+            service = DeviceStreamService()
+            assert await service.find_reusable("room-1", "rtsp://cam/2") is None
+            assert (await service.find_reusable("room-1", "rtsp://cam/1"))["owner"] == "host:2"
+        pipeline.stop_stream.assert_not_awaited()
+
+
+class TestWaitForExit:
+    """Test suite for the FFmpeg exit wait helper"""
+
+    async def test_returns_when_process_exits(self):
+        """Exited processes are not reported as survivors, and the wait ends early"""
+        proc = await asyncio.create_subprocess_exec("sleep", "0.2")
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+
+        survivors = await svc_module._wait_for_exit([proc.pid], timeout=5)
+
+        assert survivors == []
+        assert loop.time() - started < 2
+        await proc.wait()
+
+    async def test_reports_survivors_after_timeout(self):
+        """Processes still running at the timeout are returned"""
+        proc = await asyncio.create_subprocess_exec("sleep", "5")
+        try:
+            assert await svc_module._wait_for_exit([proc.pid], timeout=0.2) == [proc.pid]
+        finally:
+            proc.kill()
+            await proc.wait()
@@ -5,9 +5,10 @@ Unit Tests for JWT Authentication Service
 Tests JWT token generation, validation, and refresh functionality.
 """
 
+import orjson
 import pytest
 import time
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from unittest.mock import Mock, patch
 
 # Import the auth service (adjust path as needed)
@@ -177,6 +178,222 @@ class TestScopeValidation:
         assert has_scope_with_wildcard(user_scopes, "bookmarks:write") == False
 
 
+class TestVerifiedTokenCache:
+    """Test suite for AuthService.verify_token result caching"""
+
+    @pytest.fixture
+    def service(self):
+        """Real auth service with a fresh cache"""
+        from app.services.auth_service import AuthService
+        return AuthService()
+
+    def _token(self, service, token_type="access", expires_in=3600):
+        import jwt
+        payload = {
+            "sub": "test-client",
+            "scopes": ["streams:read"],
+            "type": token_type,
+            "exp": int(time.time()) + expires_in
+        }
+        return jwt.encode(payload, service.secret_key, algorithm=service.algorithm)
+
+    def test_repeated_verification_skips_decode(self, service):
+        """A verified token is served from the cache on the next request"""
+        token = self._token(service)
+        first = service.verify_token(token)
+        with patch.object(service._jwt, "decode") as decode:
+            second = service.verify_token(token)
+        decode.assert_not_called()
+        assert second == first
+        # Callers get their own copy (get_current_user adds client_id)
+        second["client_id"] = "x"
+        assert "client_id" not in service.verify_token(token)
+
+    def test_cached_token_is_not_served_past_expiry(self, service):
+        """Expiry is re-checked against the token's own exp claim"""
+        token = self._token(service, expires_in=-10)
+        # Cached while it was still valid
+        service._verified[token] = ({"sub": "test-client", "type": "access", "exp": int(time.time()) - 10}, None)
+        with pytest.raises(ValueError, match="expired"):
+            service.verify_token(token)
+
+    def test_scopes_are_checked_against_a_set(self, service):
+        """verify_token precomputes the scope set has_scope looks up"""
+        payload = service.verify_token(self._token(service))
+        assert payload.scopes_set == frozenset({"streams:read"})
+        # The set stays off the claims, so the payload still serializes
+        assert orjson.loads(orjson.dumps(payload)) == dict(payload)
+        assert "_scopes_set" not in payload
+        assert service.has_scope(payload, "streams:read")
+        assert not service.has_scope(payload, "streams:write")
+        # Payloads built elsewhere still work off the plain list
+        assert service.has_scope({"scopes": ["streams:read"]}, "streams:read")
+
+    def test_tokens_without_exp_are_rejected(self, service):
+        """exp is a required claim"""
+        import jwt
+        token = jwt.encode({"sub": "test-client", "type": "access"}, service.secret_key, algorithm=service.algorithm)
+        with pytest.raises(ValueError, match="exp"):
+            service.verify_token(token)
+
+    def test_non_object_payload_is_rejected(self, service):
+        """Signed but malformed claims fail verification as an invalid token"""
+        import jwt
+        token = jwt.api_jws.encode(b"[1, 2]", service.secret_key, algorithm=service.algorithm)
+        with pytest.raises(ValueError, match="Invalid token"):
+            service.verify_token(token)
+
+    def test_rejected_tokens_are_not_cached(self, service):
+        """Refresh-type tokens keep failing verification"""
+        token = self._token(service, token_type="refresh")
+        for _ in range(2):
+            with pytest.raises(ValueError, match="Invalid token type"):
+                service.verify_token(token)
+
+
+class TestSecretVerification:
+    """Test suite for AuthService secret hashing and comparison"""
+
+    @pytest.fixture
+    def service(self):
+        from app.services.auth_service import AuthService
+        return AuthService()
+
+    def test_matching_secret_verifies(self, service):
+        """The stored hex hash of a secret verifies against that secret"""
+        assert service._verify_secret("s3cret", service._hash_secret("s3cret"))
+
+    def test_wrong_or_malformed_hash_is_rejected(self, service):
+        """A different secret or a non-hex stored value never verifies"""
+        assert not service._verify_secret("other", service._hash_secret("s3cret"))
+        assert not service._verify_secret("s3cret", "not-hex")
+        assert not service._verify_secret("s3cret", None)
+        assert not service._verify_secret("s3cret", "b2$not-hex")
+
+    def test_new_hashes_are_blake2b_and_legacy_sha256_still_verifies(self, service):
+        """Stored SHA-256 hashes from before the BLAKE2b switch keep working"""
+        import hashlib
+        assert service._hash_secret("s3cret").startswith("b2$")
+        assert service._verify_secret("s3cret", hashlib.sha256(b"s3cret").hexdigest())
+
+
+class TestRefreshAccessToken:
+    """Test suite for AuthService.refresh_access_token against a mocked session"""
+
+    @pytest.fixture
+    def service(self):
+        from app.services.auth_service import AuthService
+        return AuthService()
+
+    def _db(self, row):
+        from unittest.mock import AsyncMock
+        db = AsyncMock()
+        db.add = Mock()
+        db.execute.return_value.first = Mock(return_value=row)
+        return db
+
+    async def test_token_and_client_load_in_one_query(self, service):
+        """The refresh token and its client come back from a single SELECT"""
+        token_record = Mock(
+            is_revoked=False,
+            client_id="test-client",
+            expires_at=datetime.now(timezone.utc) + timedelta(days=1)
+        )
+        client = Mock(client_id="test-client", scopes=["streams:read"], is_active=True)
+        db = self._db((token_record, client))
+
+        result = await service.refresh_access_token("refresh", db)
+
+        assert db.execute.await_count == 1
+        db.commit.assert_awaited_once()
+        assert token_record.is_revoked is True
+        assert result["refresh_token"]
+        claims = service.verify_token(result["access_token"])
+        assert claims["exp"] - claims["iat"] == result["expires_in"]
+        assert token_record.used_at == client.last_used_at
+
+    async def test_missing_client_reports_inactive(self, service):
+        """A token whose client row is gone is rejected as inactive"""
+        token_record = Mock(is_revoked=False, expires_at=datetime.now(timezone.utc) + timedelta(days=1))
+        with pytest.raises(ValueError, match="inactive"):
+            await service.refresh_access_token("refresh", self._db((token_record, None)))
+
+    async def test_unknown_token_is_invalid(self, service):
+        """A miss on both the BLAKE2b and the legacy SHA-256 hash is rejected"""
+        db = self._db(None)
+        with pytest.raises(ValueError, match="Invalid refresh token"):
+            await service.refresh_access_token("refresh", db)
+        assert db.execute.await_count == 2
+
+
+class TestCreateClient:
+    """Test suite for AuthService.create_client against a mocked session"""
+
+    @pytest.fixture
+    def service(self):
+        from app.services.auth_service import AuthService
+        return AuthService()
+
+    def _db(self, created_at):
+        from unittest.mock import AsyncMock
+        db = AsyncMock()
+        db.execute.return_value.scalar_one_or_none = Mock(return_value=created_at)
+        return db
+
+    async def test_client_is_created_with_one_insert(self, service):
+        """created_at comes from INSERT ... RETURNING, no existence check or reload"""
+        created_at = datetime.now(timezone.utc)
+        db = self._db(created_at)
+
+        result = await service.create_client("ruth-ai", ["streams:read"], db)
+
+        assert db.execute.await_count == 1
+        db.commit.assert_awaited_once()
+        db.refresh.assert_not_called()
+        assert result["created_at"] == created_at.isoformat()
+        assert service._verify_secret(
+            result["client_secret"],
+            db.execute.await_args.args[0].compile().params["client_secret_hash"]
+        )
+
+    async def test_existing_client_id_is_rejected(self, service):
+        db = self._db(None)
+        with pytest.raises(ValueError, match="already exists"):
+            await service.create_client("ruth-ai", ["streams:read"], db)
+        db.rollback.assert_awaited_once()
+        db.commit.assert_not_called()
+
+
+class TestDeactivateClient:
+    """Test suite for AuthService.deactivate_client against a mocked session"""
+
+    async def test_live_refresh_tokens_are_revoked(self):
+        """Deactivation is two UPDATEs (client, refresh tokens) and one commit"""
+        from unittest.mock import AsyncMock
+        from app.services.auth_service import AuthService
+
+        db = AsyncMock()
+        db.execute.return_value.scalar_one_or_none = Mock(return_value="client-uuid")
+
+        await AuthService().deactivate_client("test-client", db)
+
+        statements = [str(call.args[0]) for call in db.execute.await_args_list]
+        assert [s.split(" SET")[0] for s in statements] == ["UPDATE jwt_tokens", "UPDATE refresh_tokens"]
+        db.commit.assert_awaited_once()
+
+    async def test_unknown_client_is_a_noop(self):
+        from unittest.mock import AsyncMock
+        from app.services.auth_service import AuthService
+
+        db = AsyncMock()
+        db.execute.return_value.scalar_one_or_none = Mock(return_value=None)
+
+        await AuthService().deactivate_client("missing", db)
+
+        assert db.execute.await_count == 1
+        db.commit.assert_not_called()
+
+
 # Run tests
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,126 @@
+"""
+Unit Tests for the MediaSoup Client
+===================================
+
+Requests are tagged with an id the server echoes back, so concurrent
+callers share one WebSocket and replies may arrive in any order.
+"""
+
+import asyncio
+import json
+
+import pytest
+import websockets
+
+from app.services.mediasoup_client import MediaSoupClient
+
+
+class FakeWebSocket:
+    """In-memory socket: records sent requests, yields queued replies"""
+
+    def __init__(self):
+        self.closed = False
+        self.sent = []
+        self._replies = asyncio.Queue()
+
+    async def send(self, message):
+        self.sent.append(json.loads(message))
+
+    def reply(self, message):
+        self._replies.put_nowait(json.dumps(message))
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        message = await self._replies.get()
+        if message is None:
+            raise StopAsyncIteration
+        return message
+
+    async def close(self):
+        self.closed = True
+        self._replies.put_nowait(None)
+
+
+class TestMediaSoupClient:
+    """Test suite for request pipelining in MediaSoupClient"""
+
+    @pytest.fixture
+    async def client(self):
+        """Client wired to a FakeWebSocket with its listener running"""
+        client = MediaSoupClient(request_timeout=1.0)
+        client.websocket = FakeWebSocket()
+        client.connected = True
+        client._listener = asyncio.create_task(client._reader_loop(client.websocket))
+        yield client
+        await client.disconnect()
+
+    async def test_replies_are_matched_by_id(self, client):
+        """Out-of-order replies resolve the request they answer"""
+        first = asyncio.create_task(client.get_producers("room-1"))
+        second = asyncio.create_task(client.get_producers("room-2"))
+        while len(client.websocket.sent) < 2:
+            await asyncio.sleep(0)
+
+        req1, req2 = client.websocket.sent
+        assert req1["id"] != req2["id"]
+        client.websocket.reply({"id": req2["id"], "producers": ["p2"]})
+        client.websocket.reply({"id": req1["id"], "producers": ["p1"]})
+
+        assert await first == ["p1"]
+        assert await second == ["p2"]
+        assert client.response_futures == {}
+
+    async def test_error_reply_raises(self, client):
+        """An error reply fails only the request it answers"""
+        task = asyncio.create_task(client.close_producer("p1"))
+        while not client.websocket.sent:
+            await asyncio.sleep(0)
+        client.websocket.reply({"id": client.websocket.sent[0]["id"], "type": "error", "error": "boom"})
+
+        with pytest.raises(RuntimeError, match="boom"):
+            await task
+
+    async def test_closed_connection_fails_pending_requests(self, client):
+        """Requests still waiting when the socket drops get an error, not a hang"""
+        task = asyncio.create_task(client.get_producers("room-1"))
+        while not client.websocket.sent:
+            await asyncio.sleep(0)
+        await client.websocket.close()
+
+        with pytest.raises(RuntimeError, match="connection closed"):
+            await task
+        assert client.connected is False
+
+    async def test_error_reply_keeps_connection(self, client):
+        """A MediaSoup error payload is not a transport failure"""
+        websocket = client.websocket
+        task = asyncio.create_task(client.close_producer("p1"))
+        while not websocket.sent:
+            await asyncio.sleep(0)
+        websocket.reply({"id": websocket.sent[0]["id"], "type": "error", "error": "transport closed"})
+
+        with pytest.raises(RuntimeError, match="transport closed"):
+            await task
+        assert client.websocket is websocket
+        assert client.connected is True
+        assert websocket.closed is False
+
+    async def test_send_failure_drops_connection(self, client):
+        """A failed send closes the socket and fails the other pending requests"""
+        websocket = client.websocket
+        pending = asyncio.create_task(client.get_producers("room-1"))
+        while not websocket.sent:
+            await asyncio.sleep(0)
+
+        async def broken_send(message):
+            raise websockets.exceptions.ConnectionClosedError(None, None)
+
+        websocket.send = broken_send
+        with pytest.raises(RuntimeError, match="connection closed"):
+            await client.get_producers("room-2")
+        with pytest.raises(RuntimeError, match="connection closed"):
+            await pending
+        assert websocket.closed is True
+        assert client.websocket is None
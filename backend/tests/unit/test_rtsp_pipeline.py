@@ -0,0 +1,136 @@
+"""
+Unit Tests for the RTSP Pipeline SSRC Cache
+===========================================
+
+capture_ssrc_cached reuses a recent probe per RTSP URL instead of spawning
+a temporary FFmpeg on every start, and concurrent probes for one URL are
+shared.
+"""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.services.rtsp_pipeline import RTSPPipeline
+
+RTSP_URL = "rtsp://camera.local/stream"
+
+
+class TestSSRCCache:
+    """Test suite for RTSPPipeline SSRC probe sharing and caching"""
+
+    @pytest.fixture
+    def pipeline(self, monkeypatch):
+        """Pipeline whose temporary-FFmpeg probe is replaced by a counter"""
+        pipeline = RTSPPipeline()
+        pipeline.probes = 0
+
+        async def fake_probe(rtsp_url, timeout):
+            pipeline.probes += 1
+            await asyncio.sleep(0.01)
+            ssrc = 1000 + pipeline.probes
+            pipeline._ssrc_cache[rtsp_url] = (ssrc, time.monotonic())
+            return ssrc
+
+        monkeypatch.setattr(pipeline, "_probe_ssrc", fake_probe)
+        return pipeline
+
+    async def test_reuses_recent_capture(self, pipeline):
+        """A second start within the TTL does not probe again"""
+        assert await pipeline.capture_ssrc_cached(RTSP_URL) == 1001
+        assert await pipeline.capture_ssrc_cached(RTSP_URL) == 1001
+        assert pipeline.probes == 1
+
+    async def test_concurrent_starts_share_one_probe(self, pipeline):
+        """Simultaneous starts for one URL wait for a single probe"""
+        results = await asyncio.gather(*[pipeline.capture_ssrc_cached(RTSP_URL) for _ in range(3)])
+        assert results == [1001, 1001, 1001]
+        assert pipeline.probes == 1
+
+    async def test_forget_forces_new_probe(self, pipeline):
+        """forget_ssrc (called on stop) drops the cached value"""
+        await pipeline.capture_ssrc_cached(RTSP_URL)
+        pipeline.forget_ssrc(RTSP_URL)
+        assert await pipeline.capture_ssrc_cached(RTSP_URL) == 1002
+
+    async def test_zero_ttl_disables_cache(self, pipeline, monkeypatch):
+        """SSRC_CACHE_TTL=0 probes every time"""
+        monkeypatch.setattr("app.services.rtsp_pipeline.settings.ssrc_cache_ttl", 0)
+        await pipeline.capture_ssrc_cached(RTSP_URL)
+        await pipeline.capture_ssrc_cached(RTSP_URL)
+        assert pipeline.probes == 2
+
+    async def test_concurrent_uncached_probes_are_shared(self, pipeline):
+        """Racing validates for one URL share a single temporary FFmpeg"""
+        results = await asyncio.gather(*[pipeline.capture_ssrc_with_temp_ffmpeg(RTSP_URL) for _ in range(3)])
+        assert results == [1001, 1001, 1001]
+        assert pipeline.probes == 1
+        assert not pipeline._ssrc_probes
+
+    async def test_cancelled_caller_does_not_cancel_shared_probe(self, pipeline):
+        """A caller that goes away leaves the probe running for the others"""
+        first = asyncio.create_task(pipeline.capture_ssrc_with_temp_ffmpeg(RTSP_URL))
+        second = asyncio.create_task(pipeline.capture_ssrc_with_temp_ffmpeg(RTSP_URL))
+        await asyncio.sleep(0)
+        first.cancel()
+        assert await second == 1001
+
+
+class TestTrackedFFmpeg:
+    """Test suite for RTSPPipeline.terminate_ffmpeg_for_url"""
+
+    async def test_terminates_tracked_processes(self):
+        """Tracked processes are stopped via their handles and untracked"""
+        pipeline = RTSPPipeline()
+        proc = await asyncio.create_subprocess_exec("sleep", "30")
+        pipeline.ffmpeg_by_url[RTSP_URL] = {proc}
+        pipeline.ffmpeg_processes["room-1"] = proc
+
+        assert await pipeline.terminate_ffmpeg_for_url(RTSP_URL) == 1
+        assert proc.returncode is not None
+        assert RTSP_URL not in pipeline.ffmpeg_by_url
+        assert "room-1" not in pipeline.ffmpeg_processes
+
+    async def test_untracked_url_is_a_noop(self):
+        """Nothing to do for a URL this worker never spawned FFmpeg for"""
+        assert await RTSPPipeline().terminate_ffmpeg_for_url(RTSP_URL) == 0
+
+    async def test_stop_untracked_stream_uses_pid_file(self, tmp_path, monkeypatch):
+        """Without a process handle, stop kills the FFmpeg named in the PID file"""
+        monkeypatch.setattr("app.services.rtsp_pipeline.FFMPEG_PID_DIR", str(tmp_path))
+        monkeypatch.setattr("app.services.rtsp_pipeline._is_ffmpeg_for", lambda pid, stream_id: True)
+        proc = await asyncio.create_subprocess_exec("sleep", "30")
+        # Written by a previous backend process
+        RTSPPipeline()._write_pid_file("room-1", proc.pid)
+
+        with patch("app.services.rtsp_pipeline.active_stream_registry.remove", new=AsyncMock()), \
+             patch("app.services.rtsp_pipeline.mediasoup_client.get_producers", new=AsyncMock(return_value=[])):
+            await RTSPPipeline().stop_stream("room-1")
+
+        assert await asyncio.wait_for(proc.wait(), timeout=2) is not None
+        assert not (tmp_path / "room-1.pid").exists()
+
+    def test_pid_file_is_kept_for_a_newer_process(self, tmp_path, monkeypatch):
+        """An exiting FFmpeg does not remove the PID file of its replacement"""
+        monkeypatch.setattr("app.services.rtsp_pipeline.FFMPEG_PID_DIR", str(tmp_path))
+        pipeline = RTSPPipeline()
+        pipeline._write_pid_file("room-1", 200)
+
+        assert pipeline._pop_pid_file("room-1", 100) is None
+        assert pipeline._pop_pid_file("room-1") == 200
+        assert pipeline._pop_pid_file("room-1") is None
+
+    async def test_is_healthy_tracks_ffmpeg_exit(self):
+        """A stream is healthy only while its FFmpeg is running"""
+        pipeline = RTSPPipeline()
+        proc = await asyncio.create_subprocess_exec("sleep", "30")
+        pipeline.active_streams["room-1"] = {"rtsp_url": RTSP_URL}
+        pipeline.ffmpeg_processes["room-1"] = proc
+        assert pipeline.is_healthy("room-1")
+
+        proc.kill()
+        await proc.wait()
+        assert not pipeline.is_healthy("room-1")
+        assert not pipeline.is_healthy("room-2")
@@ -0,0 +1,63 @@
+"""
+Unit Tests for Snapshot Image Responses
+=======================================
+
+Snapshot images are handed to nginx via X-Accel-Redirect when
+SNAPSHOT_ACCEL_REDIRECT is set, and served directly otherwise.
+"""
+
+import os
+
+import pytest
+from fastapi.responses import FileResponse
+
+from app.services.snapshot_service import SnapshotService
+
+
+class TestImageResponse:
+    """Test suite for SnapshotService.image_response"""
+
+    @pytest.fixture
+    def service(self, tmp_path):
+        """Service rooted at a temporary snapshot directory"""
+        service = SnapshotService()
+        service.snapshot_base_dir = str(tmp_path)
+        return service
+
+    @pytest.fixture
+    def image(self, tmp_path):
+        """A snapshot image on disk"""
+        os.makedirs(tmp_path / "stream-1")
+        path = tmp_path / "stream-1" / "snap.jpg"
+        path.write_bytes(b"\xff\xd8\xff")
+        return str(path)
+
+    def test_accel_redirect_hands_file_to_nginx(self, service, image, monkeypatch):
+        """The response carries no body, only the internal location"""
+        monkeypatch.setattr("app.services.snapshot_service.settings.snapshot_accel_redirect", "/_protected/snapshots/")
+        response = service.image_response(image, "image/jpeg", headers={"Cache-Control": "public"})
+        assert response.headers["x-accel-redirect"] == "/_protected/snapshots/stream-1/snap.jpg"
+        assert response.headers["cache-control"] == "public"
+        assert response.body == b""
+
+    def test_serves_file_directly_without_accel(self, service, image, monkeypatch):
+        """Without a configured location the file is streamed by the app"""
+        monkeypatch.setattr("app.services.snapshot_service.settings.snapshot_accel_redirect", "")
+        response = service.image_response(image, "image/jpeg", filename="snap.jpg")
+        assert isinstance(response, FileResponse)
+        assert response.headers["content-length"] == "3"
+        assert response.headers["content-disposition"] == 'attachment; filename="snap.jpg"'
+
+    def test_file_outside_base_dir_is_served_directly(self, service, tmp_path, monkeypatch):
+        """Paths nginx cannot map are never redirected"""
+        monkeypatch.setattr("app.services.snapshot_service.settings.snapshot_accel_redirect", "/_protected/snapshots/")
+        service.snapshot_base_dir = str(tmp_path / "other")
+        outside = tmp_path / "outside.jpg"
+        outside.write_bytes(b"x")
+        assert isinstance(service.image_response(str(outside), "image/jpeg"), FileResponse)
+
+    def test_missing_file_returns_none(self, service, tmp_path, monkeypatch):
+        """A missing file maps to a 404 in the routes"""
+        monkeypatch.setattr("app.services.snapshot_service.settings.snapshot_accel_redirect", "")
+        assert service.image_response(str(tmp_path / "gone.jpg"), "image/jpeg") is None
+        assert service.image_response(None, "image/jpeg") is None
@@ -0,0 +1,38 @@
+"""
+Unit Tests for the Stream Health Monitor
+========================================
+
+Device status changes made by the monitor drop the cached device payloads,
+so listings do not show a failed stream as live until the cache expires.
+"""
+
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
+from uuid import uuid4
+
+from app.services.device_cache import device_cache
+from app.services.stream_health_monitor import StreamHealthMonitor
+
+
+class TestUpdateDeviceStatus:
+    """Test suite for StreamHealthMonitor._update_device_status"""
+
+    async def test_deactivation_invalidates_device_cache(self):
+        """The device and its stream are updated, then the cache entry dropped"""
+        room_id = str(uuid4())
+        device, stream = Mock(is_active=True), Mock()
+        db = AsyncMock()
+        db.execute.side_effect = [
+            Mock(scalar_one_or_none=Mock(return_value=device)),
+            Mock(scalar_one_or_none=Mock(return_value=stream)),
+        ]
+        session = MagicMock()
+        session.__aenter__ = AsyncMock(return_value=db)
+        session.__aexit__ = AsyncMock(return_value=False)
+
+        with patch("database.AsyncSessionLocal", Mock(return_value=session)), \
+                patch.object(device_cache, "invalidate", AsyncMock()) as invalidate:
+            await StreamHealthMonitor()._update_device_status(room_id, is_active=False)
+
+        assert device.is_active is False
+        db.commit.assert_awaited_once()
+        invalidate.assert_awaited_once_with(room_id)
@@ -4,6 +4,10 @@ import { useState, useEffect } from 'react';
 import { getDevices, createDevice, updateDevice, deleteDevice, Device } from '@/lib/api';
 import { CameraIcon, TrashIcon, CheckCircleIcon, PencilIcon } from '@heroicons/react/24/outline';
 
+// The management page lists every device; above DEVICE_STREAM_THRESHOLD
+// getDevices reads them from the NDJSON stream endpoint
+const DEVICE_LIST_LIMIT = 10000;
+
 export default function DevicesPage() {
   const [devices, setDevices] = useState<Device[]>([]);
   const [isModalOpen, setIsModalOpen] = useState(false);
@@ -28,7 +32,7 @@ export default function DevicesPage() {
   const loadDevices = async () => {
     setIsLoading(true);
     try {
-      const data = await getDevices();
+      const data = await getDevices(DEVICE_LIST_LIMIT);
       setDevices(data);
       setError(null);
     } catch (err: any) {
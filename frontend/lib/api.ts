@@ -45,13 +45,21 @@ export interface Snapshot {
   created_at: string;
 }
 
+// Above this many devices, fetch the NDJSON stream instead of one JSON array
+const DEVICE_STREAM_THRESHOLD = 500;
+
 // API functions
-export async function getDevices(): Promise<Device[]> {
+export async function getDevices(limit?: number): Promise<Device[]> {
+  if (limit !== undefined && limit > DEVICE_STREAM_THRESHOLD) {
+    return getDevicesStream(limit);
+  }
+
   const controller = new AbortController();
   const timeoutId = setTimeout(() => controller.abort(), 10000); // 10 second timeout
 
   try {
-    const response = await fetch(`${API_URL}/api/v1/devices`, {
+    const query = limit !== undefined ? `?limit=${limit}` : '';
+    const response = await fetch(`${API_URL}/api/v1/devices${query}`, {
       headers: getHeaders(),
       signal: controller.signal,
     });
@@ -70,6 +78,47 @@ export async function getDevices(): Promise<Device[]> {
   }
 }
 
+// Large listings: the backend streams one device per line (NDJSON)
+async function getDevicesStream(limit: number): Promise<Device[]> {
+  const controller = new AbortController();
+  const timeoutId = setTimeout(() => controller.abort(), 30000); // 30 second timeout
+
+  try {
+    const response = await fetch(`${API_URL}/api/v1/devices/stream?limit=${limit}`, {
+      headers: getHeaders(),
+      signal: controller.signal,
+    });
+
+    if (!response.ok || !response.body) {
+      throw new Error(`Failed to fetch devices: HTTP ${response.status}`);
+    }
+
+    const devices: Device[] = [];
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffered = '';
+    while (true) {
+      const { done, value } = await reader.read();
+      buffered += decoder.decode(value, { stream: !done });
+      const lines = buffered.split('\n');
+      buffered = lines.pop() ?? '';
+      for (const line of lines) {
+        if (line) devices.push(JSON.parse(line));
+      }
+      if (done) break;
+    }
+    if (buffered) devices.push(JSON.parse(buffered));
+    clearTimeout(timeoutId);
+    return devices;
+  } catch (err: any) {
+    clearTimeout(timeoutId);
+    if (err.name === 'AbortError') {
+      throw new Error('Request timeout - backend may be unresponsive');
+    }
+    throw err;
+  }
+}
+
 export async function createDevice(device: { name: string; rtsp_url: string; description?: string; location?: string }): Promise<Device> {
   // Add timeout to prevent hanging
   const controller = new AbortController();
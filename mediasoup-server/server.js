@@ -542,9 +542,12 @@ wss.on('connection', (ws) => {
   console.log('WebSocket client connected');
   
   ws.on('message', async (message) => {
+    // Echoed back so the client can match replies to pipelined requests
+    let id;
     try {
       const data = JSON.parse(message);
       const { type, payload } = data;
+      id = data.id;
       
       console.log(`WebSocket message: ${type}`);
       
@@ -899,11 +902,12 @@ wss.on('connection', (ws) => {
           console.warn(`Unknown message type: ${type}`);
       }
       
-      ws.send(JSON.stringify(response));
+      ws.send(JSON.stringify({ ...response, id }));
       
     } catch (error) {
       console.error('WebSocket message error:', error);
       ws.send(JSON.stringify({
+        id,
         type: 'error',
         error: error.message,
       }));